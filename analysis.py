@@ -0,0 +1,70 @@
+SECTIONS = ('strengths', 'weaknesses', 'red_herrings')
+MAX_BULLETS = 3
+
+DEFAULTS = {
+    'strengths': "Building detective skills! Keep going! 🌟",
+    'weaknesses': "Practice makes perfect! 💪",
+    'red_herrings': "No major confusions detected! 🎯"
+}
+
+
+class AnalysisParser:
+    """Incremental STRENGTHS / PRACTICE / RED_HERRINGS parser for streamed model output.
+
+    Feed text chunks as they arrive; every bullet is parsed as soon as its
+    line is complete, so snapshot() can be rendered while the model is
+    still writing.
+    """
+
+    def __init__(self):
+        self.result = {section: [] for section in SECTIONS}
+        self.current_section = None
+        self._buffer = ''
+
+    def feed(self, chunk):
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split('\n')
+        for line in lines:
+            self._parse_line(line)
+
+    def close(self):
+        """Flush the last line and fill empty sections with defaults"""
+        if self._buffer:
+            self._parse_line(self._buffer)
+            self._buffer = ''
+        for section in SECTIONS:
+            if not self.result[section]:
+                self.result[section] = [DEFAULTS[section]]
+        return self.result
+
+    def snapshot(self):
+        return {section: list(bullets) for section, bullets in self.result.items()}
+
+    def _parse_line(self, line):
+        line = line.strip()
+
+        # Detect sections
+        if 'STRENGTHS' in line.upper() and ':' in line:
+            self.current_section = 'strengths'
+            return
+        elif 'PRACTICE' in line.upper() and ':' in line:
+            self.current_section = 'weaknesses'
+            return
+        elif 'RED' in line.upper() and 'HERRING' in line.upper():
+            self.current_section = 'red_herrings'
+            return
+
+        # Extract bullets
+        if line.startswith('•') or line.startswith('-') or line.startswith('*'):
+            bullets = self.result.get(self.current_section)
+            if bullets is not None and len(bullets) < MAX_BULLETS:
+                clean_line = line.lstrip('•-*').strip()
+                if clean_line:
+                    bullets.append(clean_line)
+
+
+def parse_analysis(text):
+    """Parse a complete model response in one go"""
+    parser = AnalysisParser()
+    parser.feed(text)
+    return parser.close()
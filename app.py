@@ -1,11 +1,26 @@
 import streamlit as st
-import json
+from streamlit.errors import StreamlitAPIException
+import os
 import time
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
-from gemini import setup_vertex_ai
+import uuid
+from gemini import get_model
+from question_bank import get_question_bank
+from caching import analysis_cache, analysis_key, hint_cache, make_key
+import llm_jobs
+from hints import build_hint_prompt, hint_key, hint_profile, hint_store
+from analysis import AnalysisParser
+from progress_store import get_progress_store
+from ledger import ResponseLedger
+from session_manager import get_session_manager
+import scheduler
+from scheduler import get_item_model
+from item_stats import get_item_stats
+from question_index import get_similarity_index
+import assets
+import templates
+import tracing
+from tracing import traced
+import charts
 
 # Page configuration
 st.set_page_config(
@@ -15,295 +30,8 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Custom CSS for clean, professional design
-def local_css():
-    st.markdown("""
-    <style>
-    /* Import Google Fonts */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-    
-    * {
-        font-family: 'Inter', sans-serif;
-    }
-    
-    /* Hide Streamlit branding */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    .stDeployButton {display: none;}
-    
-    /* Clean background */
-    .main {
-        background-color: #f8fafc;
-    }
-    
-    .block-container {
-        padding: 2rem 3rem;
-        max-width: 1200px;
-    }
-
-    /* Professional Navigation Bar */
-    .nav-bar {
-        background: white;
-        padding: 1rem 2rem;
-        border-bottom: 1px solid #e2e8f0;
-        display: flex;
-        align-items: center;
-        justify-content: space-between;
-        margin: -2rem -3rem 2rem -3rem;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.05);
-    }
-    
-    .nav-left {
-        display: flex;
-        align-items: center;
-        gap: 1rem;
-    }
-    
-    .logo-img {
-        width: 40px;
-        height: 40px;
-        border-radius: 8px;
-    }
-    
-    .app-title {
-        font-size: 1.5rem;
-        font-weight: 700;
-        color: #1e293b;
-        margin: 0;
-    }
-    
-    .nav-right {
-        display: flex;
-        align-items: center;
-        gap: 1rem;
-    }
-    
-    .user-profile {
-        display: flex;
-        align-items: center;
-        gap: 0.75rem;
-        padding: 0.5rem 1rem;
-        background: #f1f5f9;
-        border-radius: 8px;
-    }
-    
-    .user-avatar {
-        width: 36px;
-        height: 36px;
-        border-radius: 50%;
-        border: 2px solid #3b82f6;
-    }
-    
-    .user-name {
-        font-size: 0.95rem;
-        font-weight: 600;
-        color: #334155;
-    }
-
-    /* Page Header */
-    .page-header {
-        background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%);
-        color: white;
-        padding: 2rem;
-        border-radius: 12px;
-        margin-bottom: 2rem;
-        text-align: center;
-        box-shadow: 0 4px 6px rgba(59, 130, 246, 0.1);
-    }
-    
-    .page-header h1 {
-        font-size: 2rem;
-        font-weight: 700;
-        margin: 0 0 0.5rem 0;
-    }
-    
-    .page-header p {
-        font-size: 1rem;
-        margin: 0;
-        opacity: 0.9;
-    }
-    
-    .motto {
-        background: #fef3c7;
-        color: #92400e;
-        padding: 0.75rem 1.5rem;
-        border-radius: 8px;
-        text-align: center;
-        font-weight: 600;
-        margin-bottom: 2rem;
-        border-left: 4px solid #f59e0b;
-    }
-
-    /* Case Cards */
-    .case-card {
-        background: white;
-        border-radius: 12px;
-        padding: 1.5rem;
-        margin-bottom: 1rem;
-        border: 1px solid #e2e8f0;
-        transition: all 0.2s;
-    }
-    
-    .case-card:hover {
-        border-color: #3b82f6;
-        box-shadow: 0 4px 12px rgba(59, 130, 246, 0.1);
-    }
-    
-    .case-title {
-        font-size: 1.1rem;
-        font-weight: 600;
-        color: #1e293b;
-        margin-bottom: 0.5rem;
-    }
-    
-    .case-description {
-        font-size: 0.9rem;
-        color: #64748b;
-        line-height: 1.6;
-    }
-
-    /* Hint Box */
-    .hint-box {
-        background: #fef3c7;
-        border-left: 4px solid #f59e0b;
-        border-radius: 8px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    
-    .hint-content {
-        color: #78350f;
-        font-size: 0.95rem;
-        line-height: 1.6;
-    }
-
-    /* Progress Badge */
-    .progress-badge {
-        display: inline-block;
-        padding: 0.5rem 1rem;
-        border-radius: 6px;
-        font-size: 0.85rem;
-        font-weight: 500;
-        margin: 0.25rem;
-    }
-    
-    .badge-complete {
-        background: #d1fae5;
-        color: #065f46;
-    }
-    
-    .badge-pending {
-        background: #fef3c7;
-        color: #92400e;
-    }
-    
-    .badge-locked {
-        background: #f3f4f6;
-        color: #6b7280;
-    }
-
-    /* Metric Cards */
-    .metric-card {
-        background: white;
-        border: 1px solid #e2e8f0;
-        border-radius: 12px;
-        padding: 1.5rem;
-        text-align: center;
-    }
-    
-    .metric-value {
-        font-size: 2rem;
-        font-weight: 700;
-        color: #1e293b;
-    }
-    
-    .metric-label {
-        font-size: 0.85rem;
-        color: #64748b;
-        margin-top: 0.25rem;
-    }
-
-    /* Buttons */
-    .stButton > button {
-        background: #3b82f6 !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 8px !important;
-        padding: 0.65rem 1.5rem !important;
-        font-weight: 500 !important;
-        transition: all 0.2s !important;
-    }
-
-    .stButton > button:hover {
-        background: #2563eb !important;
-        box-shadow: 0 4px 12px rgba(59, 130, 246, 0.3) !important;
-    }
-
-    /* Analysis Cards */
-    .analysis-card {
-        background: white;
-        border: 1px solid #e2e8f0;
-        border-radius: 12px;
-        padding: 1.5rem;
-        margin-bottom: 1rem;
-    }
-    
-    .strength-item {
-        background: #d1fae5;
-        padding: 0.75rem;
-        border-radius: 8px;
-        margin: 0.5rem 0;
-        color: #065f46;
-        font-size: 0.9rem;
-    }
-    
-    .weakness-item {
-        background: #fee2e2;
-        padding: 0.75rem;
-        border-radius: 8px;
-        margin: 0.5rem 0;
-        color: #991b1b;
-        font-size: 0.9rem;
-    }
-    
-    .suspect-item {
-        background: #fef3c7;
-        padding: 0.75rem;
-        border-radius: 8px;
-        margin: 0.5rem 0;
-        color: #92400e;
-        font-size: 0.9rem;
-    }
-    
-    /* Rank Badge */
-    .rank-badge {
-        display: inline-block;
-        padding: 1.5rem 2.5rem;
-        border-radius: 12px;
-        font-size: 1.8rem;
-        font-weight: 700;
-        margin: 1rem 0;
-    }
-    
-    /* Question Card */
-    .question-card {
-        background: white;
-        border: 1px solid #e2e8f0;
-        border-radius: 12px;
-        padding: 2rem;
-        margin: 1rem 0;
-    }
-    
-    /* Progress bar */
-    .stProgress > div > div > div {
-        background: #3b82f6 !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-
-local_css()
-
 # Initialize session state
+@traced()
 def initialize_session_state():
     defaults = {
         'current_page': 'home',
@@ -311,13 +39,14 @@ def initialize_session_state():
         'current_subtopic': None,
         'current_difficulty': 'basic',
         'current_question_index': 0,
-        'questions_data': {},
-        'responses': [],
         'question_start_time': None,
         'basic_completed': False,
         'intermediate_completed': False,
         'advanced_completed': False,
-        'gemini_model': None,
+        'llm_jobs': {},
+        # Question ids picked so far per level, and ability estimates per subtopic
+        'scheduled': {},
+        'ability': {},
         'username': 'Markat'
     }
 
@@ -325,173 +54,302 @@ def initialize_session_state():
         if key not in st.session_state:
             st.session_state[key] = value
 
-    if st.session_state['gemini_model'] is None:
-        try:
-            st.session_state['gemini_model'] = setup_vertex_ai()
-        except Exception as e:
-            pass
+    if 'student_id' not in st.session_state:
+        restore_progress()
+    else:
+        # Marks the session active, and loads its state back if it was spilled while idle
+        current_ledger()
+
+def with_topics(chapter, responses):
+    """Fill in the topic of answers saved before their question was concept-tagged"""
+    bank = get_question_bank()
+    for r in responses:
+        if not r['topic']:
+            question = bank.get(chapter, r['subtopic'], r['difficulty'], r['question_id'])
+            r['topic'] = question.topic if question else ''
+    return responses
+
+def is_student_id(value):
+    """True for the uuid4().hex form that restore_progress() hands out"""
+    return isinstance(value, str) and len(value) == 32 and all(c in '0123456789abcdef' for c in value)
+
+def restore_progress():
+    """Identify the student via the ?sid= URL parameter and rehydrate saved progress"""
+    student_id = st.query_params.get('sid')
+    # Only ids we issued: the id names files and database rows, so never trust arbitrary text
+    if not is_student_id(student_id):
+        student_id = uuid.uuid4().hex
+        st.query_params['sid'] = student_id
+    st.session_state['student_id'] = student_id
+
+    store = get_progress_store()
+    saved = store.load(student_id) if store else None
+    ledger = ResponseLedger()
+    if saved:
+        ledger = ResponseLedger.from_responses(with_topics(saved['current_chapter'], saved.pop('responses')))
+        for key, value in saved.items():
+            st.session_state[key] = value
+        if saved['current_subtopic']:
+            st.session_state['ability'] = {saved['current_subtopic']: get_item_model().replay(
+                saved['current_chapter'], saved['current_subtopic'], ledger.responses()
+            )}
+    get_session_manager().put(student_id, ledger)
+    st.session_state['saved_progress'] = progress_snapshot()
+
+def current_ledger():
+    """The student's ledger, held by the session manager rather than st.session_state"""
+    manager = get_session_manager()
+    student_id = st.session_state['student_id']
+    ledger = manager.get(student_id)
+    if ledger is None:
+        # Expired after the session TTL, or spill file lost: rebuild from the progress store
+        store = get_progress_store()
+        saved = store.load(student_id) if store else None
+        responses = with_topics(saved['current_chapter'], saved['responses']) if saved else []
+        ledger = ResponseLedger.from_responses(responses)
+        manager.put(student_id, ledger)
+    return ledger
+
+def progress_snapshot():
+    return (
+        st.session_state['current_chapter'],
+        st.session_state['current_subtopic'],
+        st.session_state['current_page'],
+        st.session_state['current_difficulty'],
+        st.session_state['basic_completed'],
+        st.session_state['intermediate_completed'],
+        st.session_state['advanced_completed']
+    )
+
+def persist_progress():
+    """Queue a progress write if navigation or completion flags changed since the last one"""
+    snapshot = progress_snapshot()
+    if snapshot == st.session_state['saved_progress']:
+        return
+    store = get_progress_store()
+    if store:
+        store.save_progress(st.session_state['student_id'], *snapshot)
+    st.session_state['saved_progress'] = snapshot
+
+def reset_investigation():
+    """Clear answers and progress flags when a new investigation starts"""
+    get_session_manager().put(st.session_state['student_id'], ResponseLedger())
+    st.session_state['scheduled'] = {}
+    st.session_state['basic_completed'] = False
+    st.session_state['intermediate_completed'] = False
+    st.session_state['advanced_completed'] = False
+
+    store = get_progress_store()
+    if store and st.session_state['current_chapter'] and st.session_state['current_subtopic']:
+        store.clear_responses(
+            st.session_state['student_id'],
+            st.session_state['current_chapter'],
+            st.session_state['current_subtopic']
+        )
 
 def show_navigation():
     """Show professional navigation bar"""
-    # Try to load images, fallback to emoji if not found
-    try:
-        from PIL import Image
-        import os
-        
-        logo_html = ""
-        if os.path.exists('logo.png'):
-            logo = Image.open('logo.png')
-            st.sidebar.image(logo, width=1)  # Hidden trick to load image
-            logo_html = '<img src="logo.png" class="logo-img" alt="Logo">'
-        else:
-            logo_html = '<div style="font-size: 2rem;">🔍</div>'
-        
-        avatar_html = ""
-        if os.path.exists('default.jpg'):
-            avatar = Image.open('default.jpg')
-            st.sidebar.image(avatar, width=1)  # Hidden trick
-            avatar_html = '<img src="default.jpg" class="user-avatar" alt="Profile">'
-        else:
-            avatar_html = '<div style="width: 36px; height: 36px; border-radius: 50%; background: #3b82f6; color: white; display: flex; align-items: center; justify-content: center; font-weight: 600;">M</div>'
-    except:
-        logo_html = '<div style="font-size: 2rem;">🔍</div>'
-        avatar_html = '<div style="width: 36px; height: 36px; border-radius: 50%; background: #3b82f6; color: white; display: flex; align-items: center; justify-content: center; font-weight: 600;">M</div>'
+    # Images are decoded and encoded once per process, then served as data URIs
+    logo_html = assets.logo_html()
+    avatar_html = assets.avatar_html(st.session_state['username'])
     
-    st.markdown(f"""
-    <div class="nav-bar">
-        <div class="nav-left">
-            {logo_html}
-            <h1 class="app-title">ClueToSolve</h1>
-        </div>
-        <div class="nav-right">
-            <div class="user-profile">
-                {avatar_html}
-                <span class="user-name">Detective {st.session_state['username']}</span>
-            </div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    templates.emit(templates.nav_bar(logo_html, avatar_html, st.session_state['username']))
 
 def show_motto():
     """Show motto banner"""
-    st.markdown("""
-    <div class="motto">
-        💪 Use your strengths to overcome your weaknesses
-    </div>
-    """, unsafe_allow_html=True)
+    templates.emit(templates.MOTTO)
+
+def hint_job_name(question):
+    return f"hint:{st.session_state['current_subtopic']}:{question.difficulty}:{question.id}"
+
+# Solved questions at least this close (cosine) count as similar cases in hints
+MIN_SIMILARITY = 0.25
+
+def hint_inputs(current_question):
+    """Similar solved cases and best skill, from the student's previous performance"""
+    ledger = current_ledger()
+    bank = get_question_bank()
+    chapter = st.session_state['current_chapter']
+    current_key = (chapter, st.session_state['current_subtopic'], current_question.difficulty, current_question.id)
+
+    # Nearest solved questions by embedding, when the index is built
+    index = get_similarity_index()
+    if index is not None and current_key in index:
+        solved = [(chapter, r['subtopic'], r['difficulty'], r['question_id']) for r in ledger if r['is_correct']]
+        nearest = index.similar(current_key, solved, k=2)
+        return [key[3] for key, score in nearest if score >= MIN_SIMILARITY], ledger.best_topic()
+
+    # Otherwise solved questions sharing a concept with this one, via the concept index
+    similar = {}
+    for concept in current_question.concepts:
+        for key in bank.with_concept(concept):
+            q_chapter, subtopic, difficulty, question_id = key
+            if q_chapter != chapter or key in similar or key == current_key:
+                continue
+            response = ledger.get(subtopic, difficulty, question_id)
+            if response and response['is_correct']:
+                similar[key] = question_id
+
+    return list(similar.values()), ledger.best_topic()
 
+def stream_text(job, model, prompt):
+    """Yield text chunks from a streaming generate_content call until the job is stopped"""
+    for chunk in model.generate_content(prompt, stream=True):
+        if job.stopped:
+            return
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks without text parts (e.g. the final finish_reason chunk)
+            continue
+        yield text
+
+def generate_hint(job, model, prompt, cache_key):
+    """Runs on the LLM executor - must not touch st.session_state
+
+    Model errors propagate, so the job ends FAILED and show_hint falls back.
+    """
+    text = ''
+    with tracing.span('llm_hint', prompt_chars=len(prompt)):
+        for chunk in stream_text(job, model, prompt):
+            text += chunk
+            job.partial = text
+    tracing.record_llm('hint', len(prompt), len(text))
+    text = text.strip()
+    if job.stopped:
+        return text
+    if not text:
+        raise ValueError("model returned an empty hint")
+    hint_cache.set(cache_key, text)
+    return text
+
+@traced()
 def get_smart_hint_from_gemini():
-    """Generate intelligent hint based on previous performance"""
-    if st.session_state['gemini_model'] is None:
-        return "🤖 Detective AI is currently unavailable."
+    """Hint for the current question from the precomputed store, else a background job.
 
+    Returns the hint text, the LLMJob handle of a live generation (also kept
+    in st.session_state['llm_jobs']), or a ready-made message when no hint
+    can be generated.
+    """
     questions = get_current_questions()
     if not questions or st.session_state['current_question_index'] >= len(questions):
         return "🤔 No clue to investigate right now."
 
     current_question = questions[st.session_state['current_question_index']]
-    responses = st.session_state['responses']
-    
-    correct_responses = [r for r in responses if r['is_correct']]
-    
-    similar_topics = []
-    current_topic = current_question.get('topic', '')
-    
-    for response in correct_responses:
-        prev_topic = response.get('topic', '')
-        if any(word in current_topic.lower() for word in prev_topic.lower().split()):
-            similar_topics.append({
-                'question_id': response['question_id'],
-                'topic': prev_topic
-            })
-    
-    hint_context = f"""You're a friendly detective mentor helping a nervous 10th grader.
-
-Current Investigation: {current_question['question']}
-Topic: {current_question.get('topic', 'Math')}
-
-"""
+    similar_ids, best_topic = hint_inputs(current_question)
+
+    stored = hint_store.lookup(hint_key(
+        st.session_state['current_chapter'],
+        st.session_state['current_subtopic'],
+        current_question.difficulty,
+        current_question.id,
+        hint_profile(similar_ids, best_topic)
+    ))
+    if stored:
+        tracing.incr('hint_store_hits_total')
+        return stored
+    tracing.incr('hint_store_misses_total')
+
+    job_name = hint_job_name(current_question)
+    jobs = st.session_state['llm_jobs']
+    # A failed or timed-out job is replaced, so pressing the button again retries
+    if job_name in jobs and jobs[job_name].poll() in (llm_jobs.PENDING, llm_jobs.DONE):
+        return jobs[job_name]
+
+    # Same prompt => same hint, whichever session or worker generated it
+    prompt = build_hint_prompt(current_question, similar_ids, best_topic)
+    cache_key = make_key('hint', prompt)
+    cached = hint_cache.get(cache_key)
+    if cached is not None:
+        tracing.incr('hint_cache_hits_total')
+        return cached
+
+    # First use sets up Vertex AI (and imports it); None while its circuit breaker is open
+    model = get_model()
+    if model is None:
+        return "🤖 Detective AI is currently unavailable."
 
-    if similar_topics:
-        similar_q_ids = ', '.join([f"Q{s['question_id']}" for s in similar_topics[:2]])
-        hint_context += f"\n✨ They cracked similar cases: {similar_q_ids}"
-    
-    if correct_responses:
-        strong_topics = {}
-        for r in correct_responses:
-            topic = r.get('topic', 'unknown')
-            strong_topics[topic] = strong_topics.get(topic, 0) + 1
-        best_topic = max(strong_topics, key=strong_topics.get)
-        hint_context += f"\n💪 Their best skill: {best_topic}"
+    jobs[job_name] = llm_jobs.submit(
+        st.session_state['current_page'],
+        generate_hint,
+        model,
+        prompt,
+        cache_key
+    )
+    return jobs[job_name]
+
+def show_hint(hint):
+    """Render a hint message or the current state of a hint job"""
+    if isinstance(hint, llm_jobs.LLMJob):
+        status = hint.poll()
+        if status == llm_jobs.PENDING:
+            if not hint.partial:
+                st.info("🔍 Analyzing your investigation...")
+                return
+            hint = f"{hint.partial}▌"
+        elif status == llm_jobs.DONE:
+            hint = hint.result()
+        else:
+            hint = "🤖 Detective AI is gathering evidence..."
 
-    prompt = f"""{hint_context}
+    templates.emit(f'<div class="hint-box"><div class="hint-content">{hint}</div></div>')
 
-Give a SHORT, CASUAL hint (2-3 sentences) with emojis that:
-1. Reminds them of a similar case they solved
-2. Shows how their strength helps here
-3. Encourages without revealing the answer
+def load_chapters():
+    """Chapter structure from the shared question bank"""
+    return get_question_bank().chapters
 
-Keep it friendly and natural. No bullet points."""
+@traced()
+def load_questions_data(chapter, subtopic_key, difficulty=None):
+    """Questions for a subtopic (or one of its levels), shared read-only across sessions"""
+    return get_question_bank().questions(chapter, subtopic_key, difficulty)
 
-    try:
-        response = st.session_state['gemini_model'].generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        return "🤖 Detective AI is gathering evidence..."
+@traced()
+def get_current_questions():
+    """Questions scheduled so far at the current level; the next one is picked when the student reaches it"""
+    chapter = st.session_state['current_chapter']
+    subtopic = st.session_state['current_subtopic']
+    difficulty = st.session_state['current_difficulty']
 
-def load_chapters():
-    """Load chapter structure from 1.json"""
-    try:
-        with open('1.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data['chapters']
-    except:
-        return {}
-
-def load_questions_data(chapter, subtopic_key):
-    """Load questions for a subtopic"""
-    cache_key = f"{chapter}_{subtopic_key}"
-    if cache_key in st.session_state['questions_data']:
-        return st.session_state['questions_data'][cache_key]
+    scheduled = st.session_state['scheduled'].get(difficulty)
+    if scheduled is None:
+        # Fresh level, or a reloaded session: keep what was already answered here
+        scheduled = st.session_state['scheduled'][difficulty] = [
+            r['question_id'] for r in current_ledger().responses(difficulty) if r.get('subtopic') == subtopic
+        ]
+
+    if st.session_state['current_question_index'] >= len(scheduled) and len(scheduled) < current_level_size():
+        if difficulty == 'advanced' and not scheduled:
+            # The case on the briefing page
+            cases = load_questions_data(chapter, subtopic, 'advanced')
+            pick = cases[0].id
+        else:
+            pick = get_item_model().pick(
+                chapter, subtopic, difficulty,
+                st.session_state['ability'].get(subtopic, 0.0),
+                exclude=set(scheduled)
+            )
+        if pick is not None:
+            scheduled.append(pick)
 
-    chapters = load_chapters()
-    if chapter in chapters and subtopic_key in chapters[chapter]['subtopics']:
-        questions_file = chapters[chapter]['subtopics'][subtopic_key]['questions_file']
-        try:
-            with open(questions_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            questions = data['questions']
-            st.session_state['questions_data'][cache_key] = questions
-            return questions
-        except:
-            return []
-    return []
+    bank = get_question_bank()
+    return [q for q in (bank.get(chapter, subtopic, difficulty, qid) for qid in scheduled) if q is not None]
 
-def get_current_questions():
-    """Get questions for current difficulty level - REDUCED for hackathon"""
-    questions = load_questions_data(st.session_state['current_chapter'], st.session_state['current_subtopic'])
-    filtered = [q for q in questions if q['difficulty_level'] == st.session_state['current_difficulty']]
-    
-    # LIMIT questions per level for hackathon
-    if st.session_state['current_difficulty'] == 'basic':
-        return filtered[:4]  # Only 4 basic questions
-    elif st.session_state['current_difficulty'] == 'intermediate':
-        return filtered[:3]  # Only 3 intermediate questions
-    else:  # advanced
-        return filtered[:1]  # Only 1 advanced case
-    
-    return filtered
+def current_level_size():
+    """Questions in the current level: its quota, or more if extra cases were scheduled"""
+    difficulty = st.session_state['current_difficulty']
+    return max(
+        scheduler.level_size(st.session_state['current_chapter'], st.session_state['current_subtopic'], difficulty),
+        len(st.session_state['scheduled'].get(difficulty, ()))
+    )
 
+@traced()
 def show_home_page():
     """Display home page with cases"""
     show_navigation()
     
-    st.markdown("""
-    <div class="page-header">
-        <h1>🕵️ Welcome, Detective!</h1>
-        <p>Choose your case and start the investigation</p>
-    </div>
-    """, unsafe_allow_html=True)
+    templates.emit(templates.page_header(
+        "🕵️ Welcome, Detective!", "Choose your case and start the investigation"
+    ))
 
     show_motto()
 
@@ -505,23 +363,16 @@ def show_home_page():
             with cols[i % 2]:
                 description = subtopic_data['description']
                 
-                st.markdown(f"""
-                <div class="case-card">
-                    <div class="case-title">🔍 {subtopic_key}</div>
-                    <div class="case-description">{description}</div>
-                </div>
-                """, unsafe_allow_html=True)
+                templates.emit(templates.case_card(f"🔍 {subtopic_key}", description))
 
                 if st.button(f"Investigate", key=f"{chapter_name}_{subtopic_key}", use_container_width=True):
                     st.session_state['current_chapter'] = chapter_name
                     st.session_state['current_subtopic'] = subtopic_key
                     st.session_state['current_page'] = 'case_briefing'
-                    st.session_state['responses'] = []
-                    st.session_state['basic_completed'] = False
-                    st.session_state['intermediate_completed'] = False
-                    st.session_state['advanced_completed'] = False
+                    reset_investigation()
                     st.rerun()
 
+@traced()
 def show_case_briefing_page():
     """Show case briefing"""
     show_navigation()
@@ -533,22 +384,20 @@ def show_case_briefing_page():
             st.rerun()
         return
 
-    questions = load_questions_data(st.session_state['current_chapter'], st.session_state['current_subtopic'])
-    advanced_questions = [q for q in questions if q['difficulty_level'] == 'advanced']
+    advanced_questions = load_questions_data(
+        st.session_state['current_chapter'], st.session_state['current_subtopic'], 'advanced'
+    )
 
     if not advanced_questions:
         st.error("No case file found!")
         return
 
     case = advanced_questions[0]
-    case_file = case.get('case_file', {})
+    case_file = case.case_file
 
-    st.markdown(f"""
-    <div class="page-header">
-        <h1>{case.get('case_title', '🚨 Mystery Case')}</h1>
-        <p>{case.get('case_number', 'Case #Unknown')}</p>
-    </div>
-    """, unsafe_allow_html=True)
+    templates.emit(templates.page_header(
+        case.case_title or '🚨 Mystery Case', case.case_number or 'Case #Unknown'
+    ))
 
     show_motto()
 
@@ -558,11 +407,10 @@ def show_case_briefing_page():
     st.markdown("### 🏛️ Crime Scene")
     st.warning(case_file.get('crime_scene', 'No scene description.'))
 
-    if 'evidence_found' in case_file:
+    if case.evidence:
         st.markdown("### 🧪 Evidence")
-        evidence = case_file['evidence_found']
-        for key, value in evidence.items():
-            st.markdown(f"**{key.replace('_', ' ').title()}:** {value}")
+        for title, value in case.evidence:
+            st.markdown(f"**{title}:** {value}")
 
     if 'mystery' in case_file:
         st.markdown("### ❓ The Mystery")
@@ -574,25 +422,25 @@ def show_case_briefing_page():
     
     with col1:
         if st.session_state['basic_completed']:
-            st.markdown('<span class="progress-badge badge-complete">✅ Clues Gathered</span>', unsafe_allow_html=True)
+            templates.emit(templates.badge("complete", "✅ Clues Gathered"))
         else:
-            st.markdown('<span class="progress-badge badge-pending">🔍 Gather Clues</span>', unsafe_allow_html=True)
+            templates.emit(templates.badge("pending", "🔍 Gather Clues"))
     
     with col2:
         if st.session_state['intermediate_completed']:
-            st.markdown('<span class="progress-badge badge-complete">✅ Evidence Analyzed</span>', unsafe_allow_html=True)
+            templates.emit(templates.badge("complete", "✅ Evidence Analyzed"))
         elif st.session_state['basic_completed']:
-            st.markdown('<span class="progress-badge badge-pending">🔎 Analyze Evidence</span>', unsafe_allow_html=True)
+            templates.emit(templates.badge("pending", "🔎 Analyze Evidence"))
         else:
-            st.markdown('<span class="progress-badge badge-locked">🔒 Locked</span>', unsafe_allow_html=True)
+            templates.emit(templates.badge("locked", "🔒 Locked"))
     
     with col3:
         if st.session_state['advanced_completed']:
-            st.markdown('<span class="progress-badge badge-complete">✅ Case Solved</span>', unsafe_allow_html=True)
+            templates.emit(templates.badge("complete", "✅ Case Solved"))
         elif st.session_state['intermediate_completed']:
-            st.markdown('<span class="progress-badge badge-pending">🚨 Solve Case</span>', unsafe_allow_html=True)
+            templates.emit(templates.badge("pending", "🚨 Solve Case"))
         else:
-            st.markdown('<span class="progress-badge badge-locked">🔒 Locked</span>', unsafe_allow_html=True)
+            templates.emit(templates.badge("locked", "🔒 Locked"))
 
     st.markdown("---")
 
@@ -609,47 +457,27 @@ def show_case_briefing_page():
             st.session_state['current_page'] = 'home'
             st.rerun()
 
+@traced()
 def show_basic_break_page():
     """Show break after basic level"""
     show_navigation()
     
-    st.markdown("""
-    <div class="page-header">
-        <h1>🕵️ Investigation Checkpoint</h1>
-        <p>Clues gathered! Ready to analyze evidence?</p>
-    </div>
-    """, unsafe_allow_html=True)
+    templates.emit(templates.page_header(
+        "🕵️ Investigation Checkpoint", "Clues gathered! Ready to analyze evidence?"
+    ))
 
     show_motto()
 
-    basic_responses = [r for r in st.session_state['responses'] if r['difficulty'] == 'basic']
-    if basic_responses:
-        basic_correct = sum(1 for r in basic_responses if r['is_correct'])
-        basic_accuracy = basic_correct / len(basic_responses)
+    basic = current_ledger().tally('basic')
+    if basic.total:
 
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{len(basic_responses)}</div>
-                <div class="metric-label">Clues Found</div>
-            </div>
-            """, unsafe_allow_html=True)
+            templates.emit(templates.metric_card(f"{basic.total}", "Clues Found"))
         with col2:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{basic_accuracy*100:.0f}%</div>
-                <div class="metric-label">Success Rate</div>
-            </div>
-            """, unsafe_allow_html=True)
+            templates.emit(templates.metric_card(f"{basic.accuracy*100:.0f}%", "Success Rate"))
         with col3:
-            avg_time = sum(r['time_spent'] for r in basic_responses) / len(basic_responses)
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{avg_time:.0f}s</div>
-                <div class="metric-label">Avg Time</div>
-            </div>
-            """, unsafe_allow_html=True)
+            templates.emit(templates.metric_card(f"{basic.avg_time:.0f}s", "Avg Time"))
 
     st.markdown("---")
 
@@ -665,47 +493,25 @@ def show_basic_break_page():
             st.session_state['current_page'] = 'intermediate'
             st.rerun()
 
+@traced()
 def show_intermediate_break_page():
     """Show break after intermediate level"""
     show_navigation()
     
-    st.markdown("""
-    <div class="page-header">
-        <h1>🎯 Evidence Analyzed!</h1>
-        <p>Ready for the final case?</p>
-    </div>
-    """, unsafe_allow_html=True)
+    templates.emit(templates.page_header("🎯 Evidence Analyzed!", "Ready for the final case?"))
 
     show_motto()
 
-    inter_responses = [r for r in st.session_state['responses'] if r['difficulty'] == 'intermediate']
-    if inter_responses:
-        inter_correct = sum(1 for r in inter_responses if r['is_correct'])
-        inter_accuracy = inter_correct / len(inter_responses)
+    inter = current_ledger().tally('intermediate')
+    if inter.total:
 
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{len(inter_responses)}</div>
-                <div class="metric-label">Evidence Analyzed</div>
-            </div>
-            """, unsafe_allow_html=True)
+            templates.emit(templates.metric_card(f"{inter.total}", "Evidence Analyzed"))
         with col2:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{inter_accuracy*100:.0f}%</div>
-                <div class="metric-label">Accuracy</div>
-            </div>
-            """, unsafe_allow_html=True)
+            templates.emit(templates.metric_card(f"{inter.accuracy*100:.0f}%", "Accuracy"))
         with col3:
-            avg_time = sum(r['time_spent'] for r in inter_responses) / len(inter_responses)
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{avg_time:.0f}s</div>
-                <div class="metric-label">Avg Time</div>
-            </div>
-            """, unsafe_allow_html=True)
+            templates.emit(templates.metric_card(f"{inter.avg_time:.0f}s", "Avg Time"))
 
     st.markdown("---")
 
@@ -721,35 +527,41 @@ def show_intermediate_break_page():
             st.session_state['current_page'] = 'advanced'
             st.rerun()
 
+@traced()
 def save_answer(question, selected_label, selected_text):
     """Save answer"""
-    correct_answer = 'A'
-    try:
-        if question.get('answer') and question['answer'].get('correct_option'):
-            correct_answer = question['answer']['correct_option']
-    except:
-        pass
-
-    is_correct = selected_label == correct_answer
+    is_correct = selected_label == question.correct_label
     time_spent = time.time() - st.session_state['question_start_time']
 
     response = {
-        'question_id': question['id'],
-        'difficulty': question['difficulty_level'],
-        'topic': question.get('topic', ''),
+        'question_id': question.id,
+        'subtopic': st.session_state['current_subtopic'],
+        'difficulty': question.difficulty,
+        'topic': question.topic,
         'selected_option': selected_label,
         'selected_text': selected_text,
-        'correct_option': correct_answer,
+        'correct_option': question.correct_label,
         'is_correct': is_correct,
         'time_spent': time_spent
     }
 
-    for i, r in enumerate(st.session_state['responses']):
-        if r['question_id'] == question['id']:
-            st.session_state['responses'][i] = response
-            return
+    store = get_progress_store()
+    if store:
+        store.save_response(
+            st.session_state['student_id'],
+            st.session_state['current_chapter'],
+            st.session_state['current_subtopic'],
+            response
+        )
+
+    current_ledger().record(response)
+    get_item_stats().record(st.session_state['current_chapter'], response['subtopic'], response)
 
-    st.session_state['responses'].append(response)
+    abilities = st.session_state['ability']
+    abilities[response['subtopic']] = get_item_model().record(
+        st.session_state['current_chapter'], response['subtopic'], question.difficulty, question.id,
+        is_correct, abilities.get(response['subtopic'], 0.0)
+    )
 
 def complete_difficulty_level():
     """Handle completion"""
@@ -765,6 +577,25 @@ def complete_difficulty_level():
         st.session_state['advanced_completed'] = True
         st.session_state['current_page'] = 'results'
 
+# Quiz card, hint panel and analysis panel rerun on their own (st.fragment) unless CLUETOSOLVE_FRAGMENTS=0
+FRAGMENTS = os.environ.get('CLUETOSOLVE_FRAGMENTS', '1') != '0'
+QUIZ_PAGES = ('basic', 'intermediate', 'advanced')
+
+def fragment(fn, run_every=None):
+    """st.fragment(fn), or fn itself when fragments are switched off"""
+    return st.fragment(fn, run_every=run_every) if FRAGMENTS else fn
+
+def rerun_fragment():
+    """Rerun only the calling fragment, or the whole app when fragments are switched off"""
+    if FRAGMENTS:
+        try:
+            st.rerun(scope='fragment')
+        except StreamlitAPIException:
+            # Only allowed during a fragment run; the click arrived with a full-app run
+            pass
+    st.rerun()
+
+@traced()
 def show_quiz_page():
     """Quiz page"""
     show_navigation()
@@ -774,6 +605,17 @@ def show_quiz_page():
         st.error("No questions found!")
         return
 
+    fragment(show_quiz_card)()
+
+@traced()
+def show_quiz_card():
+    """Question card, answer/navigation buttons and hint panel.
+
+    Runs as a fragment: answering and moving between questions rerun only
+    this function, not the navigation bar, stylesheet and session setup.
+    """
+    questions = get_current_questions()
+    total = current_level_size()
     difficulty = st.session_state['current_difficulty']
     headers = {
         'basic': "🔍 Gathering Clues",
@@ -781,16 +623,14 @@ def show_quiz_page():
         'advanced': "🚨 Solving the Case"
     }
 
-    st.markdown(f"""
-    <div class="page-header">
-        <h1>{headers[difficulty]}</h1>
-        <p>Question {st.session_state['current_question_index'] + 1} of {len(questions)}</p>
-    </div>
-    """, unsafe_allow_html=True)
+    templates.emit(templates.page_header(
+        headers[difficulty],
+        f"Question {st.session_state['current_question_index'] + 1} of {total}"
+    ))
 
     show_motto()
 
-    progress = (st.session_state['current_question_index'] + 1) / len(questions)
+    progress = (st.session_state['current_question_index'] + 1) / total
     st.progress(progress)
 
     if st.session_state['current_question_index'] < len(questions):
@@ -799,84 +639,47 @@ def show_quiz_page():
         if st.session_state['question_start_time'] is None:
             st.session_state['question_start_time'] = time.time()
 
-        st.markdown('<div class="question-card">', unsafe_allow_html=True)
+        templates.emit('<div class="question-card">')
         st.markdown(f"### Question {st.session_state['current_question_index'] + 1}")
-        st.write(question['question'])
-
-        raw_options = question['options']
-        if isinstance(raw_options, dict):
-            options = raw_options
-            option_keys = list(options.keys())
-        elif isinstance(raw_options, list):
-            options = {chr(65+i): raw_options[i] for i in range(len(raw_options))}
-            option_keys = list(options.keys())
-        else:
-            options = {"A": "Option A", "B": "Option B", "C": "Option C", "D": "Option D"}
-            option_keys = ["A", "B", "C", "D"]
+        st.write(question.text)
 
-        has_answered = False
-        answer_is_correct = False
-        for r in st.session_state['responses']:
-            if r['question_id'] == question['id']:
-                has_answered = True
-                answer_is_correct = r['is_correct']
-                break
+        options = question.options
+        answered = current_ledger().get(
+            st.session_state['current_subtopic'], question.difficulty, question.id
+        )
+        has_answered = answered is not None
 
         if not has_answered:
             selected_label = st.radio(
                 "Choose your answer:",
-                option_keys,
+                question.option_labels,
                 format_func=lambda x: f"{x}. {options[x]}",
-                key=f"q_{question['id']}"
+                key=f"q_{question.id}"
             )
 
             if st.button("✅ Submit", type="primary", use_container_width=True):
                 if selected_label:
                     save_answer(question, selected_label, options[selected_label])
-                    st.rerun()
+                    rerun_fragment()
 
         else:
-            selected_text = ""
-            for r in st.session_state['responses']:
-                if r['question_id'] == question['id']:
-                    selected_text = f"{r['selected_option']}. {r['selected_text']}"
-                    break
-
-            st.info(f"**Your Answer:** {selected_text}")
+            st.info(f"**Your Answer:** {answered['selected_option']}. {answered['selected_text']}")
 
-            if answer_is_correct:
+            if answered['is_correct']:
                 st.success("✅ Correct! Case clue secured!")
             else:
-                correct_answer = ""
-                try:
-                    if question.get('answer'):
-                        correct_option = question['answer'].get('correct_option', '')
-                        if isinstance(raw_options, dict):
-                            correct_answer = f"{correct_option}. {raw_options.get(correct_option, 'Unknown')}"
-                        elif isinstance(raw_options, list):
-                            index = ord(correct_option.upper()) - ord('A')
-                            if 0 <= index < len(raw_options):
-                                correct_answer = f"{correct_option}. {raw_options[index]}"
-                except:
-                    correct_answer = "Unable to determine"
-
-                st.error(f"❌ Not quite!\n\n**Correct Answer:** {correct_answer}")
-
-            try:
-                if question.get('answer') and question['answer'].get('explanation'):
-                    st.markdown("### 📚 Explanation")
-                    st.write(question['answer']['explanation'])
-
-                    if question['answer'].get('steps'):
-                        st.markdown("### 🔢 Solution Steps")
-                        steps = question['answer']['steps']
-                        if isinstance(steps, dict):
-                            for step_key, step_text in steps.items():
-                                st.markdown(f"**{step_key.replace('_', ' ').title()}:** {step_text}")
-            except:
-                pass
-
-            st.markdown('</div>', unsafe_allow_html=True)
+                st.error(f"❌ Not quite!\n\n**Correct Answer:** {question.correct_display}")
+
+            if question.explanation:
+                st.markdown("### 📚 Explanation")
+                st.write(question.explanation)
+
+                if question.steps:
+                    st.markdown("### 🔢 Solution Steps")
+                    for step_title, step_text in question.steps:
+                        st.markdown(f"**{step_title}:** {step_text}")
+
+            templates.emit('</div>')
 
             col1, col2, col3 = st.columns([1, 1, 2])
 
@@ -885,16 +688,17 @@ def show_quiz_page():
                     if st.button("⬅️ Previous", key="prev"):
                         st.session_state['current_question_index'] -= 1
                         st.session_state['question_start_time'] = None
-                        st.rerun()
+                        rerun_fragment()
 
             with col2:
-                next_label = "Next ➡️" if st.session_state['current_question_index'] < len(questions) - 1 else "Finish"
+                next_label = "Next ➡️" if st.session_state['current_question_index'] < total - 1 else "Finish"
                 if st.button(next_label, key="next", type="primary"):
-                    if st.session_state['current_question_index'] < len(questions) - 1:
+                    if st.session_state['current_question_index'] < total - 1:
                         st.session_state['current_question_index'] += 1
                         st.session_state['question_start_time'] = None
-                        st.rerun()
+                        rerun_fragment()
                     else:
+                        # Page change: the whole app reruns
                         complete_difficulty_level()
                         st.rerun()
 
@@ -905,26 +709,53 @@ def show_quiz_page():
 
         # Smart hints - ONLY in intermediate, ONLY after answering at least one
         if difficulty == 'intermediate' and not has_answered:
-            answered_in_intermediate = len([r for r in st.session_state['responses'] 
-                                           if r['difficulty'] == 'intermediate'])
+            answered_in_intermediate = current_ledger().count('intermediate')
             
             if answered_in_intermediate > 0:
-                st.markdown("---")
-                st.markdown("### 🤖 Need a Hint?")
-                
-                if st.button("💡 Get Detective Hint", key="get_hint"):
-                    with st.spinner("Analyzing your investigation..."):
-                        hint = get_smart_hint_from_gemini()
-                    
-                    st.markdown(f"""
-                    <div class="hint-box">
-                        <div class="hint-content">{hint}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
+                hint = st.session_state['llm_jobs'].get(hint_job_name(question))
+                polling = FRAGMENTS and isinstance(hint, llm_jobs.LLMJob) and hint.poll() == llm_jobs.PENDING
+                fragment(show_hint_panel, run_every=llm_jobs.POLL_INTERVAL if polling else None)(question, polling)
+
+@traced()
+def show_hint_panel(question, polling):
+    """Hint button and hint text; while a hint streams in, this fragment alone reruns to poll it"""
+    st.markdown("---")
+    st.markdown("### 🤖 Need a Hint?")
+
+    hint = st.session_state['llm_jobs'].get(hint_job_name(question))
+    if st.button("💡 Get Detective Hint", key="get_hint"):
+        hint = get_smart_hint_from_gemini()
+        if FRAGMENTS and isinstance(hint, llm_jobs.LLMJob):
+            # run_every is fixed when the fragment is built, so rebuild it to start polling
+            st.rerun()
 
+    if hint is not None:
+        show_hint(hint)
+        if polling and hint.poll() != llm_jobs.PENDING:
+            # Done: rebuild once more without run_every to stop polling
+            st.rerun()
+
+ANALYSIS_PENDING = {
+    'strengths': ["⏳ Reviewing the clues you secured..."],
+    'weaknesses': ["⏳ Checking which evidence slipped past..."],
+    'red_herrings': ["⏳ Looking for red herrings..."]
+}
+
+ANALYSIS_FALLBACK = {
+    'strengths': ["Great work on understanding concepts! 🌟"],
+    'weaknesses': ["Focus on reviewing formulas! 💪"],
+    'red_herrings': ["Watch for similar-looking concepts! 🔍"]
+}
+
+@traced()
 def get_gemini_analysis(responses, topics):
-    """Get DEEP PATTERN AI analysis - identifies concepts, formulas, and connections"""
-    if st.session_state['gemini_model'] is None:
+    """Get DEEP PATTERN AI analysis - identifies concepts, formulas, and connections
+
+    The model call streams in the background; until it finishes, each rerun
+    gets the bullets parsed so far with ANALYSIS_PENDING filling the gaps.
+    """
+    model = get_model()
+    if model is None:
         return {
             'strengths': ["Keep solving to discover your strengths! 🌟"],
             'weaknesses': ["Practice more to improve! 💪"],
@@ -945,8 +776,99 @@ def get_gemini_analysis(responses, topics):
     # Build detailed prompt with actual question data
     correct_list = [q for q in questions_data if q['correct']]
     incorrect_list = [q for q in questions_data if not q['correct']]
+
+    # Same subtopic + same right/wrong pattern => same prompt, shared across sessions
+    cache_key = analysis_key(
+        st.session_state['current_subtopic'],
+        [q['id'] for q in correct_list],
+        [q['id'] for q in incorrect_list]
+    )
+    # A job already in flight is polled, not looked up again: every poll rerun
+    # would otherwise count as another cache miss
+    job_name = f"analysis:{cache_key}"
+    jobs = st.session_state['llm_jobs']
+    if job_name not in jobs:
+        cached = analysis_cache.get(cache_key)
+        if cached is not None:
+            tracing.incr('analysis_cache_hits_total')
+            return cached
+
+        tracing.incr('analysis_cache_misses_total')
+        jobs[job_name] = llm_jobs.submit(
+            st.session_state['current_page'],
+            generate_analysis,
+            model,
+            build_analysis_prompt(correct_list, incorrect_list),
+            cache_key
+        )
+
+    status = jobs[job_name].poll()
+    if status == llm_jobs.PENDING:
+        # Bullets stream in one by one; sections still being written keep their placeholder
+        partial = jobs[job_name].partial or {}
+        return {section: partial.get(section) or ANALYSIS_PENDING[section] for section in ANALYSIS_PENDING}
+    if status == llm_jobs.DONE:
+        return jobs[job_name].result()
+    return ANALYSIS_FALLBACK
+
+@traced()
+def show_analysis_panel(responses, topics, polling):
+    """Strengths, practice and red-herring cards; while the analysis streams in, this fragment alone reruns to poll it"""
+    ai_analysis = get_gemini_analysis(responses, topics)
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.markdown("### 💪 Your Strengths")
+        templates.emit('<div class="analysis-card">')
+        
+        # Show AI bullet points
+        if ai_analysis['strengths']:
+            for point in ai_analysis['strengths']:
+                templates.emit(f'<div class="strength-item">• {point}</div>')
+        else:
+            templates.emit('<div class="strength-item">Keep investigating to discover your powers! 🌟</div>')
+        
+        templates.emit('</div>')
+
+    with col2:
+        st.markdown("### 🎯 Practice These")
+        templates.emit('<div class="analysis-card">')
+        
+        # Show AI bullet points
+        if ai_analysis['weaknesses']:
+            for point in ai_analysis['weaknesses']:
+                templates.emit(f'<div class="weakness-item">• {point}</div>')
+        else:
+            templates.emit('<div class="weakness-item">No weak spots! You\'re doing great! 💪</div>')
+        
+        templates.emit('</div>')
+
+    # Red Herrings with AI explanation
+    st.markdown("### 🚩 Red Herrings (Confusion Points)")
+    templates.emit('<div class="analysis-card">')
     
-    prompt = f"""You're a math teacher analyzing a 10th grader's test. Find PATTERNS in their understanding.
+    # Show AI bullet points
+    if ai_analysis['red_herrings']:
+        for point in ai_analysis['red_herrings']:
+            templates.emit(f'<div class="suspect-item">• {point}</div>')
+    else:
+        templates.emit('<div class="suspect-item">No tricky patterns detected! 🎯</div>')
+    
+    templates.emit('</div>')
+
+    if FRAGMENTS and analysis_pending() != polling:
+        # run_every is fixed when the fragment is built, so rebuild it to start or stop polling
+        st.rerun()
+
+def analysis_pending():
+    return any(
+        job.poll() == llm_jobs.PENDING
+        for name, job in st.session_state['llm_jobs'].items() if name.startswith('analysis:')
+    )
+
+def build_analysis_prompt(correct_list, incorrect_list):
+    return f"""You're a math teacher analyzing a 10th grader's test. Find PATTERNS in their understanding.
 
 ✅ CORRECT ANSWERS ({len(correct_list)}):
 {chr(10).join([f"Q{q['id']}: {q['topic']}" for q in correct_list]) if correct_list else "None yet"}
@@ -984,96 +906,57 @@ Rules:
 - One line per bullet
 - Use emojis"""
 
-    try:
-        response = st.session_state['gemini_model'].generate_content(prompt)
-        text = response.text.strip()
-        
-        result = {
-            'strengths': [],
-            'weaknesses': [],
-            'red_herrings': []
-        }
-        
-        current_section = None
-        
-        for line in text.split('\n'):
-            line = line.strip()
-            
-            # Detect sections
-            if 'STRENGTHS' in line.upper() and ':' in line:
-                current_section = 'strengths'
-                continue
-            elif 'PRACTICE' in line.upper() and ':' in line:
-                current_section = 'weaknesses'
-                continue
-            elif 'RED' in line.upper() and 'HERRING' in line.upper():
-                current_section = 'red_herrings'
-                continue
-            
-            # Extract bullets
-            if line.startswith('•') or line.startswith('-') or line.startswith('*'):
-                if current_section and len(result[current_section]) < 3:
-                    clean_line = line.lstrip('•-*').strip()
-                    if clean_line:
-                        result[current_section].append(clean_line)
-        
-        # Ensure we have something
-        if not result['strengths']:
-            result['strengths'] = ["Building detective skills! Keep going! 🌟"]
-        if not result['weaknesses']:
-            result['weaknesses'] = ["Practice makes perfect! 💪"]
-        if not result['red_herrings']:
-            result['red_herrings'] = ["No major confusions detected! 🎯"]
-        
-        return result
-        
-    except Exception as e:
-        return {
-            'strengths': ["Great work on understanding concepts! 🌟"],
-            'weaknesses': ["Focus on reviewing formulas! 💪"],
-            'red_herrings': ["Watch for similar-looking concepts! 🔍"]
-        }
-
-def calculate_accuracy(responses, difficulty):
-    """Calculate accuracy"""
-    relevant = [r for r in responses if r['difficulty'] == difficulty]
-    if not relevant:
-        return 0.0
-    correct = sum(1 for r in relevant if r['is_correct'])
-    return correct / len(relevant)
-
+def generate_analysis(job, model, prompt, cache_key):
+    """Runs on the LLM executor - must not touch st.session_state"""
+    parser = AnalysisParser()
+    output_chars = 0
+    with tracing.span('llm_analysis', prompt_chars=len(prompt)):
+        for chunk in stream_text(job, model, prompt):
+            output_chars += len(chunk)
+            parser.feed(chunk)
+            job.partial = parser.snapshot()
+    tracing.record_llm('analysis', len(prompt), output_chars)
+    result = parser.close()
+    if not job.stopped:
+        analysis_cache.set(cache_key, result)
+    return result
+
+@traced()
+def recommend_case(cases, responses):
+    """The case closest to what the student got wrong (or, with nothing wrong, to what they answered)"""
+    index = get_similarity_index()
+    if index is None or len(cases) == 1:
+        return cases[0]
+    chapter, subtopic = st.session_state['current_chapter'], st.session_state['current_subtopic']
+    missed = [r for r in responses if not r['is_correct']] or responses
+    query = [(chapter, r['subtopic'], r['difficulty'], r['question_id']) for r in missed]
+    by_key = {(chapter, subtopic, q.difficulty, q.id): q for q in cases}
+    nearest = index.similar(query, by_key, k=1)
+    return by_key[nearest[0][0]] if nearest else cases[0]
+
+@traced()
 def show_results_page():
     """Results page with AI-powered analysis"""
     show_navigation()
     
-    st.markdown("""
-    <div class="page-header">
-        <h1>🎉 Case Closed!</h1>
-        <p>Investigation complete - Here's your report</p>
-    </div>
-    """, unsafe_allow_html=True)
+    templates.emit(templates.page_header("🎉 Case Closed!", "Investigation complete - Here's your report"))
 
     show_motto()
 
-    responses = st.session_state['responses']
+    ledger = current_ledger()
     
-    if not responses:
+    if not ledger:
         st.warning("No evidence collected!")
         return
 
-    total_correct = sum(1 for r in responses if r['is_correct'])
-    total_questions = len(responses)
-    accuracy = total_correct / total_questions
-    avg_time = sum(r['time_spent'] for r in responses) / total_questions
+    responses = ledger.responses()
+    accuracy = ledger.accuracy()
+    avg_time = ledger.overall.avg_time
 
     # Calculate by difficulty
-    basic_responses = [r for r in responses if r['difficulty'] == 'basic']
-    inter_responses = [r for r in responses if r['difficulty'] == 'intermediate']
-    advanced_responses = [r for r in responses if r['difficulty'] == 'advanced']
-    
-    basic_correct = sum(1 for r in basic_responses if r['is_correct'])
-    inter_correct = sum(1 for r in inter_responses if r['is_correct'])
-    advanced_correct = sum(1 for r in advanced_responses if r['is_correct'])
+    basic = ledger.tally('basic')
+    inter = ledger.tally('intermediate')
+    advanced = ledger.tally('advanced')
 
     # Detective Rank
     if accuracy >= 0.9:
@@ -1092,166 +975,67 @@ def show_results_page():
         rank = "🔰 Junior Detective"
         rank_color = "#64748b"
 
-    st.markdown(f"""
-    <div style="text-align: center; margin: 2rem 0;">
-        <div class="rank-badge" style="background: {rank_color}; color: white;">
-            {rank}
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    templates.emit(templates.rank_badge(rank, rank_color))
 
     # Stats - Show by difficulty level
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-value">{basic_correct}/{len(basic_responses)}</div>
-            <div class="metric-label">🔍 Clues Found</div>
-        </div>
-        """, unsafe_allow_html=True)
+        templates.emit(templates.metric_card(f"{basic.correct}/{basic.total}", "🔍 Clues Found"))
 
     with col2:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-value">{inter_correct}/{len(inter_responses)}</div>
-            <div class="metric-label">🔎 Evidence Analyzed</div>
-        </div>
-        """, unsafe_allow_html=True)
+        templates.emit(templates.metric_card(f"{inter.correct}/{inter.total}", "🔎 Evidence Analyzed"))
 
     with col3:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-value">{advanced_correct}/{len(advanced_responses)}</div>
-            <div class="metric-label">🚨 Cases Solved</div>
-        </div>
-        """, unsafe_allow_html=True)
+        templates.emit(templates.metric_card(f"{advanced.correct}/{advanced.total}", "🚨 Cases Solved"))
 
     with col4:
-        streak = 0
-        for r in reversed(responses):
-            if r['is_correct']:
-                streak += 1
-            else:
-                break
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-value">{streak}</div>
-            <div class="metric-label">🔥 Streak</div>
-        </div>
-        """, unsafe_allow_html=True)
+        streak = ledger.streak
+        templates.emit(templates.metric_card(f"{streak}", "🔥 Streak"))
 
     st.markdown("---")
 
     # Analysis by topic
-    topics = {}
-    for r in responses:
-        topic = r['topic']
-        if topic not in topics:
-            topics[topic] = {'correct': 0, 'total': 0}
-        topics[topic]['total'] += 1
-        if r['is_correct']:
-            topics[topic]['correct'] += 1
-
-    # Get AI Analysis
-    with st.spinner("🤖 Detective AI is analyzing your investigation..."):
-        ai_analysis = get_gemini_analysis(responses, topics)
-
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.markdown("### 💪 Your Strengths")
-        st.markdown('<div class="analysis-card">', unsafe_allow_html=True)
-        
-        # Show AI bullet points
-        if ai_analysis['strengths']:
-            for point in ai_analysis['strengths']:
-                st.markdown(f'<div class="strength-item">• {point}</div>', unsafe_allow_html=True)
-        else:
-            st.markdown('<div class="strength-item">Keep investigating to discover your powers! 🌟</div>', unsafe_allow_html=True)
-        
-        st.markdown('</div>', unsafe_allow_html=True)
+    topics = ledger.by_topic
 
-    with col2:
-        st.markdown("### 🎯 Practice These")
-        st.markdown('<div class="analysis-card">', unsafe_allow_html=True)
-        
-        # Show AI bullet points
-        if ai_analysis['weaknesses']:
-            for point in ai_analysis['weaknesses']:
-                st.markdown(f'<div class="weakness-item">• {point}</div>', unsafe_allow_html=True)
-        else:
-            st.markdown('<div class="weakness-item">No weak spots! You\'re doing great! 💪</div>', unsafe_allow_html=True)
-        
-        st.markdown('</div>', unsafe_allow_html=True)
-
-    # Red Herrings with AI explanation
-    st.markdown("### 🚩 Red Herrings (Confusion Points)")
-    st.markdown('<div class="analysis-card">', unsafe_allow_html=True)
-    
-    # Show AI bullet points
-    if ai_analysis['red_herrings']:
-        for point in ai_analysis['red_herrings']:
-            st.markdown(f'<div class="suspect-item">• {point}</div>', unsafe_allow_html=True)
-    else:
-        st.markdown('<div class="suspect-item">No tricky patterns detected! 🎯</div>', unsafe_allow_html=True)
-    
-    st.markdown('</div>', unsafe_allow_html=True)
+    # Analysis cards (placeholder bullets until the background job lands)
+    polling = FRAGMENTS and analysis_pending()
+    fragment(show_analysis_panel, run_every=llm_jobs.POLL_INTERVAL if polling else None)(responses, topics, polling)
 
     # Charts
-    if len(responses) > 1:
+    if len(ledger) > 1:
         st.markdown("### 📈 Investigation Timeline")
-        df = pd.DataFrame(responses)
-        df['question_num'] = range(1, len(df) + 1)
-        df['result'] = df['is_correct'].apply(lambda x: 'Correct' if x else 'Incorrect')
-        
-        fig = px.scatter(df, x='question_num', y='time_spent', 
-                        color='result',
-                        color_discrete_map={'Correct': '#10b981', 'Incorrect': '#ef4444'},
-                        title="Time Spent per Question")
-        fig.update_layout(
-            xaxis_title="Question Number",
-            yaxis_title="Time (seconds)",
-            plot_bgcolor='white'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(charts.timeline_figure(charts.timeline_snapshot(ledger)), use_container_width=True)
 
         # Accuracy by topic chart
         if topics:
-            topic_df = pd.DataFrame([
-                {'Topic': topic, 'Accuracy': stats['correct']/stats['total']*100}
-                for topic, stats in topics.items()
-            ])
-            
-            fig2 = px.bar(topic_df, x='Topic', y='Accuracy',
-                         title="Accuracy by Topic",
-                         color='Accuracy',
-                         color_continuous_scale=['#ef4444', '#fbbf24', '#10b981'])
-            fig2.update_layout(plot_bgcolor='white')
-            st.plotly_chart(fig2, use_container_width=True)
+            st.plotly_chart(charts.topic_accuracy_figure(charts.topic_snapshot(ledger)), use_container_width=True)
 
     # Recommendations
     st.markdown("### 🎯 Recommendations")
     
-    questions = load_questions_data(st.session_state['current_chapter'], st.session_state['current_subtopic'])
-    advanced_questions = [q for q in questions if q['difficulty_level'] == 'advanced']
+    advanced_questions = load_questions_data(
+        st.session_state['current_chapter'], st.session_state['current_subtopic'], 'advanced'
+    )
     
-    solved_case_ids = [r['question_id'] for r in responses if r['difficulty'] == 'advanced']
-    unsolved_advanced = [q for q in advanced_questions if q['id'] not in solved_case_ids]
+    unsolved_advanced = [
+        q for q in advanced_questions
+        if ledger.get(st.session_state['current_subtopic'], 'advanced', q.id) is None
+    ]
     
     if unsolved_advanced:
         st.markdown("### 🚨 Next Case in This Investigation")
-        next_case = unsolved_advanced[0]
-        st.markdown(f"""
-        <div class="case-card">
-            <div class="case-title">{next_case.get('case_title', 'Mystery Case')}</div>
-            <div class="case-description">{next_case.get('case_number', '')}</div>
-        </div>
-        """, unsafe_allow_html=True)
+        next_case = recommend_case(unsolved_advanced, responses)
+        templates.emit(templates.case_card(
+            next_case.case_title or 'Mystery Case', next_case.case_number
+        ))
         
         if st.button("🚨 Solve This Case", type="primary", use_container_width=True):
             st.session_state['current_difficulty'] = 'advanced'
-            st.session_state['current_question_index'] = advanced_questions.index(next_case)
+            scheduled = st.session_state['scheduled'].setdefault('advanced', [])
+            if next_case.id not in scheduled:
+                scheduled.append(next_case.id)
+            st.session_state['current_question_index'] = scheduled.index(next_case.id)
             st.session_state['current_page'] = 'advanced'
             st.rerun()
 
@@ -1269,19 +1053,12 @@ def show_results_page():
             for i, subtopic in enumerate(other_subtopics[:3]):
                 with cols[i]:
                     subtopic_data = chapters[current_chapter]['subtopics'][subtopic]
-                    st.markdown(f"""
-                    <div class="case-card">
-                        <div class="case-title">{subtopic}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    templates.emit(templates.case_card(subtopic))
                     
                     if st.button(f"Investigate", key=f"rec_{subtopic}", use_container_width=True):
                         st.session_state['current_subtopic'] = subtopic
                         st.session_state['current_page'] = 'case_briefing'
-                        st.session_state['responses'] = []
-                        st.session_state['basic_completed'] = False
-                        st.session_state['intermediate_completed'] = False
-                        st.session_state['advanced_completed'] = False
+                        reset_investigation()
                         st.rerun()
 
     st.markdown("---")
@@ -1293,10 +1070,7 @@ def show_results_page():
             st.session_state['current_page'] = 'home'
             st.session_state['current_chapter'] = None
             st.session_state['current_subtopic'] = None
-            st.session_state['responses'] = []
-            st.session_state['basic_completed'] = False
-            st.session_state['intermediate_completed'] = False
-            st.session_state['advanced_completed'] = False
+            reset_investigation()
             st.rerun()
 
     with col2:
@@ -1309,21 +1083,36 @@ def show_results_page():
                     st.write(f"**Correct:** {r['correct_option']}")
                     st.write(f"**Time:** {r['time_spent']:.1f}s")
 
+@traced('rerun')
 def main():
+    tracing.start_metrics_server()
     initialize_session_state()
+    templates.inject_stylesheet()
 
-    if st.session_state['current_page'] == 'home':
+    persist_progress()
+
+    # Drop LLM work for pages the student has already left
+    llm_jobs.cancel_other_pages(st.session_state['llm_jobs'], st.session_state['current_page'])
+
+    page = st.session_state['current_page']
+    if page == 'home':
         show_home_page()
-    elif st.session_state['current_page'] == 'case_briefing':
+    elif page == 'case_briefing':
         show_case_briefing_page()
-    elif st.session_state['current_page'] == 'basic_break':
+    elif page == 'basic_break':
         show_basic_break_page()
-    elif st.session_state['current_page'] == 'intermediate_break':
+    elif page == 'intermediate_break':
         show_intermediate_break_page()
-    elif st.session_state['current_page'] in ['basic', 'intermediate', 'advanced']:
+    elif page in QUIZ_PAGES:
         show_quiz_page()
-    elif st.session_state['current_page'] == 'results':
+    elif page == 'results':
         show_results_page()
 
+    # Without fragments, rerun shortly so finished hints/analysis replace their
+    # placeholders (otherwise the hint and analysis panels poll on their own)
+    if not FRAGMENTS and llm_jobs.has_pending(st.session_state['llm_jobs']):
+        time.sleep(llm_jobs.POLL_INTERVAL)
+        st.rerun()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,74 @@
+import base64
+import io
+import os
+import re
+from functools import lru_cache
+
+LOGO_PATH = 'logo.png'
+DEFAULT_AVATAR_PATH = 'default.jpg'
+AVATAR_DIR = 'avatars'
+
+# Rendered at 40px / 36px in the nav bar; encode at 2x for high-DPI screens
+LOGO_SIZE = 80
+AVATAR_SIZE = 72
+
+LOGO_FALLBACK = '<div style="font-size: 2rem;">🔍</div>'
+
+
+def _version(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=256)
+def _encode(path, version, size, fmt):
+    """Decode, resize and base64-encode an image once per file version"""
+    try:
+        from PIL import Image
+
+        with Image.open(path) as img:
+            img = img.convert('RGBA' if fmt == 'PNG' else 'RGB')
+            img.thumbnail((size, size))
+            buffer = io.BytesIO()
+            img.save(buffer, format=fmt, optimize=True)
+    except Exception:
+        return None
+
+    mime = 'image/png' if fmt == 'PNG' else 'image/jpeg'
+    return f"data:{mime};base64,{base64.b64encode(buffer.getvalue()).decode('ascii')}"
+
+
+def data_uri(path, size, fmt='PNG'):
+    """Cached data URI for an image file, or None if it is missing or unreadable"""
+    version = _version(path)
+    if version is None:
+        return None
+    return _encode(path, version, size, fmt)
+
+
+def avatar_path(username):
+    """avatars/<username>.png|.jpg if present, else the default avatar"""
+    slug = re.sub(r'[^A-Za-z0-9_-]', '', username or '')
+    if slug:
+        for ext in ('png', 'jpg', 'jpeg'):
+            path = os.path.join(AVATAR_DIR, f"{slug}.{ext}")
+            if os.path.exists(path):
+                return path
+    return DEFAULT_AVATAR_PATH
+
+
+def logo_html():
+    uri = data_uri(LOGO_PATH, LOGO_SIZE, 'PNG')
+    if uri is None:
+        return LOGO_FALLBACK
+    return f'<img src="{uri}" class="logo-img" alt="Logo">'
+
+
+def avatar_html(username):
+    uri = data_uri(avatar_path(username), AVATAR_SIZE, 'JPEG')
+    if uri is None:
+        initial = (username or 'M')[:1].upper()
+        return f'<div style="width: 36px; height: 36px; border-radius: 50%; background: #3b82f6; color: white; display: flex; align-items: center; justify-content: center; font-weight: 600;">{initial}</div>'
+    return f'<img src="{uri}" class="user-avatar" alt="Profile">'
@@ -0,0 +1,134 @@
+"""Server CPU per quiz-page click, with and without fragments.
+
+Usage:
+    python -m benchmarks.bench_clicks [--investigations 5] [--port 8790]
+
+AppTest always re-executes the whole script, so it can't show fragment
+reruns. This benchmark starts a real `streamlit run app.py` (through
+benchmarks.run_app, against the fake Gemini server) twice, with
+CLUETOSOLVE_FRAGMENTS=1 and =0. Each time it drives the app over the
+websocket the way a browser does, sending the same BackMsgs (widget states
+plus the fragment id of the clicked widget). For each quiz click (answer
+change, Submit, Next) it records the server process's CPU time
+(user+sys, from /proc) and the wall time to ScriptFinished. Results are
+written to benchmarks/results/ as clicks-<commit>.json.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from benchmarks.fake_gemini import FakeGeminiServer
+from benchmarks.harness import (
+    RESULTS_DIR, BrowserSession, git_commit, process_cpu, start_app, summarize, wait_healthy
+)
+
+
+async def investigate(url, pid, samples):
+    """One full investigation; quiz-page clicks are timed into samples[action]"""
+    session = BrowserSession(url)
+    await session.connect()
+
+    async def timed(action, step):
+        cpu, wall = process_cpu(pid), time.perf_counter()
+        await step
+        samples.setdefault(action, []).append((process_cpu(pid) - cpu, time.perf_counter() - wall))
+
+    async def answer_level():
+        while session.has_button("✅ Submit"):
+            await timed('answer', session.choose(1))
+            await timed('submit', session.click("✅ Submit"))
+            next_button, _ = session.find('button', key='next')
+            if next_button.label == "Finish":
+                # Changes page (and on the last level starts the analysis): not a quiz click
+                await session.click(key='next')
+            else:
+                await timed('next', session.click(key='next'))
+
+    try:
+        await session.click(key='Triangle_Similarity Criterion')
+        await session.click("🚀 Start Investigation")
+        await answer_level()
+        await session.click("▶️ Continue")
+        await answer_level()
+        await session.click("🚨 Solve Final Case")
+        await answer_level()
+    finally:
+        session.close()
+
+
+def run_mode(fragments, investigations, port, fake_url):
+    env = dict(os.environ, CLUETOSOLVE_FRAGMENTS='1' if fragments else '0')
+    server = start_app(fake_url, port, env)
+    samples = {}
+    try:
+        wait_healthy(port)
+        url = f'ws://127.0.0.1:{port}/_stcore/stream'
+        # One untimed walk-through warms imports and caches
+        asyncio.run(investigate(url, server.pid, {}))
+        for _ in range(investigations):
+            asyncio.run(investigate(url, server.pid, samples))
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = {}
+    for action, pairs in samples.items():
+        report[action] = {
+            'cpu': summarize([cpu for cpu, _ in pairs]),
+            'wall': summarize([wall for _, wall in pairs])
+        }
+    all_pairs = [pair for pairs in samples.values() for pair in pairs]
+    report['all'] = {
+        'cpu': summarize([cpu for cpu, _ in all_pairs]),
+        'wall': summarize([wall for _, wall in all_pairs])
+    }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--investigations', type=int, default=5, help="timed investigations per mode")
+    parser.add_argument('--port', type=int, default=8790)
+    parser.add_argument('--latency', type=float, default=0.05, help="fake Gemini latency (s)")
+    parser.add_argument('--output', help="JSON path (default benchmarks/results/clicks-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    fake = FakeGeminiServer(latency=args.latency).start()
+    try:
+        modes = {
+            'fragments': run_mode(True, args.investigations, args.port, fake.url),
+            'full_rerun': run_mode(False, args.investigations, args.port, fake.url)
+        }
+    finally:
+        fake.stop()
+
+    print(f"{'action':<10}{'mode':<12}{'n':>5}{'CPU mean ms':>13}{'wall p50 ms':>13}{'wall p95 ms':>13}")
+    for action in modes['fragments']:
+        for mode, report in modes.items():
+            stats = report.get(action)
+            if stats:
+                print(f"{action:<10}{mode:<12}{stats['cpu']['count']:>5}{stats['cpu']['mean'] * 1000:>13.2f}"
+                      f"{stats['wall']['p50'] * 1000:>13.1f}{stats['wall']['p95'] * 1000:>13.1f}")
+    before, after = modes['full_rerun']['all']['cpu']['mean'], modes['fragments']['all']['cpu']['mean']
+    if before:
+        print(f"server CPU per click: {before * 1000:.2f} ms -> {after * 1000:.2f} ms ({(after / before - 1) * 100:+.0f}%)")
+
+    result = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'investigations': args.investigations,
+        'modes': modes
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"clicks-{result['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"saved {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
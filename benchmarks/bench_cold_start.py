@@ -0,0 +1,98 @@
+"""Cold-start cost of loading the question bank: JSON sources vs questions.pack.
+
+Usage:
+    python -m benchmarks.bench_cold_start [--runs 30]
+
+Every run is a fresh interpreter (as on a new pod), timing two things: the
+raw read of all source documents, and building the full QuestionBank that
+load_chapters()/load_questions_data() serve from. Builds questions.pack
+first if it is missing or stale. Results are written to
+benchmarks/results/ as cold-start-<commit>.json.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.harness import RESULTS_DIR, ROOT, git_commit, summarize
+
+PROBE = """
+import json, os, sys, time
+t0 = time.perf_counter()
+from question_bank import QuestionBank
+from question_pack import PACK_FILE, open_pack
+t1 = time.perf_counter()
+bank = QuestionBank('.', use_pack={use_pack})
+t2 = time.perf_counter()
+names = [os.path.basename(path) for path in bank.mtimes]
+if {use_pack}:
+    pack = open_pack(PACK_FILE)
+    for name in names:
+        st = os.stat(name)
+        pack.get(name, st.st_mtime_ns, st.st_size)
+    pack.close()
+else:
+    for name in names:
+        with open(name, 'r', encoding='utf-8') as f:
+            json.load(f)
+t3 = time.perf_counter()
+print(json.dumps({{'import': t1 - t0, 'bank': t2 - t1, 'read': t3 - t2,
+                   'pack_hits': bank.pack_hits, 'questions': len(bank.by_key)}}))
+"""
+
+
+def probe(use_pack):
+    out = subprocess.check_output([sys.executable, '-c', PROBE.format(use_pack=use_pack)],
+                                  cwd=ROOT, text=True)
+    return json.loads(out)
+
+
+def run(runs):
+    from question_bank import QuestionBank
+
+    bank = QuestionBank(ROOT, use_pack=True)
+    if bank.pack_hits < len(bank.mtimes):
+        subprocess.check_call([sys.executable, 'build_pack.py'], cwd=ROOT)
+
+    modes = {}
+    for mode, use_pack in (('json', False), ('pack', True)):
+        samples = [probe(use_pack) for _ in range(runs)]
+        modes[mode] = {
+            'pack_hits': samples[-1]['pack_hits'],
+            'questions': samples[-1]['questions'],
+            'read': summarize([s['read'] for s in samples]),
+            'bank': summarize([s['bank'] for s in samples]),
+            'import': summarize([s['import'] for s in samples])
+        }
+    return {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'runs': runs,
+        'modes': modes
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=30, help="fresh interpreters per mode")
+    parser.add_argument('--output', help="JSON path (default benchmarks/results/cold-start-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    result = run(args.runs)
+    print(f"{'mode':<8}{'files':>7}{'read p50 ms':>13}{'bank p50 ms':>13}{'bank p95 ms':>13}")
+    for mode, stats in result['modes'].items():
+        print(f"{mode:<8}{stats['pack_hits']:>7}{stats['read']['p50'] * 1000:>13.2f}"
+              f"{stats['bank']['p50'] * 1000:>13.2f}{stats['bank']['p95'] * 1000:>13.2f}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"cold-start-{result['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"saved {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Startup import cost of the app, from python -X importtime.
+
+Usage:
+    python -m benchmarks.bench_import_time [--module app] [--runs 5] [--compare old.json]
+
+Imports the module in fresh interpreters with -X importtime, reports the
+total and the heaviest top-level imports, and fails (exit 1) if a module
+that should load lazily shows up at startup (unless the --baseline module,
+Streamlit by default, already imports it itself), or with --compare if the
+median total grew by more than --tolerance percent. Results are written
+to benchmarks/results/ as import-time-<commit>.json.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from benchmarks.harness import RESULTS_DIR, ROOT, git_commit, percentile
+
+# Must not be imported until the results page or a Gemini call needs them
+LAZY_MODULES = ('pandas', 'plotly', 'vertexai', 'google.oauth2', 'google.cloud.aiplatform')
+
+LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def import_profile(module):
+    """{module: (self_us, cumulative_us, depth)} from one fresh interpreter"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    profile = {}
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            profile[name] = (int(self_us), int(cumulative_us), (len(indent) - 1) // 2)
+    return profile
+
+
+def run(module, runs, baseline=None):
+    profiles = [import_profile(module) for _ in range(runs)]
+    already = set(import_profile(baseline)) if baseline else set()
+    totals = [sum(self_us for self_us, _, _ in p.values()) / 1e6 for p in profiles]
+    last = profiles[-1]
+    top_level = sorted(((name, cum) for name, (_, cum, depth) in last.items() if depth == 0),
+                       key=lambda item: item[1], reverse=True)
+    eager = sorted(name for name in last if name not in already
+                   and any(name == lazy or name.startswith(lazy + '.') for lazy in LAZY_MODULES))
+    return {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'module': module,
+        'runs': runs,
+        'total_seconds': {'p50': percentile(totals, 50), 'max': max(totals)},
+        'modules_imported': len(last),
+        'top_level': [{'module': name, 'cumulative_seconds': cum / 1e6} for name, cum in top_level[:15]],
+        'eager_lazy_modules': eager
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='app', help="module to import (default app)")
+    parser.add_argument('--runs', type=int, default=5, help="fresh interpreters")
+    parser.add_argument('--baseline', default='streamlit',
+                        help="module whose own imports are not held against the app ('' for none)")
+    parser.add_argument('--compare', help="earlier results JSON to check against")
+    parser.add_argument('--tolerance', type=float, default=20.0, help="allowed p50 growth in percent")
+    parser.add_argument('--output', help="JSON path (default benchmarks/results/import-time-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    result = run(args.module, args.runs, args.baseline)
+    total = result['total_seconds']['p50']
+    print(f"import {args.module}: {total * 1000:.0f} ms p50, {result['modules_imported']} modules")
+    for entry in result['top_level']:
+        print(f"  {entry['cumulative_seconds'] * 1000:>8.1f} ms  {entry['module']}")
+
+    failed = False
+    if result['eager_lazy_modules']:
+        print(f"FAIL: imported at startup: {', '.join(result['eager_lazy_modules'])}")
+        failed = True
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            old = json.load(f)['total_seconds']['p50']
+        change = (total / old - 1) * 100 if old else 0.0
+        print(f"vs {args.compare}: {change:+.0f}%")
+        if change > args.tolerance:
+            print(f"FAIL: startup import time grew more than {args.tolerance:.0f}%")
+            failed = True
+
+    output = args.output or os.path.join(RESULTS_DIR, f"import-time-{result['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"saved {output}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
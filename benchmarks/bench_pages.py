@@ -0,0 +1,81 @@
+"""Page render latency for every page in main().
+
+Usage:
+    python -m benchmarks.bench_pages [--runs 20] [--latency 0.05] [--compare old.json]
+
+Each run walks one fresh session through a full investigation with a fake
+Gemini model and records script-run time per interaction, grouped by the
+page that was rendered. Results are written to benchmarks/results/ as
+pages-<commit>.json.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from benchmarks import fake_gemini
+from benchmarks.harness import PAGES, RESULTS_DIR, Session, git_commit, summarize
+
+
+def run(runs, latency):
+    fake_gemini.install(latency)
+    by_page = {page: [] for page in PAGES}
+    all_runs = []
+
+    for _ in range(runs):
+        session = Session()
+        for page, seconds in session.investigate():
+            by_page.setdefault(page, []).append(seconds)
+            all_runs.append(seconds)
+
+    return {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'runs': runs,
+        'latency': latency,
+        'per_rerun': summarize(all_runs),
+        'pages': {page: summarize(samples) for page, samples in by_page.items() if samples}
+    }
+
+
+def print_report(result, baseline=None):
+    print(f"commit {result['commit']}  runs={result['runs']}  fake latency={result['latency']}s")
+    print(f"{'page':<20}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'Δp50':>10}")
+    rows = list(result['pages'].items()) + [('(every rerun)', result['per_rerun'])]
+    for page, stats in rows:
+        delta = ''
+        if baseline:
+            old = baseline['per_rerun'] if page == '(every rerun)' else baseline['pages'].get(page)
+            if old and old['p50']:
+                delta = f"{(stats['p50'] / old['p50'] - 1) * 100:+.0f}%"
+        print(f"{page:<20}{stats['count']:>6}{stats['p50'] * 1000:>10.1f}"
+              f"{stats['p95'] * 1000:>10.1f}{stats['p99'] * 1000:>10.1f}{delta:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20, help="full investigations to simulate")
+    parser.add_argument('--latency', type=float, default=0.05, help="fake Gemini latency (s)")
+    parser.add_argument('--output', help="JSON path (default benchmarks/results/pages-<commit>.json)")
+    parser.add_argument('--compare', help="earlier results JSON to diff against")
+    args = parser.parse_args(argv)
+
+    result = run(args.runs, args.latency)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"pages-{result['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"saved {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
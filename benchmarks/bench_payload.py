@@ -0,0 +1,91 @@
+"""Websocket payload per rerun for every page.
+
+Usage:
+    python -m benchmarks.bench_payload [--investigations 3] [--port 8795]
+
+Starts a real `streamlit run app.py` (through benchmarks.run_app, against
+the fake Gemini server) and walks full investigations over the websocket
+like a browser tab. For every rerun it counts the bytes of ForwardMsgs the
+server sends until ScriptFinished: HTML, widgets, the stylesheet component
+and the plotly figures alike, as they go over the wire. Reruns are grouped
+by the page they land on, full-app and fragment reruns apart. Run with
+CLUETOSOLVE_FRAGMENTS=0 to compare against whole-script reruns. Results are
+written to benchmarks/results/ as payload-<commit>.json.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from benchmarks.fake_gemini import FakeGeminiServer
+from benchmarks.harness import (
+    PAGES, RESULTS_DIR, BrowserSession, git_commit, start_app, summarize, wait_healthy
+)
+
+
+async def walk(url):
+    session = BrowserSession(url)
+    try:
+        await session.investigate()
+    finally:
+        session.close()
+    return session.payloads
+
+
+def run(investigations, port, fake_url):
+    server = start_app(fake_url, port)
+    by_page = {}
+    try:
+        wait_healthy(port)
+        url = f'ws://127.0.0.1:{port}/_stcore/stream'
+        for _ in range(investigations):
+            for page, size, fragment in asyncio.run(walk(url)):
+                by_page.setdefault(page, {'full': [], 'fragment': []})['fragment' if fragment else 'full'].append(size)
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        page: {kind: summarize(sizes) for kind, sizes in by_page[page].items() if sizes}
+        for page in PAGES if page in by_page
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--investigations', type=int, default=3)
+    parser.add_argument('--port', type=int, default=8795)
+    parser.add_argument('--output', help="JSON path (default benchmarks/results/payload-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    fake = FakeGeminiServer(latency=0.05).start()
+    try:
+        pages = run(args.investigations, args.port, fake.url)
+    finally:
+        fake.stop()
+
+    print(f"{'page':<20}{'rerun':<10}{'n':>5}{'mean KB':>10}{'p95 KB':>10}{'max KB':>10}")
+    for page, kinds in pages.items():
+        for kind, stats in kinds.items():
+            print(f"{page:<20}{kind:<10}{stats['count']:>5}{stats['mean'] / 1024:>10.1f}"
+                  f"{stats['p95'] / 1024:>10.1f}{stats['max'] / 1024:>10.1f}")
+
+    result = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'investigations': args.investigations,
+        'fragments': os.environ.get('CLUETOSOLVE_FRAGMENTS', '1') != '0',
+        'pages': pages
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"payload-{result['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"saved {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
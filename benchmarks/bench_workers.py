@@ -0,0 +1,197 @@
+"""Throughput vs number of app worker processes on one machine.
+
+Usage:
+    python -m benchmarks.bench_workers [--workers 1,2,4,8] [--users 4] [--investigations 3]
+
+For each worker count W, starts W `streamlit run app.py` workers the way
+deploy.workers does (sharing one SQLite cache file), each against a fake
+Gemini server, with deploy.proxy in front of them. W x --users simulated
+students then connect through the proxy over the websocket, like browser
+tabs, and each completes --investigations full investigations. The
+students run in W client processes, so the load generator grows with the
+workers. Reports aggregate reruns/s and investigations/s, CPU used by each
+worker, and the speed-up over the first level. A level where any
+investigation failed is marked invalid and gets no speed-up. Results are
+written to benchmarks/results/ as workers-<commit>.json.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_gemini import FakeGeminiServer
+from benchmarks.harness import (
+    RESULTS_DIR, AppError, BrowserSession, git_commit, process_cpu, summarize, wait_healthy
+)
+from deploy.workers import start_worker
+
+SUBTOPICS = [
+    ('Triangle', 'Similarity Criterion'),
+    ('Triangle', 'Converse of Basic Proportionality Theorem'),
+    ('Trigonometry', 'Trigonometric Identities'),
+    ('Trigonometry', 'Trigonometry Applications - Heights & Distances'),
+]
+
+
+def serve_proxy(ports, port):
+    from deploy.proxy import StickyProxy
+
+    proxy = StickyProxy([('127.0.0.1', p) for p in ports])
+    asyncio.run(proxy.serve('127.0.0.1', port))
+
+
+def clients(index, url, users, investigations, timeout, ready, results):
+    """One load-generator process: `users` concurrent students, started together across processes"""
+    samples, errors = [], []
+    completed = 0
+
+    async def student(i):
+        nonlocal completed
+        chapter, subtopic = SUBTOPICS[(index + i) % len(SUBTOPICS)]
+        for _ in range(investigations):
+            session = BrowserSession(url, timeout=timeout)
+            try:
+                await session.investigate(chapter, subtopic)
+                samples.extend(seconds for _, seconds in session.samples)
+                completed += 1
+            except AppError as e:
+                errors.append(f"app: {e}")
+            except Exception as e:
+                errors.append(f"harness: {type(e).__name__}: {e}")
+            finally:
+                session.close()
+
+    async def run():
+        await asyncio.gather(*(student(i) for i in range(users)))
+
+    ready.wait()
+    asyncio.run(run())
+    results.put({'samples': samples, 'errors': errors, 'completed': completed, 'finished': time.time()})
+
+
+async def warm(ports):
+    """One untimed investigation on every worker, straight to its port"""
+    sessions = [BrowserSession(f'ws://127.0.0.1:{port}/_stcore/stream') for port in ports]
+    try:
+        await asyncio.gather(*(session.investigate() for session in sessions))
+    finally:
+        for session in sessions:
+            session.close()
+
+
+def run_level(workers, args, env, fake_url):
+    ctx = multiprocessing.get_context('spawn')
+    ports = [args.worker_port + i for i in range(workers)]
+    backends = [start_worker(i, port, env, command=['-m', 'benchmarks.run_app', fake_url],
+                             stdout=subprocess.DEVNULL)
+                for i, port in enumerate(ports)]
+    proxy = ctx.Process(target=serve_proxy, args=(ports, args.port))
+    proxy.start()
+    try:
+        for port in ports:
+            wait_healthy(port)
+        wait_healthy(args.port)
+        asyncio.run(warm(ports))
+
+        url = f'ws://127.0.0.1:{args.port}/_stcore/stream'
+        ready = ctx.Barrier(workers + 1)
+        results = ctx.Queue()
+        procs = [ctx.Process(target=clients, args=(i, url, args.users, args.investigations, args.timeout,
+                                                   ready, results))
+                 for i in range(workers)]
+        for p in procs:
+            p.start()
+        cpu_before = [process_cpu(b.pid) for b in backends]
+        ready.wait()
+        started = time.time()
+        outcomes = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        worker_cpu = [process_cpu(b.pid) - cpu for b, cpu in zip(backends, cpu_before)]
+    finally:
+        proxy.terminate()
+        for backend in backends:
+            backend.terminate()
+        for backend in backends:
+            backend.wait()
+        proxy.join()
+
+    wall = max(o['finished'] for o in outcomes) - started
+    samples = [s for o in outcomes for s in o['samples']]
+    errors = [e for o in outcomes for e in o['errors']]
+    completed = sum(o['completed'] for o in outcomes)
+    return {
+        'workers': workers,
+        'students': workers * args.users,
+        'wall_seconds': wall,
+        'completed': completed,
+        'error_count': len(errors),
+        'errors': errors[:5],
+        'valid': not errors,
+        'reruns_per_second': len(samples) / wall if wall else 0.0,
+        'investigations_per_second': completed / wall if wall else 0.0,
+        'latency': summarize(samples),
+        # Roughly equal when the proxy spreads students evenly
+        'worker_cpu_seconds': worker_cpu
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', default='1,2,4,8', help="comma-separated worker counts")
+    parser.add_argument('--users', type=int, default=4, help="concurrent students per worker")
+    parser.add_argument('--investigations', type=int, default=3, help="investigations per student")
+    parser.add_argument('--latency', type=float, default=0.05, help="fake Gemini latency (s)")
+    parser.add_argument('--timeout', type=float, default=120, help="seconds a rerun may take before it counts as hung")
+    parser.add_argument('--port', type=int, default=8700, help="proxy port")
+    parser.add_argument('--worker-port', type=int, default=8710, help="first worker port")
+    parser.add_argument('--output', help="JSON path (default benchmarks/results/workers-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    # Like deploy.workers, every worker uses one shared cache file
+    env = dict(os.environ, CLUETOSOLVE_SHARED_CACHE=os.path.join(tempfile.mkdtemp(prefix='cluetosolve-'), 'shared.db'))
+    fake = FakeGeminiServer(latency=args.latency).start()
+
+    levels, base = [], None
+    print(f"cores: {os.cpu_count()}")
+    print(f"{'workers':>8}{'students':>9}{'err':>5}{'rerun/s':>9}{'inv/s':>8}{'p95 ms':>9}{'speed-up':>10}")
+    try:
+        for workers in [int(n) for n in args.workers.split(',')]:
+            level = run_level(workers, args, env, fake.url)
+            if level['valid'] and base is None:
+                base = level['reruns_per_second']
+            level['speedup'] = level['reruns_per_second'] / base if level['valid'] and base else None
+            levels.append(level)
+            speedup = f"{level['speedup']:>9.2f}x" if level['speedup'] is not None else f"{'invalid':>10}"
+            print(f"{workers:>8}{level['students']:>9}{level['error_count']:>5}"
+                  f"{level['reruns_per_second']:>9.1f}{level['investigations_per_second']:>8.2f}"
+                  f"{level['latency']['p95'] * 1000:>9.0f}{speedup}")
+            if not level['valid']:
+                print(f"  {level['errors'][0]}")
+    finally:
+        fake.stop()
+
+    result = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'cpu_count': os.cpu_count(),
+        'users_per_worker': args.users,
+        'investigations': args.investigations,
+        'latency': args.latency,
+        'levels': levels
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"workers-{result['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"saved {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
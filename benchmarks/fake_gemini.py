@@ -0,0 +1,157 @@
+"""Deterministic stand-in for vertexai's GenerativeModel.
+
+Install it as the shared client with gemini.client_pool.reset(factory=...),
+so app code runs unchanged without Vertex AI credentials or network.
+"""
+import time
+
+HINT_TEXT = (
+    "🕵️ You've cracked cases like this before! 💪 Line up the ratios you already "
+    "trust and see which pair matches. 🔍 You've got this, detective!"
+)
+
+ANALYSIS_TEXT = """STRENGTHS:
+• You understand the AA similarity criterion - use it as your weapon! ✅
+• Ratio formulas are solid 📐
+PRACTICE:
+• Converse of BPT needs work - focus on comparing AD/DB with AE/EC 🎯
+RED_HERRINGS:
+• You're mixing up SAS and SSS - SAS needs the included angle! 🚩
+"""
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Answers generate_content after a fixed delay; streams in word-sized chunks"""
+
+    def __init__(self, latency=0.0, first_token=None, chunk_delay=0.0):
+        self.latency = latency
+        self.first_token = latency if first_token is None else first_token
+        self.chunk_delay = chunk_delay
+        self.calls = 0
+
+    def _text_for(self, prompt):
+        return ANALYSIS_TEXT if 'STRENGTHS' in prompt else HINT_TEXT
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        text = self._text_for(prompt)
+        if not stream:
+            time.sleep(self.latency)
+            return FakeResponse(text)
+        return self._stream(text)
+
+    def _stream(self, text):
+        time.sleep(self.first_token)
+        for word in text.split(' '):
+            yield FakeResponse(word + ' ')
+            if self.chunk_delay:
+                time.sleep(self.chunk_delay)
+
+
+def install(latency=0.0, **kwargs):
+    """Make every session in this process use a FakeModel"""
+    import gemini
+
+    model = FakeModel(latency, **kwargs)
+    gemini.client_pool.reset(factory=lambda: model)
+    return model
+
+
+class FakeGeminiServer:
+    """Local HTTP stand-in for Vertex AI: POST a prompt, get the canned text back.
+
+    Responses are streamed as chunked word tokens after `latency` seconds, so
+    app workers block on real socket I/O the way they do against Vertex.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, chunk_delay=0.0):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        model = FakeModel(latency, chunk_delay=chunk_delay)
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                prompt = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; charset=utf-8')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for chunk in model.generate_content(prompt, stream=True):
+                    data = chunk.text.encode('utf-8')
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+                self.wfile.write(b'0\r\n\r\n')
+
+            def log_message(self, *args):
+                pass
+
+        self.model = model
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        import threading
+
+        threading.Thread(target=self.httpd.serve_forever, name='fake-gemini', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+
+
+class RemoteFakeModel:
+    """GenerativeModel look-alike that talks to a FakeGeminiServer"""
+
+    def __init__(self, url, timeout=60):
+        self.url = url
+        self.timeout = timeout
+
+    def generate_content(self, prompt, stream=False):
+        chunks = self._stream(prompt)
+        return chunks if stream else FakeResponse(''.join(c.text for c in chunks))
+
+    def _stream(self, prompt):
+        import codecs
+        from urllib.request import Request, urlopen
+
+        # A read may end mid-way through a multi-byte character
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        request = Request(self.url, data=prompt.encode('utf-8'), method='POST')
+        with urlopen(request, timeout=self.timeout) as response:
+            while True:
+                data = response.read1(4096)
+                if not data:
+                    break
+                text = decoder.decode(data)
+                if text:
+                    yield FakeResponse(text)
+
+
+def serve(argv=None):
+    """python -m benchmarks.fake_gemini --port 8765 --latency 0.5"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the fake Gemini server")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--chunk-delay', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    server = FakeGeminiServer(port=args.port, latency=args.latency, chunk_delay=args.chunk_delay)
+    print(f"fake Gemini listening on {server.url} - run the app with: python -m benchmarks.run_app {server.url}")
+    server.httpd.serve_forever()
+
+
+if __name__ == '__main__':
+    serve()
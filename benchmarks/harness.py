@@ -0,0 +1,370 @@
+"""Drive app.py through a full investigation.
+
+Session does it in-process with Streamlit's AppTest; BrowserSession talks
+to a real `streamlit run` (see start_app) over its websocket, like a
+browser tab.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, 'app.py')
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Keep scripted benchmark answers out of the real progress database, item
+# statistics and session spill directory
+BENCH_DIR = tempfile.mkdtemp(prefix='cluetosolve-')
+os.environ.setdefault('CLUETOSOLVE_DB', os.path.join(BENCH_DIR, 'bench.db'))
+os.environ.setdefault('CLUETOSOLVE_ITEM_STATS', os.path.join(BENCH_DIR, 'item_stats.json'))
+os.environ.setdefault('CLUETOSOLVE_SPILL_DIR', os.path.join(BENCH_DIR, 'sessions'))
+# The app reads its data files relative to the working directory
+os.chdir(ROOT)
+
+PAGES = ['home', 'case_briefing', 'basic', 'basic_break', 'intermediate',
+         'intermediate_break', 'advanced', 'results']
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        'count': len(samples),
+        'mean': sum(samples) / len(samples) if samples else 0.0,
+        'p50': percentile(samples, 50),
+        'p95': percentile(samples, 95),
+        'p99': percentile(samples, 99),
+        'max': max(samples) if samples else 0.0
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+class Session:
+    """One simulated student; every interaction is timed as one script run"""
+
+    def __init__(self, timeout=60, clock=time.perf_counter):
+        from streamlit.testing.v1 import AppTest
+
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.clock = clock
+        self.samples = []
+
+    @property
+    def page(self):
+        return self.at.session_state['current_page']
+
+    def run(self, action=None):
+        """Apply a widget action (if any), rerun the script and record (page, seconds)"""
+        start = self.clock()
+        if action is None:
+            self.at.run()
+        else:
+            action.run()
+        elapsed = self.clock() - start
+        if self.at.exception:
+            raise RuntimeError(f"app raised on {self.page}: {self.at.exception[0].message}")
+        self.samples.append((self.page, elapsed))
+        return elapsed
+
+    def button(self, label=None, key=None):
+        if key is not None:
+            return self.at.button(key=key)
+        for button in self.at.button:
+            if button.label == label:
+                return button
+        raise LookupError(f"no button {label!r} on {self.page}")
+
+    def click(self, label=None, key=None):
+        return self.run(self.button(label, key).click())
+
+    def answer_level(self, hints=False):
+        """Answer every question on the current quiz page, then press Next/Finish.
+
+        Submits the pre-selected first option, so runs are deterministic.
+        """
+        level = self.page
+        while self.page == level:
+            if hints and level == 'intermediate':
+                if any(b.key == 'get_hint' for b in self.at.button):
+                    self.click(key='get_hint')
+            self.click("✅ Submit")
+            self.click(key='next')
+
+    def investigate(self, chapter='Triangle', subtopic='Similarity Criterion', hints=True):
+        """home → case_briefing → basic → break → intermediate → break → advanced → results"""
+        self.run()
+        self.click(key=f"{chapter}_{subtopic}")
+        self.click("🚀 Start Investigation")
+        self.answer_level()
+        self.click("▶️ Continue")
+        self.answer_level(hints=hints)
+        self.click("🚨 Solve Final Case")
+        self.answer_level()
+        self.click("📋 Review Answers")
+        return self.samples
+
+
+class AppError(Exception):
+    """The app failed (raised, hung or dropped the connection), as opposed to the harness driving it"""
+
+
+def process_cpu(pid):
+    """user+sys CPU seconds of a process (Linux)"""
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def process_rss(pid):
+    """Resident set size of a process in bytes (Linux), or 0 where unavailable"""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+
+def start_app(fake_url, port, env=None):
+    """`streamlit run app.py` on 127.0.0.1:port against a FakeGeminiServer, as a child process"""
+    return subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.run_app', fake_url, *app_options(port)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def app_options(port):
+    return ['--server.port', str(port), '--server.address', '127.0.0.1', '--server.headless', 'true',
+            '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false']
+
+
+def wait_healthy(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=1) as r:
+                if r.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.25)
+    raise TimeoutError(f"streamlit did not come up on port {port}")
+
+
+class BrowserSession:
+    """Minimal Streamlit frontend: keeps widget state and reruns the script like a browser tab.
+
+    Like Session, every rerun it asks for is timed into samples as (page,
+    seconds), from the BackMsg to ScriptFinished; payloads gets (page, bytes
+    of ForwardMsgs received, whether it ended as a fragment run) for the
+    same reruns. page is the page the rerun lands on, as far as the walk
+    below knows it. Fragments built with run_every are polled by
+    poll_fragments(), as the browser's timers would.
+    """
+
+    def __init__(self, url, timeout=60):
+        self.url = url
+        self.timeout = timeout
+        self.ws = None
+        self.query_string = ''
+        self.page_script_hash = ''
+        self.values = {}
+        # delta path -> (kind, element proto, fragment id)
+        self.elements = {}
+        # fragment id -> run_every interval
+        self.auto_reruns = {}
+        # Messages the server sends once and later refers to by hash
+        self.cached = {}
+        self.page = 'home'
+        self.samples = []
+        self.payloads = []
+
+    async def connect(self):
+        from tornado.websocket import websocket_connect
+
+        try:
+            self.ws = await websocket_connect(self.url, subprotocols=['streamlit'])
+        except OSError as e:
+            raise AppError(f"could not connect: {e}") from e
+        await self.rerun()
+
+    def close(self):
+        if self.ws is not None:
+            self.ws.close()
+
+    async def rerun(self, trigger=None, fragment_id=''):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from tornado.websocket import WebSocketClosedError
+
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.query_string = self.query_string
+        state.page_script_hash = self.page_script_hash
+        if fragment_id:
+            state.fragment_id = fragment_id
+        for widget_id, (field, value) in self.values.items():
+            widget = state.widget_states.widgets.add()
+            widget.id = widget_id
+            setattr(widget, field, value)
+        if trigger is not None:
+            widget = state.widget_states.widgets.add()
+            widget.id = trigger
+            widget.trigger_value = True
+        started = time.perf_counter()
+        try:
+            await self.ws.write_message(msg.SerializeToString(), binary=True)
+        except WebSocketClosedError:
+            raise AppError("server closed the websocket") from None
+        try:
+            size, fragment_run = await asyncio.wait_for(self._wait_finished(fragment_id), self.timeout)
+        except asyncio.TimeoutError:
+            raise AppError(f"no ScriptFinished within {self.timeout}s") from None
+        self.samples.append((self.page, time.perf_counter() - started))
+        self.payloads.append((self.page, size, fragment_run))
+
+    async def _wait_finished(self, fragment_id):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        received, exception, size = set(), None, 0
+        fragment_run = bool(fragment_id)
+        while True:
+            data = await self.ws.read_message()
+            if data is None:
+                raise AppError("server closed the websocket")
+            size += len(data)
+            msg = ForwardMsg.FromString(data)
+            if msg.WhichOneof('type') == 'ref_hash':
+                cached = self.cached[msg.ref_hash]
+                cached.metadata.CopyFrom(msg.metadata)
+                msg = cached
+            elif msg.metadata.cacheable:
+                self.cached[msg.hash] = msg
+            kind = msg.WhichOneof('type')
+            if kind == 'new_session':
+                self.page_script_hash = msg.new_session.page_script_hash
+                # A fragment that calls st.rerun() turns into a full run
+                fragment_run = bool(msg.new_session.fragment_ids_this_run)
+                if not fragment_run:
+                    # The frontend drops its run_every timers when the whole app reruns
+                    self.auto_reruns.clear()
+            elif kind == 'page_info_changed':
+                self.query_string = msg.page_info_changed.query_string
+            elif kind == 'auto_rerun':
+                self.auto_reruns[msg.auto_rerun.fragment_id] = msg.auto_rerun.interval
+            elif kind == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+                path = tuple(msg.metadata.delta_path)
+                element = msg.delta.new_element
+                element_kind = element.WhichOneof('type')
+                received.add(path)
+                self.elements[path] = (element_kind, getattr(element, element_kind), msg.delta.fragment_id)
+                if element_kind == 'exception':
+                    exception = element.exception
+            elif kind == 'script_finished':
+                status = msg.script_finished
+                if status == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    # Only what the final run sends survives it
+                    received.clear()
+                    exception = None
+                    continue
+                if status == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise AppError("app failed to compile")
+                # Drop what this run replaced without re-sending, as the frontend does
+                self.elements = {
+                    path: entry for path, entry in self.elements.items()
+                    if path in received or (status == ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY
+                                            and entry[2] != fragment_id)
+                }
+                if exception is not None:
+                    raise AppError(f"app raised {exception.type}: {exception.message}")
+                return size, fragment_run
+
+    def find(self, kind, label=None, key=None):
+        """The last element of kind with label or key, or any element of kind when neither is given"""
+        for element_kind, element, fragment_id in reversed(list(self.elements.values())):
+            if element_kind != kind:
+                continue
+            if label is None and key is None:
+                return element, fragment_id
+            if (label is not None and element.label == label) or (key is not None and element.id.endswith(f'-{key}')):
+                return element, fragment_id
+        raise LookupError(f"no {kind} {label or key!r} on the page")
+
+    def has_button(self, label=None, key=None):
+        try:
+            self.find('button', label, key)
+        except LookupError:
+            return False
+        return True
+
+    async def click(self, label=None, key=None):
+        button, fragment_id = self.find('button', label, key)
+        await self.rerun(trigger=button.id, fragment_id=fragment_id)
+
+    async def choose(self, index):
+        radio, fragment_id = self.find('radio')
+        # Newer Streamlit keys radio state by the formatted option (raw_value), older by index
+        if 'raw_value' in radio.DESCRIPTOR.fields_by_name:
+            self.values[radio.id] = ('string_value', radio.options[index])
+        else:
+            self.values[radio.id] = ('int_value', index)
+        await self.rerun(fragment_id=fragment_id)
+
+    async def poll_fragments(self):
+        """Rerun run_every fragments on their interval until none is left polling"""
+        deadline = time.monotonic() + self.timeout
+        while self.auto_reruns:
+            if time.monotonic() > deadline:
+                raise AppError(f"still polling after {self.timeout}s")
+            fragment_id, interval = next(iter(self.auto_reruns.items()))
+            await asyncio.sleep(interval)
+            await self.rerun(fragment_id=fragment_id)
+
+    async def answer_level(self, then, hints=False):
+        """Submit the pre-selected first option for every question on the page, then Next/Finish to then"""
+        while self.has_button("✅ Submit"):
+            if hints and self.has_button(key='get_hint'):
+                await self.click(key='get_hint')
+                await self.poll_fragments()
+            await self.click("✅ Submit")
+            next_button, _ = self.find('button', key='next')
+            if next_button.label == "Finish":
+                self.page = then
+            await self.click(key='next')
+
+    async def visit(self, page, label=None, key=None):
+        """Click the button that leads to page"""
+        self.page = page
+        await self.click(label, key)
+
+    async def investigate(self, chapter='Triangle', subtopic='Similarity Criterion', hints=True):
+        """home → case_briefing → basic → break → intermediate → break → advanced → results.
+
+        The websocket stays open, like a tab left on the results page, until close().
+        """
+        await self.connect()
+        await self.visit('case_briefing', key=f"{chapter}_{subtopic}")
+        await self.visit('basic', "🚀 Start Investigation")
+        await self.answer_level('basic_break')
+        await self.visit('intermediate', "▶️ Continue")
+        await self.answer_level('intermediate_break', hints=hints)
+        await self.visit('advanced', "🚨 Solve Final Case")
+        await self.answer_level('results')
+        await self.poll_fragments()
+        await self.click("📋 Review Answers")
+        return self.samples
@@ -0,0 +1,149 @@
+"""Multi-user load test for a single app process.
+
+Usage:
+    python -m benchmarks.load_test [--levels 1,2,4,8,16,32] [--latency 0.5] [--slo 2.0]
+
+Starts one `streamlit run app.py` (benchmarks.run_app) with Gemini served
+by a local FakeGeminiServer over HTTP. At each concurrency level N, N
+simulated students connect over the websocket like browser tabs and walk a
+full investigation (home → case_briefing → basic → basic_break →
+intermediate with hints → intermediate_break → advanced → results) at the
+same time, polling the hint and analysis fragments as a browser would.
+Reports throughput, tail latency, server memory per session and the first
+level where the app falls over (it raised, hung or dropped a connection, or
+p95 went above the SLO). A level where the harness itself failed is
+reported as invalid rather than as the app falling over.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from benchmarks.fake_gemini import FakeGeminiServer
+from benchmarks.harness import (
+    RESULTS_DIR, AppError, BrowserSession, git_commit, process_rss, start_app, summarize, wait_healthy
+)
+
+SUBTOPICS = [
+    ('Triangle', 'Similarity Criterion'),
+    ('Triangle', 'Converse of Basic Proportionality Theorem'),
+    ('Trigonometry', 'Trigonometric Identities'),
+    ('Trigonometry', 'Trigonometry Applications - Heights & Distances'),
+]
+
+
+async def run_level(url, pid, concurrency, timeout):
+    sessions = [BrowserSession(url, timeout=timeout) for _ in range(concurrency)]
+    completed, errors, harness_errors = [], [], []
+
+    async def student(i, session):
+        chapter, subtopic = SUBTOPICS[i % len(SUBTOPICS)]
+        try:
+            await session.investigate(chapter, subtopic)
+            completed.append(session)
+        except AppError as e:
+            errors.append(str(e))
+        except Exception as e:
+            harness_errors.append(f"{type(e).__name__}: {e}")
+
+    rss_before = process_rss(pid)
+    cpu_before = time.process_time()
+    started = time.perf_counter()
+    await asyncio.gather(*(student(i, session) for i, session in enumerate(sessions)))
+    wall = time.perf_counter() - started
+    # Measured while every session is still connected, so their state is resident
+    rss_after = process_rss(pid)
+    client_cpu = time.process_time() - cpu_before
+    for session in sessions:
+        session.close()
+
+    samples = [seconds for session in completed for _, seconds in session.samples]
+    return {
+        'concurrency': concurrency,
+        'wall_seconds': wall,
+        'completed': len(completed),
+        'errors': errors[:5],
+        'error_count': len(errors),
+        'harness_errors': harness_errors[:5],
+        'harness_error_count': len(harness_errors),
+        'reruns_per_second': len(samples) / wall if wall else 0.0,
+        'investigations_per_second': len(completed) / wall if wall else 0.0,
+        'latency': summarize(samples),
+        'rss_delta_per_session': max(0, rss_after - rss_before) / concurrency,
+        # Near 1.0 the load generator, not the app, is the bottleneck
+        'client_cpu_share': client_cpu / wall if wall else 0.0
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--levels', default='1,2,4,8,16,32', help="comma-separated concurrency levels")
+    parser.add_argument('--latency', type=float, default=0.5, help="fake Gemini latency (s)")
+    parser.add_argument('--slo', type=float, default=2.0, help="p95 rerun latency (s) considered falling over")
+    parser.add_argument('--timeout', type=float, default=120, help="seconds a rerun may take before it counts as hung")
+    parser.add_argument('--port', type=int, default=8791)
+    parser.add_argument('--output', help="JSON path (default benchmarks/results/load-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    fake = FakeGeminiServer(latency=args.latency).start()
+    server = start_app(fake.url, args.port)
+    url = f'ws://127.0.0.1:{args.port}/_stcore/stream'
+
+    levels, breaking_point, invalid_level = [], None, None
+    try:
+        wait_healthy(args.port)
+        # One untimed walk-through warms imports and caches
+        asyncio.run(run_level(url, server.pid, 1, args.timeout))
+
+        print(f"{'users':>6}{'done':>6}{'err':>5}{'rerun/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+              f"{'p99 ms':>9}{'RSS KB/sess':>13}")
+        for concurrency in [int(n) for n in args.levels.split(',')]:
+            level = asyncio.run(run_level(url, server.pid, concurrency, args.timeout))
+            levels.append(level)
+            lat = level['latency']
+            print(f"{concurrency:>6}{level['completed']:>6}{level['error_count']:>5}"
+                  f"{level['reruns_per_second']:>9.1f}{lat['p50'] * 1000:>9.0f}{lat['p95'] * 1000:>9.0f}"
+                  f"{lat['p99'] * 1000:>9.0f}{level['rss_delta_per_session'] / 1024:>13.0f}")
+            if level['client_cpu_share'] > 0.9:
+                print(f"  load generator used {level['client_cpu_share']:.0%} of a core: latencies include client queueing")
+            if level['harness_error_count']:
+                invalid_level = concurrency
+                break
+            if level['error_count'] or lat['p95'] > args.slo:
+                breaking_point = concurrency
+                break
+    finally:
+        server.terminate()
+        server.wait()
+        fake.stop()
+
+    if invalid_level:
+        print(f"harness failed at {invalid_level} concurrent students, so that level is invalid: "
+              f"{levels[-1]['harness_errors'][0]}")
+    elif breaking_point:
+        print(f"falls over at {breaking_point} concurrent students "
+              f"(errors or p95 > {args.slo}s)")
+    else:
+        print("held up at every level tried")
+
+    result = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'latency': args.latency,
+        'slo': args.slo,
+        'breaking_point': breaking_point,
+        'invalid_level': invalid_level,
+        'levels': levels
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{result['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"saved {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,33 @@
+"""Run `streamlit run app.py` against a fake Gemini server instead of Vertex AI.
+
+Usage:
+    python -m benchmarks.fake_gemini --port 8765
+    python -m benchmarks.run_app http://127.0.0.1:8765/ [streamlit options...]
+
+Streamlit executes app.py inside this process, so swapping the shared
+client's factory before starting it is enough: the app code runs unchanged
+and never imports the benchmarks package itself.
+"""
+import sys
+
+import gemini
+from benchmarks.fake_gemini import RemoteFakeModel
+from benchmarks.harness import APP_PATH
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print(__doc__, file=sys.stderr)
+        return 2
+    url, options = argv[0], argv[1:]
+    gemini.client_pool.reset(factory=lambda: RemoteFakeModel(url))
+
+    from streamlit.web import cli
+
+    sys.argv = ['streamlit', 'run', APP_PATH, *options]
+    return cli.main()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
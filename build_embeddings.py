@@ -0,0 +1,130 @@
+"""Build the question similarity index.
+
+Usage:
+    python build_embeddings.py [--model all-MiniLM-L6-v2 | --tfidf] [--dim 128]
+
+Embeds every question's prose (text, worked answer, steps and case file)
+and writes question_vectors.npy, one L2-normalised float32 row per question,
+plus question_vectors.json with each row's key and a checksum of the
+question text. With sentence-transformers installed the rows come from a
+local CPU embedding model; otherwise (or with --tfidf) from TF-IDF reduced
+to at most --dim dimensions by truncated SVD. Both files are build
+artifacts: re-run after editing question data, or as part of the deploy
+build. The app memory-maps the matrix via question_index.py.
+"""
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from question_bank import QuestionBank, QuestionSchemaError, question_text, text_checksum
+from question_index import INDEX_VERSION, VECTORS_FILE, VECTORS_META
+
+# Words plus the symbols that carry meaning in these questions
+TOKEN = re.compile(r"\w+|[²³∥⟂⊥△∠√±∼≅θ]")
+STOP_WORDS = frozenset("""
+a an and are as at be by can for from has have if in into is it its of on or so such that the their then
+this to use using we what when which with you your
+""".split())
+
+
+def tokenize(text):
+    return [t for t in TOKEN.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def tfidf_vectors(texts, dim):
+    """Sublinear TF-IDF rows, projected onto their top dim singular directions (LSA)"""
+    documents = [tokenize(text) for text in texts]
+    vocabulary = {}
+    for tokens in documents:
+        for token in set(tokens):
+            vocabulary[token] = vocabulary.get(token, 0) + 1
+    columns = {token: i for i, token in enumerate(sorted(vocabulary))}
+    idf = np.array([math.log((1 + len(texts)) / (1 + vocabulary[t])) + 1 for t in sorted(vocabulary)])
+
+    matrix = np.zeros((len(texts), len(columns)))
+    for row, tokens in enumerate(documents):
+        for token in tokens:
+            matrix[row, columns[token]] += 1
+    np.log1p(matrix, out=matrix)
+    matrix *= idf
+
+    # Projecting onto the singular directions keeps cosines exact when there are
+    # no more questions than dimensions, and a rank-dim approximation beyond
+    u, s, _ = np.linalg.svd(matrix, full_matrices=False)
+    rank = min(dim, len(s))
+    return u[:, :rank] * s[:rank]
+
+
+def model_vectors(texts, model_name):
+    """Rows from a local sentence-transformers model on CPU; None if it isn't available"""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+    try:
+        model = SentenceTransformer(model_name, device='cpu')
+    except OSError as e:
+        print(f"could not load {model_name}: {e}", file=sys.stderr)
+        return None
+    return model.encode(texts, batch_size=32, convert_to_numpy=True)
+
+
+def write_index(base_dir, vectors, keys, checksums, model):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = (vectors / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    path = os.path.join(base_dir, VECTORS_FILE)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        np.save(f, vectors)
+    os.replace(tmp, path)
+
+    # Written last: the app only trusts the matrix when the metadata matches its shape
+    meta_path = os.path.join(base_dir, VECTORS_META)
+    with open(f"{meta_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump({'version': INDEX_VERSION, 'model': model, 'keys': keys, 'text_crc': checksums},
+                  f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(f"{meta_path}.tmp", meta_path)
+    return vectors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the question similarity index")
+    parser.add_argument('--base-dir', default='.')
+    parser.add_argument('--model', default='all-MiniLM-L6-v2', help="sentence-transformers model name")
+    parser.add_argument('--tfidf', action='store_true', help="skip the embedding model")
+    parser.add_argument('--dim', type=int, default=128, help="TF-IDF dimensions kept")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        bank = QuestionBank(args.base_dir, use_pack=False)
+    except QuestionSchemaError as e:
+        print(f"invalid question data: {e}", file=sys.stderr)
+        return 1
+    if not bank.by_key:
+        print("no question data found", file=sys.stderr)
+        return 1
+
+    keys = list(bank.by_key)
+    texts = [question_text(bank.by_key[key]) for key in keys]
+    vectors = None if args.tfidf else model_vectors(texts, args.model)
+    model = f"sentence-transformers/{args.model}"
+    if vectors is None:
+        vectors = tfidf_vectors(texts, args.dim)
+        model = 'tfidf-lsa'
+
+    vectors = write_index(args.base_dir, vectors, keys, [text_checksum(bank.by_key[k].text) for k in keys], model)
+    print(f"indexed {len(keys)} questions as {vectors.shape[1]}-d {model} vectors in {VECTORS_FILE} "
+          f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
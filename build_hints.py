@@ -0,0 +1,96 @@
+"""Precompute witness hints for every intermediate question and performance profile.
+
+Usage:
+    python build_hints.py [--variants 2] [--output hints.json] [--force]
+
+Walks every *_questions.json referenced by 1.json and asks Gemini for hint
+variants per (intermediate question, profile). The result is written to hints.json,
+which get_smart_hint_from_gemini() serves before falling back to a live call.
+Existing entries are kept unless --force is given, so an interrupted run
+can simply be restarted.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from gemini import get_model
+from hints import (
+    HINTS_FILE, STORE_VERSION, build_hint_prompt, hint_key, hint_profile, profiles_for
+)
+from question_bank import get_question_bank
+
+# Hints are only offered on the intermediate page (see show_quiz_card)
+HINT_DIFFICULTY = 'intermediate'
+
+
+def load_existing(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == STORE_VERSION:
+            return data['hints']
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+def write_store(path, hints):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': STORE_VERSION, 'hints': hints}, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the precomputed hint store")
+    parser.add_argument('--variants', type=int, default=2, help="hints generated per profile")
+    parser.add_argument('--output', default=HINTS_FILE)
+    parser.add_argument('--force', action='store_true', help="regenerate entries that already exist")
+    args = parser.parse_args(argv)
+
+    model = get_model()
+    if model is None:
+        print("Vertex AI is unavailable - check your secrets.", file=sys.stderr)
+        return 1
+
+    bank = get_question_bank()
+    hints = {} if args.force else load_existing(args.output)
+    generated = 0
+    started = time.time()
+
+    for (chapter, subtopic), questions in bank.by_subtopic.items():
+        profiles = profiles_for(q.topic for q in questions)
+        for question in questions:
+            if question.difficulty != HINT_DIFFICULTY:
+                continue
+            for similar, best_topic in profiles:
+                key = hint_key(chapter, subtopic, question.difficulty, question.id,
+                               hint_profile(similar, best_topic))
+                if key in hints:
+                    continue
+
+                prompt = build_hint_prompt(question, similar, best_topic)
+                variants = []
+                for _ in range(args.variants):
+                    try:
+                        variants.append(model.generate_content(prompt).text.strip())
+                    except Exception as e:
+                        print(f"  {key}: {e}", file=sys.stderr)
+                if variants:
+                    hints[key] = variants
+                    generated += 1
+
+            # Checkpoint per question so a crash loses little work
+            write_store(args.output, hints)
+        print(f"{chapter} / {subtopic}: done")
+
+    write_store(args.output, hints)
+    print(f"{generated} profiles generated, {len(hints)} stored in {args.output} "
+          f"({time.time() - started:.0f}s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
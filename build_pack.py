@@ -0,0 +1,44 @@
+"""Compile 1.json and every referenced questions file into questions.pack.
+
+Usage:
+    python build_pack.py [--output questions.pack]
+
+The question bank reads a source file from the pack instead of parsing its
+JSON whenever the pack's copy matches the file's current mtime and size, so
+a stale pack only costs the JSON parse it was meant to save. Re-run after
+editing question data, or as part of the deploy build.
+"""
+import argparse
+import sys
+import time
+
+from question_bank import QuestionBank, QuestionSchemaError
+from question_pack import PACK_FILE, build_pack
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the binary question pack")
+    parser.add_argument('--base-dir', default='.')
+    parser.add_argument('--output', default=PACK_FILE)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        # Validates every question first, so a broken file never gets packed
+        bank = QuestionBank(args.base_dir, use_pack=False)
+    except QuestionSchemaError as e:
+        print(f"invalid question data: {e}", file=sys.stderr)
+        return 1
+    if not bank.by_subtopic:
+        print("no question data found", file=sys.stderr)
+        return 1
+
+    sources = bank.sources()
+    size = build_pack(sources, args.base_dir, args.output)
+    print(f"packed {len(sources)} files ({size / 1024:.1f} KB) into {args.output} "
+          f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
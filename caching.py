@@ -0,0 +1,116 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from shared_cache import shared_backend
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a fixed TTL"""
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+class TieredCache:
+    """Process-local TTLCache in front of a cache shared across worker processes"""
+
+    def __init__(self, local, shared):
+        self.local = local
+        self.shared = shared
+        self.shared_hits = 0
+
+    def get(self, key, default=None):
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        value = self.shared.get(key)
+        if value is None:
+            return default
+        self.shared_hits += 1
+        self.local.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        self.shared.set(key, value)
+
+    def clear(self):
+        self.local.clear()
+
+    def __len__(self):
+        return len(self.local)
+
+    def stats(self):
+        stats = self.local.stats()
+        stats['shared_hits'] = self.shared_hits
+        return stats
+
+
+def make_cache(namespace, maxsize, ttl):
+    """TTLCache, backed by the shared store when one is configured (see shared_cache.py)"""
+    local = TTLCache(maxsize=maxsize, ttl=ttl)
+    shared = shared_backend(namespace, ttl)
+    return local if shared is None else TieredCache(local, shared)
+
+
+def make_key(*parts):
+    """Canonical SHA-256 key for JSON-serialisable prompt inputs"""
+    payload = json.dumps(parts, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def analysis_key(subtopic, correct_ids, incorrect_ids):
+    return make_key('analysis', subtopic, sorted(correct_ids), sorted(incorrect_ids))
+
+
+# Shared by every session in the process, and by every worker when a shared store is set
+analysis_cache = make_cache('analysis', maxsize=2048, ttl=6 * 3600)
+# Live-generated hints, keyed by prompt
+hint_cache = make_cache('hint', maxsize=4096, ttl=6 * 3600)
@@ -0,0 +1,63 @@
+from functools import lru_cache
+
+from lazy_imports import lazy_import
+
+go = lazy_import('plotly.graph_objects')
+
+CORRECT_COLOR = '#10b981'
+INCORRECT_COLOR = '#ef4444'
+ACCURACY_SCALE = ['#ef4444', '#fbbf24', '#10b981']
+
+
+def timeline_snapshot(ledger):
+    """(is_correct, seconds) per answer in order - everything the timeline chart depends on"""
+    return tuple((r['is_correct'], round(r['time_spent'], 1)) for r in ledger)
+
+
+def topic_snapshot(ledger):
+    """(topic, accuracy %) from the ledger's running per-topic tallies"""
+    return tuple((topic, tally.accuracy * 100) for topic, tally in ledger.by_topic.items())
+
+
+# Figures are cached by content, so every session with the same answers gets
+# the same object back; Streamlit then serialises identical bytes, which its
+# forward-message cache can skip re-sending. Callers must not mutate them.
+@lru_cache(maxsize=512)
+def timeline_figure(snapshot):
+    fig = go.Figure()
+    for label, correct, color in (('Correct', True, CORRECT_COLOR), ('Incorrect', False, INCORRECT_COLOR)):
+        points = [(i, seconds) for i, (is_correct, seconds) in enumerate(snapshot, 1) if is_correct == correct]
+        if points:
+            x, y = zip(*points)
+            fig.add_trace(go.Scatter(x=x, y=y, mode='markers', name=label, marker={'color': color}))
+    fig.update_layout(
+        title="Time Spent per Question",
+        xaxis_title="Question Number",
+        yaxis_title="Time (seconds)",
+        legend_title="result",
+        plot_bgcolor='white'
+    )
+    return fig
+
+
+@lru_cache(maxsize=512)
+def topic_accuracy_figure(snapshot):
+    topics = [topic for topic, _ in snapshot]
+    accuracy = [value for _, value in snapshot]
+    fig = go.Figure(go.Bar(
+        x=topics,
+        y=accuracy,
+        marker={
+            'color': accuracy,
+            'colorscale': ACCURACY_SCALE,
+            'showscale': True,
+            'colorbar': {'title': 'Accuracy'}
+        }
+    ))
+    fig.update_layout(
+        title="Accuracy by Topic",
+        xaxis_title="Topic",
+        yaxis_title="Accuracy",
+        plot_bgcolor='white'
+    )
+    return fig
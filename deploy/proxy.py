@@ -0,0 +1,112 @@
+"""Cookie-sticky TCP proxy in front of several Streamlit workers.
+
+A Streamlit session lives in one worker process (its websocket, st.session_state
+and the session manager's slot), so every request from a browser must reach the
+same worker. The first response to a browser without a worker cookie gets one
+pinning it to the least-busy worker; later requests, including the websocket
+upgrade, follow the cookie. After the request head, bytes are piped through
+unchanged, so websockets and keep-alive just work.
+"""
+import asyncio
+import re
+
+COOKIE = 'cts_worker'
+COOKIE_RE = re.compile(rb'(?:^|;)\s*' + COOKIE.encode() + rb'=(\d+)')
+MAX_HEAD = 64 * 1024
+
+
+class StickyProxy:
+    def __init__(self, backends):
+        # [(host, port), ...]; a worker's index is its cookie value
+        self.backends = backends
+        self.connections = [0] * len(backends)
+
+    def _pinned(self, head):
+        for line in head.split(b'\r\n')[1:]:
+            name, _, value = line.partition(b':')
+            if name.strip().lower() == b'cookie':
+                match = COOKIE_RE.search(value)
+                if match and int(match.group(1)) < len(self.backends):
+                    return int(match.group(1))
+        return None
+
+    def _least_busy(self, exclude=()):
+        candidates = [i for i in range(len(self.backends)) if i not in exclude]
+        return min(candidates, key=lambda i: self.connections[i]) if candidates else None
+
+    async def _connect(self, index):
+        """Connect to the pinned worker, or fail over to another; returns (index, reader, writer, repinned).
+
+        The connection counts against a worker from the attempt on, so clients
+        arriving together spread out instead of all seeing it idle.
+        """
+        tried = set()
+        repinned = False
+        while index is not None:
+            self.connections[index] += 1
+            try:
+                reader, writer = await asyncio.open_connection(*self.backends[index])
+                return index, reader, writer, repinned
+            except OSError:
+                self.connections[index] -= 1
+                tried.add(index)
+                index = self._least_busy(exclude=tried)
+                repinned = True
+        raise ConnectionError("no worker is accepting connections")
+
+    async def handle(self, client_reader, client_writer):
+        try:
+            head = await client_reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            client_writer.close()
+            return
+
+        pinned = self._pinned(head)
+        try:
+            index, reader, writer, repinned = await self._connect(
+                pinned if pinned is not None else self._least_busy())
+        except ConnectionError:
+            client_writer.write(b'HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+            await client_writer.drain()
+            client_writer.close()
+            return
+
+        try:
+            writer.write(head)
+            if pinned is None or repinned:
+                response_head = await reader.readuntil(b'\r\n\r\n')
+                cookie = f'Set-Cookie: {COOKIE}={index}; Path=/; HttpOnly; SameSite=Lax\r\n'.encode()
+                client_writer.write(response_head[:-2] + cookie + b'\r\n')
+            await asyncio.gather(
+                self._pipe(client_reader, writer),
+                self._pipe(reader, client_writer)
+            )
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            self.connections[index] -= 1
+            writer.close()
+            client_writer.close()
+
+    @staticmethod
+    async def _pipe(reader, writer):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if writer.can_write_eof():
+                try:
+                    writer.write_eof()
+                except OSError:
+                    pass
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEAD)
+        async with server:
+            await server.serve_forever()
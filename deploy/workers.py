@@ -0,0 +1,75 @@
+"""Run several app workers behind the sticky-session proxy.
+
+Usage:
+    python -m deploy.workers [--workers 4] [--port 8501] [--worker-port 8600]
+                             [--shared-cache shared_cache.db | --redis-url redis://...]
+
+Starts one `streamlit run app.py` per worker on 127.0.0.1:<worker-port + i>
+and serves them all on --port through deploy.proxy. Workers share the
+progress database, the analysis/hint caches (a SQLite file, or Redis when
+--redis-url is given), questions.pack and the similarity index, which are
+rebuilt first. Ctrl+C stops everything.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+
+from deploy.proxy import StickyProxy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Interpreter arguments that start a worker; streamlit options follow
+APP_COMMAND = ['-m', 'streamlit', 'run', 'app.py']
+
+
+def start_worker(index, port, env, command=APP_COMMAND, stdout=None):
+    worker_env = dict(env)
+    # One metrics endpoint per worker when tracing is on
+    worker_env['CLUETOSOLVE_METRICS_PORT'] = str(int(env.get('CLUETOSOLVE_METRICS_PORT', '9464')) + index)
+    return subprocess.Popen(
+        [sys.executable, *command,
+         '--server.address', '127.0.0.1', '--server.port', str(port), '--server.headless', 'true'],
+        cwd=ROOT, env=worker_env, stdout=stdout, stderr=stdout
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--host', default='0.0.0.0', help="proxy listen address")
+    parser.add_argument('--port', type=int, default=8501, help="proxy port")
+    parser.add_argument('--worker-port', type=int, default=8600, help="first worker port")
+    parser.add_argument('--shared-cache', default=os.path.join(ROOT, 'shared_cache.db'),
+                        help="SQLite file for caches shared between workers")
+    parser.add_argument('--redis-url', help="use Redis for the shared caches instead")
+    args = parser.parse_args(argv)
+
+    subprocess.call([sys.executable, 'build_pack.py'], cwd=ROOT)
+    subprocess.call([sys.executable, 'build_embeddings.py'], cwd=ROOT)
+
+    env = dict(os.environ)
+    if args.redis_url:
+        env['CLUETOSOLVE_REDIS_URL'] = args.redis_url
+    else:
+        env['CLUETOSOLVE_SHARED_CACHE'] = args.shared_cache
+
+    ports = [args.worker_port + i for i in range(args.workers)]
+    workers = [start_worker(i, port, env) for i, port in enumerate(ports)]
+    print(f"{args.workers} workers on ports {ports[0]}-{ports[-1]}, proxy on http://{args.host}:{args.port}")
+
+    proxy = StickyProxy([('127.0.0.1', port) for port in ports])
+    try:
+        asyncio.run(proxy.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,24 @@
 import streamlit as st
 import json
 import base64
-from google.oauth2 import service_account
-from vertexai import init as vertex_init
-from vertexai.generative_models import GenerativeModel
+import threading
+import time
+
+import tracing
+
+MODEL_NAME = "gemini-2.5-flash"
+
+# Circuit breaker: after a failed setup, wait this long (doubling per failure) before retrying
+BACKOFF_INITIAL = 5.0
+BACKOFF_MAX = 300.0
 
 def setup_vertex_ai():
     try:
+        # Imported here: the Vertex AI SDK is slow to import and only needed once a hint or analysis is requested
+        from google.oauth2 import service_account
+        from vertexai import init as vertex_init
+        from vertexai.generative_models import GenerativeModel
+
         project_id = st.secrets["project_id"]
         location = st.secrets["location"]
 
@@ -25,9 +37,78 @@ def setup_vertex_ai():
             credentials=credentials
         )
 
-        return GenerativeModel("gemini-2.5-flash")
+        return GenerativeModel(MODEL_NAME)
 
     except Exception as e:
         raise Exception(f"Vertex setup failed: {e}")
 
 
+class ClientPool:
+    """Process-wide, lazily initialised Vertex AI model shared by every session"""
+
+    def __init__(self, factory=setup_vertex_ai):
+        self.factory = factory
+        self._model = None
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.last_error = None
+        self.retry_at = 0.0
+
+    @property
+    def state(self):
+        if self._model is not None:
+            return 'healthy'
+        if self.failures and time.monotonic() < self.retry_at:
+            return 'open'
+        return 'idle' if not self.failures else 'half-open'
+
+    def get(self):
+        """Shared model, or None while setup is failing and the breaker is open"""
+        if self._model is not None:
+            return self._model
+        if time.monotonic() < self.retry_at:
+            return None
+
+        with self._lock:
+            if self._model is None and time.monotonic() >= self.retry_at:
+                try:
+                    self._model = self.factory()
+                    self.failures = 0
+                    self.last_error = None
+                except Exception as e:
+                    self.failures += 1
+                    self.last_error = str(e)
+                    backoff = min(BACKOFF_INITIAL * 2 ** (self.failures - 1), BACKOFF_MAX)
+                    self.retry_at = time.monotonic() + backoff
+            return self._model
+
+    def reset(self, factory=None):
+        """Drop the shared model (and optionally swap the factory) so the next get() rebuilds it"""
+        with self._lock:
+            if factory is not None:
+                self.factory = factory
+            self._model = None
+            self.failures = 0
+            self.last_error = None
+            self.retry_at = 0.0
+
+    def health(self):
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'retry_in': max(0.0, self.retry_at - time.monotonic())
+        }
+
+
+client_pool = ClientPool()
+
+CLIENT_STATES = ('idle', 'healthy', 'open', 'half-open')
+tracing.register_gauge('gemini_client_state', lambda: {s: int(s == client_pool.state) for s in CLIENT_STATES},
+                       label='state')
+tracing.register_gauge('gemini_client_failures', lambda: client_pool.failures)
+tracing.register_gauge('gemini_client_retry_seconds', lambda: client_pool.health()['retry_in'])
+
+
+def get_model():
+    return client_pool.get()
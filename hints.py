@@ -0,0 +1,93 @@
+import json
+import os
+import random
+import threading
+
+HINTS_FILE = 'hints.json'
+STORE_VERSION = 1
+
+
+def hint_profile(similar, best_topic):
+    """Performance profile a hint is written for: did they crack similar cases, and their best skill"""
+    return f"{'similar' if similar else 'fresh'}|{'-' if best_topic is None else best_topic}"
+
+
+def profiles_for(topics):
+    """Every (similar, best_topic) pair reachable, given the topics a student may have mastered"""
+    profiles = [(False, None)]
+    for topic in sorted(set(topics)):
+        profiles.append((False, topic))
+        profiles.append((True, topic))
+    return profiles
+
+
+def hint_key(chapter, subtopic, difficulty, question_id, profile):
+    return f"{chapter}|{subtopic}|{difficulty}|{question_id}|{profile}"
+
+
+def build_hint_prompt(question, similar, best_topic):
+    """Witness prompt for a question.
+
+    similar is a list of solved question ids, or True when only the profile
+    is known (offline generation); best_topic is None with no correct answers.
+    """
+    hint_context = f"""You're a friendly detective mentor helping a nervous 10th grader.
+
+Current Investigation: {question.text}
+Topic: {question.topic or 'Math'}
+
+"""
+
+    if similar is True:
+        hint_context += "\n✨ They cracked similar cases earlier in this investigation"
+    elif similar:
+        similar_q_ids = ', '.join([f"Q{q_id}" for q_id in similar[:2]])
+        hint_context += f"\n✨ They cracked similar cases: {similar_q_ids}"
+
+    if best_topic is not None:
+        hint_context += f"\n💪 Their best skill: {best_topic}"
+
+    return f"""{hint_context}
+
+Give a SHORT, CASUAL hint (2-3 sentences) with emojis that:
+1. Reminds them of a similar case they solved
+2. Shows how their strength helps here
+3. Encourages without revealing the answer
+
+Keep it friendly and natural. No bullet points."""
+
+
+class HintStore:
+    """Precomputed hints from hints.json, reloaded when the file changes"""
+
+    def __init__(self, path=HINTS_FILE):
+        self.path = path
+        self.mtime = None
+        self.hints = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            self.mtime, self.hints = None, {}
+            return
+        if mtime == self.mtime:
+            return
+        with self._lock:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                hints = data['hints'] if data.get('version') == STORE_VERSION else {}
+            except (OSError, ValueError, KeyError):
+                hints = {}
+            self.mtime, self.hints = mtime, hints
+
+    def lookup(self, key):
+        """One stored variant for key, or None if the profile isn't covered"""
+        self._refresh()
+        variants = self.hints.get(key)
+        return random.choice(variants) if variants else None
+
+
+hint_store = HintStore()
@@ -0,0 +1,238 @@
+import json
+import math
+import os
+import queue
+import sys
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: snapshots are still atomic, merges between workers are not serialised
+    fcntl = None
+
+STATS_FILE = os.environ.get('CLUETOSOLVE_ITEM_STATS', 'item_stats.json')
+SNAPSHOT_INTERVAL = float(os.environ.get('CLUETOSOLVE_ITEM_STATS_INTERVAL', '30'))
+SNAPSHOT_VERSION = 1
+
+# Answer events waiting for the aggregator; beyond this they are dropped, never blocking a click
+QUEUE_SIZE = 10000
+
+# Time sketch: log-spaced bins from 1 s to ~1 h with ~5% relative error,
+# plus one bin below and one above. Bin counts simply add, so sketches
+# from several workers or runs merge exactly.
+TIME_MIN = 1.0
+TIME_GROWTH = 1.1
+TIME_BINS = 88
+
+# Flags only mean something once a question has this many answers
+MIN_ANSWERS = 30
+TOO_EASY = 0.95
+TOO_HARD = 0.25
+
+
+def stat_key(chapter, subtopic, difficulty, question_id):
+    return f"{chapter}|{subtopic}|{difficulty}|{question_id}"
+
+
+def _time_bin(seconds):
+    if seconds < TIME_MIN:
+        return 0
+    return min(TIME_BINS - 1, 1 + int(math.log(seconds / TIME_MIN, TIME_GROWTH)))
+
+
+def _bin_value(index):
+    """Representative seconds for a bin (geometric middle)"""
+    if index == 0:
+        return TIME_MIN / 2
+    return TIME_MIN * TIME_GROWTH ** (index - 0.5)
+
+
+def time_quantile(bins, q):
+    """Approximate q-quantile of answer times from sparse {bin: count}; None if empty"""
+    total = sum(bins.values())
+    if not total:
+        return None
+    rank = q * (total - 1)
+    seen = 0
+    for index in sorted(bins):
+        seen += bins[index]
+        if seen > rank:
+            return _bin_value(index)
+    return _bin_value(max(bins))
+
+
+class ItemCounts:
+    """Running totals for one question; fixed size whatever the number of answers"""
+    __slots__ = ('answers', 'correct', 'options', 'time_bins')
+
+    def __init__(self):
+        self.answers = 0
+        self.correct = 0
+        self.options = {}
+        self.time_bins = [0] * TIME_BINS
+
+    def add(self, selected_option, is_correct, time_spent):
+        self.answers += 1
+        self.correct += int(is_correct)
+        self.options[selected_option] = self.options.get(selected_option, 0) + 1
+        self.time_bins[_time_bin(time_spent)] += 1
+
+
+def _merge(entry, counts):
+    """Add counts into a snapshot entry (JSON form) and refresh its derived fields"""
+    entry['answers'] = entry.get('answers', 0) + counts.answers
+    entry['correct'] = entry.get('correct', 0) + counts.correct
+    options = entry.setdefault('options', {})
+    for label, n in counts.options.items():
+        options[label] = options.get(label, 0) + n
+    bins = {int(i): n for i, n in entry.get('time_bins', {}).items()}
+    for i, n in enumerate(counts.time_bins):
+        if n:
+            bins[i] = bins.get(i, 0) + n
+    entry['time_bins'] = {str(i): n for i, n in sorted(bins.items())}
+
+    answers = entry['answers']
+    entry['p_value'] = round(entry['correct'] / answers, 4)
+    entry['option_share'] = {label: round(n / answers, 4) for label, n in sorted(options.items())}
+    entry['time_p50'] = round(time_quantile(bins, 0.5), 1)
+    entry['time_p90'] = round(time_quantile(bins, 0.9), 1)
+    entry['flags'] = item_flags(entry)
+
+
+def item_flags(entry):
+    """Authoring warnings for a snapshot entry"""
+    if entry['answers'] < MIN_ANSWERS:
+        return []
+    flags = []
+    if entry['p_value'] >= TOO_EASY:
+        flags.append('too_easy')
+    elif entry['p_value'] <= TOO_HARD:
+        flags.append('too_hard')
+    correct_label = entry.get('correct_option')
+    correct_count = entry['options'].get(correct_label, 0)
+    if any(label != correct_label and n > correct_count for label, n in entry['options'].items()):
+        flags.append('strong_distractor')
+    return flags
+
+
+class ItemStatsAggregator:
+    """Cross-student per-question statistics, written periodically to a JSON snapshot.
+
+    save_answer() only enqueues the event; a daemon thread folds events into
+    per-question ItemCounts and every interval merges them into the snapshot
+    file under a file lock, so several worker processes (and restarts)
+    accumulate into one file. Readers never need the raw response log.
+    """
+
+    def __init__(self, path=STATS_FILE, interval=SNAPSHOT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.dropped = 0
+        self._events = queue.Queue(maxsize=QUEUE_SIZE)
+        self._pending = {}
+        self._correct_options = {}
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='item-stats', daemon=True)
+        self._thread.start()
+
+    def record(self, chapter, subtopic, response):
+        try:
+            self._events.put_nowait((stat_key(chapter, subtopic, response['difficulty'], response['question_id']),
+                                     response['correct_option'], response['selected_option'],
+                                     response['is_correct'], response['time_spent']))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        next_flush = time.monotonic() + self.interval
+        while True:
+            try:
+                event = self._events.get(timeout=max(0.0, next_flush - time.monotonic()))
+            except queue.Empty:
+                event = None
+            if event is not None:
+                key, correct_option, selected_option, is_correct, time_spent = event
+                try:
+                    with self._flush_lock:
+                        counts = self._pending.get(key)
+                        if counts is None:
+                            counts = self._pending[key] = ItemCounts()
+                        counts.add(selected_option, bool(is_correct), float(time_spent))
+                        self._correct_options[key] = correct_option
+                except (TypeError, ValueError):
+                    pass
+                finally:
+                    self._events.task_done()
+            if time.monotonic() >= next_flush:
+                self.flush()
+                next_flush = time.monotonic() + self.interval
+
+    def flush(self):
+        """Merge everything aggregated so far into the snapshot file"""
+        with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            correct_options, self._correct_options = self._correct_options, {}
+        if not pending:
+            return
+        try:
+            with open(f"{self.path}.lock", 'a') as lock:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                snapshot = load_snapshot(self.path)
+                items = snapshot['items']
+                for key, counts in pending.items():
+                    entry = items.setdefault(key, {})
+                    entry['correct_option'] = correct_options[key]
+                    _merge(entry, counts)
+                snapshot['updated'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+                os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"item stats snapshot failed: {e}", file=sys.stderr)
+
+    def drain(self):
+        """Block until queued events are aggregated, then write the snapshot"""
+        self._events.join()
+        self.flush()
+
+
+def load_snapshot(path=STATS_FILE):
+    """{'version', 'updated', 'items': {stat_key: entry}}; empty if the file is missing or from another version"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        if snapshot.get('version') == SNAPSHOT_VERSION:
+            return snapshot
+    except (OSError, ValueError):
+        pass
+    return {'version': SNAPSHOT_VERSION, 'updated': None, 'items': {}}
+
+
+_aggregator = None
+_aggregator_lock = threading.Lock()
+
+
+def get_item_stats():
+    global _aggregator
+    if _aggregator is None:
+        with _aggregator_lock:
+            if _aggregator is None:
+                _aggregator = ItemStatsAggregator()
+    return _aggregator
+
+
+def main():
+    """Print the snapshot as a table, flagged questions first"""
+    items = load_snapshot()['items']
+    rows = sorted(items.items(), key=lambda kv: (not kv[1]['flags'], kv[0]))
+    print(f"{'question':<60}{'n':>6}{'p':>7}{'t50':>7}{'t90':>7}  flags")
+    for key, entry in rows:
+        print(f"{key:<60}{entry['answers']:>6}{entry['p_value']:>7.2f}{entry['time_p50']:>7.0f}"
+              f"{entry['time_p90']:>7.0f}  {','.join(entry['flags'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+import importlib
+import sys
+
+
+class LazyModule:
+    """Module placeholder that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            # import_module holds the import lock, so concurrent first uses are safe
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    """The module if it is already imported, otherwise a LazyModule for it"""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
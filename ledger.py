@@ -0,0 +1,132 @@
+class Tally:
+    """Running answer count, correct count and total time spent"""
+
+    __slots__ = ('total', 'correct', 'time_spent')
+
+    def __init__(self):
+        self.total = 0
+        self.correct = 0
+        self.time_spent = 0.0
+
+    def add(self, response, sign=1):
+        self.total += sign
+        self.correct += sign if response['is_correct'] else 0
+        self.time_spent += sign * response['time_spent']
+
+    @property
+    def accuracy(self):
+        return self.correct / self.total if self.total else 0.0
+
+    @property
+    def avg_time(self):
+        return self.time_spent / self.total if self.total else 0.0
+
+
+class ResponseLedger:
+    """A student's answers keyed by (subtopic, difficulty, question_id).
+
+    Question ids restart at 1 in every subtopic file, so the subtopic is part
+    of the key. Overall, per-difficulty and per-topic tallies and the current
+    streak are updated as answers are recorded, so the results and checkpoint
+    pages only read precomputed values.
+    """
+
+    def __init__(self):
+        # Insertion-ordered: a re-submitted answer keeps its original position
+        self._responses = {}
+        self.overall = Tally()
+        self.by_difficulty = {}
+        self.by_topic = {}
+        self._streak = 0
+        self._streak_stale = False
+
+    @classmethod
+    def from_responses(cls, responses):
+        ledger = cls()
+        for response in responses:
+            ledger.record(response)
+        return ledger
+
+    @staticmethod
+    def key_of(response):
+        return (response.get('subtopic'), response['difficulty'], response['question_id'])
+
+    def _tally(self, response, sign):
+        self.overall.add(response, sign)
+        self.by_difficulty.setdefault(response['difficulty'], Tally()).add(response, sign)
+        self.by_topic.setdefault(response['topic'], Tally()).add(response, sign)
+
+    def record(self, response):
+        """Add an answer, or replace an earlier answer to the same question"""
+        key = self.key_of(response)
+        previous = self._responses.get(key)
+
+        if previous is None:
+            self._responses[key] = response
+            self._streak = self._streak + 1 if response['is_correct'] else 0
+        else:
+            self._tally(previous, -1)
+            if not self.by_topic[previous['topic']].total:
+                del self.by_topic[previous['topic']]
+            self._responses[key] = response
+            # Rare: only rewriting the newest answer can be patched without a rescan
+            if key == next(reversed(self._responses)) and not self._streak_stale:
+                if response['is_correct'] and not previous['is_correct']:
+                    self._streak_stale = True
+                elif not response['is_correct']:
+                    self._streak = 0
+            else:
+                self._streak_stale = True
+
+        self._tally(response, 1)
+
+    def get(self, subtopic, difficulty, question_id):
+        return self._responses.get((subtopic, difficulty, question_id))
+
+    def responses(self, difficulty=None):
+        """Answers in submission order, optionally for one difficulty"""
+        if difficulty is None:
+            return list(self._responses.values())
+        return [r for r in self._responses.values() if r['difficulty'] == difficulty]
+
+    def tally(self, difficulty):
+        return self.by_difficulty.get(difficulty) or Tally()
+
+    def count(self, difficulty=None):
+        if difficulty is None:
+            return self.overall.total
+        tally = self.by_difficulty.get(difficulty)
+        return tally.total if tally else 0
+
+    def accuracy(self, difficulty=None):
+        if difficulty is None:
+            return self.overall.accuracy
+        tally = self.by_difficulty.get(difficulty)
+        return tally.accuracy if tally else 0.0
+
+    def best_topic(self):
+        """Topic with the most correct answers, or None before the first correct one"""
+        best = max(self.by_topic.items(), key=lambda item: item[1].correct, default=None)
+        return best[0] if best and best[1].correct else None
+
+    @property
+    def streak(self):
+        """Correct answers in a row at the end of the history"""
+        if self._streak_stale:
+            streak = 0
+            for r in reversed(self._responses.values()):
+                if not r['is_correct']:
+                    break
+                streak += 1
+            self._streak = streak
+            self._streak_stale = False
+        return self._streak
+
+    def __len__(self):
+        return len(self._responses)
+
+    def __iter__(self):
+        return iter(self._responses.values())
+
+    def __bool__(self):
+        return bool(self._responses)
@@ -0,0 +1,81 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Upper bound on generate_content calls running at once in this process
+MAX_IN_FLIGHT = int(os.environ.get('CLUETOSOLVE_LLM_CONCURRENCY', '8'))
+DEFAULT_TIMEOUT = 30.0
+
+# How long a page waits before rerunning to pick up new output from a job
+POLL_INTERVAL = 0.3
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+TIMED_OUT = 'timeout'
+CANCELLED = 'cancelled'
+
+_executor = ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT, thread_name_prefix='llm')
+
+
+class LLMJob:
+    """Handle for a background LLM call, kept in session state between reruns"""
+
+    def __init__(self, page, timeout):
+        self.page = page
+        self.future = None
+        self.timeout = timeout
+        self.started = time.monotonic()
+        self.status = PENDING
+        # Latest partial output published by the worker while it streams
+        self.partial = None
+
+    @property
+    def stopped(self):
+        """Polled by streaming workers so they can abandon a cancelled or timed-out job"""
+        return self.status in (CANCELLED, TIMED_OUT)
+
+    def poll(self):
+        """Refresh and return the job status without blocking"""
+        if self.status != PENDING:
+            return self.status
+        if self.future.done():
+            if self.future.cancelled():
+                self.status = CANCELLED
+            elif self.future.exception() is not None:
+                self.status = FAILED
+            else:
+                self.status = DONE
+        elif time.monotonic() - self.started > self.timeout:
+            # A call already on the wire can't be interrupted; its result is just dropped
+            self.future.cancel()
+            self.status = TIMED_OUT
+        return self.status
+
+    def result(self):
+        return self.future.result() if self.poll() == DONE else None
+
+    def cancel(self):
+        if self.status == PENDING:
+            self.future.cancel()
+            self.status = CANCELLED
+
+
+def submit(page, fn, *args, timeout=DEFAULT_TIMEOUT):
+    """Run fn(job, *args) on the shared LLM executor and return the LLMJob handle
+
+    fn receives its own handle so it can publish job.partial as output streams in.
+    """
+    job = LLMJob(page, timeout)
+    job.future = _executor.submit(fn, job, *args)
+    return job
+
+
+def cancel_other_pages(jobs, current_page):
+    """Cancel and forget jobs that belong to a page the student has left"""
+    for name in [n for n, job in jobs.items() if job.page != current_page]:
+        jobs.pop(name).cancel()
+
+
+def has_pending(jobs):
+    return any(job.poll() == PENDING for job in jobs.values())
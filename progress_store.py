@@ -0,0 +1,250 @@
+import os
+import queue
+import sqlite3
+import threading
+
+DB_PATH = os.environ.get('CLUETOSOLVE_DB', 'progress.db')
+
+# Write-behind tuning: max statements per transaction, and how long the
+# writer keeps collecting after the first queued write
+BATCH_SIZE = 256
+BATCH_WINDOW = 0.2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress (
+    student_id TEXT PRIMARY KEY,
+    chapter TEXT,
+    subtopic TEXT,
+    current_page TEXT,
+    current_difficulty TEXT,
+    basic_completed INTEGER NOT NULL DEFAULT 0,
+    intermediate_completed INTEGER NOT NULL DEFAULT 0,
+    advanced_completed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS responses (
+    student_id TEXT NOT NULL,
+    chapter TEXT NOT NULL,
+    subtopic TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    topic TEXT,
+    selected_option TEXT,
+    selected_text TEXT,
+    correct_option TEXT,
+    is_correct INTEGER NOT NULL,
+    time_spent REAL NOT NULL,
+    PRIMARY KEY (student_id, chapter, subtopic, difficulty, question_id)
+);
+CREATE INDEX IF NOT EXISTS responses_seq ON responses (seq);
+CREATE TABLE IF NOT EXISTS item_ratings (
+    chapter TEXT NOT NULL,
+    subtopic TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    rating REAL NOT NULL,
+    answers INTEGER NOT NULL,
+    PRIMARY KEY (chapter, subtopic, difficulty, question_id)
+);
+"""
+
+UPSERT_PROGRESS = """
+INSERT INTO progress (student_id, chapter, subtopic, current_page, current_difficulty,
+                      basic_completed, intermediate_completed, advanced_completed)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (student_id) DO UPDATE SET
+    chapter = excluded.chapter,
+    subtopic = excluded.subtopic,
+    current_page = excluded.current_page,
+    current_difficulty = excluded.current_difficulty,
+    basic_completed = excluded.basic_completed,
+    intermediate_completed = excluded.intermediate_completed,
+    advanced_completed = excluded.advanced_completed
+"""
+
+# seq is assigned by the database inside the writing transaction, so answers
+# saved by different worker processes still line up in commit order. A
+# re-submitted answer keeps its original seq, i.e. its place in the history
+UPSERT_RESPONSE = """
+INSERT INTO responses (student_id, chapter, subtopic, difficulty, question_id, seq, topic,
+                       selected_option, selected_text, correct_option, is_correct, time_spent)
+VALUES (?, ?, ?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM responses), ?, ?, ?, ?, ?, ?)
+ON CONFLICT (student_id, chapter, subtopic, difficulty, question_id) DO UPDATE SET
+    topic = excluded.topic,
+    selected_option = excluded.selected_option,
+    selected_text = excluded.selected_text,
+    correct_option = excluded.correct_option,
+    is_correct = excluded.is_correct,
+    time_spent = excluded.time_spent
+"""
+
+# Ratings are stored as accumulated deltas, so workers learning in parallel
+# add up instead of overwriting each other
+ADD_ITEM_RATING = """
+INSERT INTO item_ratings (chapter, subtopic, difficulty, question_id, rating, answers)
+VALUES (:chapter, :subtopic, :difficulty, :question_id, :prior + :delta, 1)
+ON CONFLICT (chapter, subtopic, difficulty, question_id) DO UPDATE SET
+    rating = rating + :delta,
+    answers = answers + 1
+"""
+
+DELETE_RESPONSES = "DELETE FROM responses WHERE student_id = ? AND chapter = ? AND subtopic = ?"
+
+# Progress row plus the current investigation's answers, served by the two primary keys
+LOAD = """
+SELECT p.chapter, p.subtopic, p.current_page, p.current_difficulty,
+       p.basic_completed, p.intermediate_completed, p.advanced_completed,
+       r.difficulty, r.question_id, r.topic, r.selected_option, r.selected_text,
+       r.correct_option, r.is_correct, r.time_spent
+FROM progress p
+LEFT JOIN responses r
+    ON r.student_id = p.student_id AND r.chapter = p.chapter AND r.subtopic = p.subtopic
+WHERE p.student_id = ?
+ORDER BY r.seq
+"""
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ProgressStore:
+    """SQLite (WAL) store for answers and progress flags with a write-behind queue.
+
+    Writers only enqueue statements; a daemon thread applies them in batched
+    transactions so the quiz never waits on disk.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._queue = queue.Queue()
+        self._local = threading.local()
+
+        conn = _connect(path)
+        conn.executescript(SCHEMA)
+        conn.close()
+
+        self._writer = threading.Thread(target=self._run_writer, name='progress-writer', daemon=True)
+        self._writer.start()
+
+    def _reader(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = _connect(self.path)
+        return conn
+
+    def _run_writer(self):
+        conn = _connect(self.path)
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < BATCH_SIZE:
+                    batch.append(self._queue.get(timeout=BATCH_WINDOW))
+            except queue.Empty:
+                pass
+
+            try:
+                with conn:
+                    for sql, params in batch:
+                        conn.execute(sql, params)
+            except sqlite3.Error:
+                # One bad row must not lose the whole batch
+                for sql, params in batch:
+                    try:
+                        with conn:
+                            conn.execute(sql, params)
+                    except sqlite3.Error:
+                        pass
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def save_progress(self, student_id, chapter, subtopic, current_page, current_difficulty,
+                      basic_completed, intermediate_completed, advanced_completed):
+        self._queue.put((UPSERT_PROGRESS, (
+            student_id, chapter, subtopic, current_page, current_difficulty,
+            int(basic_completed), int(intermediate_completed), int(advanced_completed)
+        )))
+
+    def save_response(self, student_id, chapter, subtopic, response):
+        self._queue.put((UPSERT_RESPONSE, (
+            student_id, chapter, subtopic, response['difficulty'], response['question_id'],
+            response['topic'], response['selected_option'],
+            response['selected_text'], response['correct_option'],
+            int(response['is_correct']), response['time_spent']
+        )))
+
+    def clear_responses(self, student_id, chapter, subtopic):
+        self._queue.put((DELETE_RESPONSES, (student_id, chapter, subtopic)))
+
+    def add_item_rating(self, chapter, subtopic, difficulty, question_id, prior, delta):
+        """Apply one answer's rating change; prior is the starting rating of a never-rated item"""
+        self._queue.put((ADD_ITEM_RATING, {
+            'chapter': chapter, 'subtopic': subtopic, 'difficulty': difficulty,
+            'question_id': question_id, 'prior': prior, 'delta': delta
+        }))
+
+    def load_item_ratings(self):
+        """{(chapter, subtopic, difficulty, question_id): (rating, answers)} for every rated item"""
+        rows = self._reader().execute(
+            "SELECT chapter, subtopic, difficulty, question_id, rating, answers FROM item_ratings"
+        ).fetchall()
+        return {tuple(row[:4]): (row[4], row[5]) for row in rows}
+
+    def flush(self):
+        """Block until every queued write is committed"""
+        self._queue.join()
+
+    def load(self, student_id):
+        """Progress and ordered responses for a student, or None if unknown"""
+        rows = self._reader().execute(LOAD, (student_id,)).fetchall()
+        if not rows:
+            return None
+
+        chapter, subtopic, page, difficulty, basic, inter, advanced = rows[0][:7]
+        responses = []
+        for row in rows:
+            if row[7] is None:
+                continue
+            responses.append({
+                'question_id': row[8],
+                'subtopic': subtopic,
+                'difficulty': row[7],
+                'topic': row[9],
+                'selected_option': row[10],
+                'selected_text': row[11],
+                'correct_option': row[12],
+                'is_correct': bool(row[13]),
+                'time_spent': row[14]
+            })
+
+        return {
+            'current_chapter': chapter,
+            'current_subtopic': subtopic,
+            'current_page': page,
+            'current_difficulty': difficulty,
+            'basic_completed': bool(basic),
+            'intermediate_completed': bool(inter),
+            'advanced_completed': bool(advanced),
+            'responses': responses
+        }
+
+
+_store = None
+_lock = threading.Lock()
+
+
+def get_progress_store():
+    """Process-wide store; None if the database can't be opened"""
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                try:
+                    _store = ProgressStore()
+                except sqlite3.Error:
+                    return None
+    return _store
@@ -0,0 +1,325 @@
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from types import MappingProxyType
+
+from question_pack import PACK_FILE, open_pack
+
+CHAPTERS_FILE = '1.json'
+
+# Written by tag_concepts.py; optional
+CONCEPT_TAGS_FILE = 'concept_tags.json'
+CONCEPT_TAGS_VERSION = 1
+
+# How often (seconds) source files are stat()ed to detect edits
+RELOAD_CHECK_INTERVAL = 2.0
+
+DIFFICULTIES = ('basic', 'intermediate', 'advanced')
+OPTION_LABELS = 'ABCDEFGH'
+
+
+class QuestionSchemaError(Exception):
+    """A questions file doesn't match the expected schema"""
+
+
+def _freeze(value):
+    """Recursively turn parsed JSON into read-only mappings and tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _title(key):
+    return key.replace('_', ' ').title()
+
+
+def question_key(chapter, subtopic, difficulty, question_id):
+    return f"{chapter}|{subtopic}|{difficulty}|{question_id}"
+
+
+def text_checksum(text):
+    return zlib.crc32(text.encode('utf-8'))
+
+
+class Question:
+    """One validated question, normalised so rendering is plain field access.
+
+    options maps label -> text whatever the source layout (dict or list);
+    steps and evidence are (title, text) pairs ready for display. concepts
+    come from concept_tags.json and topic is the primary one unless the
+    question sets its own.
+    """
+
+    __slots__ = ('id', 'difficulty', 'text', 'topic', 'concepts', 'option_labels', 'option_texts', 'options',
+                 'correct_label', 'correct_text', 'correct_display', 'explanation', 'steps',
+                 'case_number', 'case_title', 'case_status', 'case_file', 'evidence')
+
+    def __repr__(self):
+        return f"Question(id={self.id!r}, difficulty={self.difficulty!r})"
+
+
+def compile_question(raw, source):
+    """Validate a question from a *_questions.json file and build its Question record"""
+    def fail(message):
+        raise QuestionSchemaError(f"{source}, question {raw.get('id', '?') if isinstance(raw, dict) else '?'}: {message}")
+
+    if not isinstance(raw, dict):
+        fail("expected an object")
+
+    q = Question()
+    q.id = raw.get('id')
+    if not isinstance(q.id, int) or isinstance(q.id, bool):
+        fail("'id' must be an integer")
+    q.difficulty = raw.get('difficulty_level')
+    if q.difficulty not in DIFFICULTIES:
+        fail(f"'difficulty_level' must be one of {', '.join(DIFFICULTIES)}")
+    q.text = raw.get('question')
+    if not isinstance(q.text, str) or not q.text.strip():
+        fail("'question' must be a non-empty string")
+    q.topic = raw.get('topic', '')
+    if not isinstance(q.topic, str):
+        fail("'topic' must be a string")
+    q.concepts = (q.topic,) if q.topic else ()
+
+    options = raw.get('options')
+    if isinstance(options, dict):
+        labels, texts = tuple(options.keys()), tuple(options.values())
+    elif isinstance(options, list) and len(options) <= len(OPTION_LABELS):
+        labels, texts = tuple(OPTION_LABELS[:len(options)]), tuple(options)
+    else:
+        fail("'options' must be an object or a list of at most 8 strings")
+    if len(labels) < 2 or not all(isinstance(t, str) and t for t in texts):
+        fail("'options' needs at least two non-empty option strings")
+    q.option_labels, q.option_texts = labels, texts
+    q.options = MappingProxyType(dict(zip(labels, texts)))
+
+    answer = raw.get('answer')
+    if not isinstance(answer, dict):
+        fail("'answer' must be an object")
+    # Most files nest correct_option in answer; some keep it at the top level
+    q.correct_label = answer.get('correct_option') or raw.get('correct_option')
+    if q.correct_label not in q.options:
+        fail(f"correct option {q.correct_label!r} is not one of {', '.join(labels)}")
+    q.correct_text = q.options[q.correct_label]
+    q.correct_display = f"{q.correct_label}. {q.correct_text}"
+
+    q.explanation = answer.get('explanation', '')
+    if not isinstance(q.explanation, str):
+        fail("'answer.explanation' must be a string")
+    steps = answer.get('steps') or {}
+    if isinstance(steps, dict):
+        q.steps = tuple((_title(k), v) for k, v in steps.items())
+    elif isinstance(steps, list):
+        q.steps = tuple((f"Step {i}", v) for i, v in enumerate(steps, 1))
+    else:
+        fail("'answer.steps' must be an object or a list")
+    if not all(isinstance(text, str) for _, text in q.steps):
+        fail("every step must be a string")
+
+    q.case_number = raw.get('case_number', '')
+    q.case_title = raw.get('case_title', '')
+    q.case_status = answer.get('case_status', '')
+    case_file = raw.get('case_file') or {}
+    if not isinstance(case_file, dict):
+        fail("'case_file' must be an object")
+    q.case_file = _freeze(case_file)
+    evidence = case_file.get('evidence_found') or {}
+    if not isinstance(evidence, dict):
+        fail("'case_file.evidence_found' must be an object")
+    q.evidence = tuple((_title(k), v) for k, v in evidence.items())
+    return q
+
+
+def _strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            yield from _strings(item)
+    elif hasattr(value, 'values'):
+        for item in value.values():
+            yield from _strings(item)
+
+
+def question_text(question):
+    """All of a question's prose - text, worked answer and case file, but not its options - for tagging and search"""
+    parts = [question.text, question.explanation, question.case_title]
+    parts.extend(text for _, text in question.steps)
+    parts.extend(_strings(question.case_file))
+    return '\n'.join(parts)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class QuestionBank:
+    """Immutable snapshot of 1.json and every referenced questions file.
+
+    Raises QuestionSchemaError if any question is malformed, so bad data is
+    caught when the bank is built rather than when a student reaches it.
+    Source files are read from questions.pack (see build_pack.py) when it
+    holds an up-to-date copy of them, and parsed as JSON otherwise.
+    """
+
+    def __init__(self, base_dir='.', use_pack=True):
+        self.base_dir = base_dir
+        self.mtimes = {}
+        self.pack_hits = 0
+        self.chapters = MappingProxyType({})
+        # (chapter, subtopic) -> tuple of questions in file order
+        self.by_subtopic = {}
+        # (chapter, subtopic, difficulty) -> tuple of questions in file order
+        self.by_difficulty = {}
+        # (chapter, subtopic, difficulty, id) -> question
+        self.by_key = {}
+        # concept -> tuple of (chapter, subtopic, difficulty, id)
+        self.by_concept = {}
+        self._pack = open_pack(self._path(PACK_FILE)) if use_pack else None
+        try:
+            self._load()
+        finally:
+            if self._pack is not None:
+                self._pack.close()
+                self._pack = None
+
+    def _path(self, name):
+        return os.path.join(self.base_dir, name)
+
+    def _read_json(self, name):
+        path = self._path(name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.mtimes[path] = None
+            raise
+        self.mtimes[path] = st.st_mtime_ns
+
+        if self._pack is not None:
+            document = self._pack.get(name, st.st_mtime_ns, st.st_size)
+            if document is not None:
+                self.pack_hits += 1
+                return document
+
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def sources(self):
+        """Parsed JSON of 1.json, every questions file it references and the concept tags, for build_pack.py"""
+        documents = {CHAPTERS_FILE: self._read_json(CHAPTERS_FILE)}
+        for chapter_data in documents[CHAPTERS_FILE]['chapters'].values():
+            for subtopic_data in chapter_data.get('subtopics', {}).values():
+                name = subtopic_data['questions_file']
+                documents[name] = self._read_json(name)
+        try:
+            documents[CONCEPT_TAGS_FILE] = self._read_json(CONCEPT_TAGS_FILE)
+        except (OSError, ValueError):
+            pass
+        return documents
+
+    def _read_tags(self):
+        """{question_key: tag entry} from concept_tags.json, or {} if it is missing or outdated"""
+        try:
+            tags = self._read_json(CONCEPT_TAGS_FILE)
+            if tags.get('version') == CONCEPT_TAGS_VERSION:
+                return tags['questions']
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+        return {}
+
+    def _load(self):
+        try:
+            chapters = self._read_json(CHAPTERS_FILE)['chapters']
+        except (OSError, ValueError, KeyError):
+            return
+        tags = self._read_tags()
+
+        for chapter, chapter_data in chapters.items():
+            for subtopic, subtopic_data in chapter_data.get('subtopics', {}).items():
+                source = subtopic_data.get('questions_file', '?')
+                try:
+                    document = self._read_json(source)
+                    raw_questions = document['questions']
+                except (OSError, ValueError, KeyError):
+                    document, raw_questions = {}, []
+                if not isinstance(raw_questions, list):
+                    raise QuestionSchemaError(f"{source}: 'questions' must be a list")
+                # Untagged questions still get a concept: their file's topic
+                default_concept = document.get('topic') or subtopic
+
+                questions = tuple(compile_question(raw, source) for raw in raw_questions)
+                self.by_subtopic[(chapter, subtopic)] = questions
+                for q in questions:
+                    key = (chapter, subtopic, q.difficulty, q.id)
+                    if key in self.by_key:
+                        raise QuestionSchemaError(f"{source}, question {q.id}: duplicate {q.difficulty} id")
+                    self.by_key[key] = q
+                    self.by_difficulty.setdefault((chapter, subtopic, q.difficulty), []).append(q)
+
+                    entry = tags.get(question_key(*key))
+                    # Tags for since-edited text are stale: ignore them until tag_concepts.py is re-run
+                    if entry and entry.get('text_crc') == text_checksum(q.text) and entry.get('concepts'):
+                        q.concepts = tuple(dict.fromkeys((*q.concepts, *entry['concepts'])))
+                    if not q.concepts:
+                        q.concepts = (default_concept,)
+                    q.topic = q.topic or q.concepts[0]
+                    for concept in q.concepts:
+                        self.by_concept.setdefault(concept, []).append(key)
+
+        self.by_difficulty = {k: tuple(v) for k, v in self.by_difficulty.items()}
+        self.by_concept = {k: tuple(v) for k, v in self.by_concept.items()}
+        self.chapters = _freeze(chapters)
+
+    def is_stale(self):
+        """True if any source file changed on disk since this snapshot was built"""
+        return any(_mtime(path) != mtime for path, mtime in self.mtimes.items())
+
+    def questions(self, chapter, subtopic, difficulty=None):
+        if difficulty is None:
+            return self.by_subtopic.get((chapter, subtopic), ())
+        return self.by_difficulty.get((chapter, subtopic, difficulty), ())
+
+    def get(self, chapter, subtopic, difficulty, question_id):
+        return self.by_key.get((chapter, subtopic, difficulty, question_id))
+
+    def with_concept(self, concept):
+        """Keys (chapter, subtopic, difficulty, id) of every question tagged with concept"""
+        return self.by_concept.get(concept, ())
+
+
+_bank = None
+_last_check = 0.0
+_lock = threading.Lock()
+
+
+def get_question_bank(base_dir='.'):
+    """Return the process-wide question bank, rebuilding it if a source file changed"""
+    global _bank, _last_check
+
+    now = time.monotonic()
+    bank = _bank
+    if bank is not None and now - _last_check < RELOAD_CHECK_INTERVAL:
+        return bank
+
+    with _lock:
+        if _bank is None or _bank.base_dir != base_dir:
+            # At startup bad data fails fast
+            _bank = QuestionBank(base_dir)
+        elif _bank.is_stale():
+            try:
+                _bank = QuestionBank(base_dir)
+            except QuestionSchemaError as e:
+                # A bad edit while running: keep serving the last good bank, and
+                # don't re-parse until the files change again
+                print(f"question data reload failed, keeping the previous version: {e}", file=sys.stderr)
+                _bank.mtimes = {path: _mtime(path) for path in _bank.mtimes}
+        _last_check = now
+        return _bank
@@ -0,0 +1,118 @@
+import json
+import os
+import sys
+import threading
+
+from lazy_imports import lazy_import
+from question_bank import get_question_bank, text_checksum
+
+np = lazy_import('numpy')
+
+# Written by build_embeddings.py; optional
+VECTORS_FILE = 'question_vectors.npy'
+VECTORS_META = 'question_vectors.json'
+INDEX_VERSION = 1
+
+
+class SimilarityIndex:
+    """Nearest-neighbour search over question vectors memory-mapped from question_vectors.npy.
+
+    Rows are L2-normalised float32, so cosine similarity is a dot product;
+    a query scores every candidate in one matrix-vector product and takes
+    the top k with argpartition. Keys are (chapter, subtopic, difficulty,
+    id), as in QuestionBank.by_key.
+    """
+
+    def __init__(self, vectors, keys, model=''):
+        self.vectors = vectors
+        self.keys = keys
+        self.model = model
+        self.rows = {key: i for i, key in enumerate(keys) if key is not None}
+        self.live_rows = np.fromiter(self.rows.values(), dtype=np.intp, count=len(self.rows))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def similar(self, query, candidates=None, k=3):
+        """[(key, cosine)] of the k candidates nearest the query, best first.
+
+        query is a key or a list of keys (their mean direction is searched);
+        candidates defaults to every indexed question. Query keys are never
+        returned, and keys missing from the index are ignored.
+        """
+        queries = [query] if isinstance(query, tuple) else query
+        query_rows = [self.rows[key] for key in queries if key in self.rows]
+        if not query_rows:
+            return []
+        if len(query_rows) == 1:
+            vector = self.vectors[query_rows[0]]
+        else:
+            vector = self.vectors[query_rows].sum(axis=0)
+
+        excluded = set(query_rows)
+        if candidates is None:
+            rows = self.live_rows[~np.isin(self.live_rows, query_rows)]
+        else:
+            rows = np.fromiter(
+                (row for row in (self.rows.get(key) for key in candidates) if row is not None and row not in excluded),
+                dtype=np.intp
+            )
+        if not rows.size:
+            return []
+
+        scores = self.vectors[rows] @ vector
+        if len(query_rows) > 1:
+            scores /= max(float(np.linalg.norm(vector)), 1e-12)
+        top = np.argpartition(-scores, k - 1)[:k] if rows.size > k else np.arange(rows.size)
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.keys[rows[i]], float(scores[i])) for i in top]
+
+
+def load_index(bank, base_dir='.'):
+    """The index for bank, or None if it hasn't been built or numpy is missing.
+
+    Rows whose question text changed since the build are dropped, so a stale
+    index degrades to fewer neighbours rather than wrong ones.
+    """
+    try:
+        with open(os.path.join(base_dir, VECTORS_META), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != INDEX_VERSION:
+            return None
+        vectors = np.load(os.path.join(base_dir, VECTORS_FILE), mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    except ImportError as e:
+        print(f"similarity index disabled: {e}", file=sys.stderr)
+        return None
+    if vectors.ndim != 2 or vectors.shape[0] != len(meta['keys']):
+        return None
+
+    keys = []
+    for (chapter, subtopic, difficulty, question_id), crc in zip(meta['keys'], meta['text_crc']):
+        key = (chapter, subtopic, difficulty, question_id)
+        question = bank.by_key.get(key)
+        # None keeps the row's position but makes it unreachable
+        keys.append(key if question is not None and text_checksum(question.text) == crc else None)
+    return SimilarityIndex(vectors, keys, meta.get('model', ''))
+
+
+_index = None
+_index_bank = None
+_index_lock = threading.Lock()
+
+
+def get_similarity_index():
+    """Process-wide index, reloaded with the question bank; None when unavailable"""
+    global _index, _index_bank
+    bank = get_question_bank()
+    if _index_bank is bank:
+        return _index
+    with _index_lock:
+        if _index_bank is not bank:
+            _index = load_index(bank, bank.base_dir)
+            _index_bank = bank
+        return _index
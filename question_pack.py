@@ -0,0 +1,84 @@
+import marshal
+import mmap
+import os
+import struct
+import sys
+
+PACK_FILE = 'questions.pack'
+PACK_VERSION = 1
+
+# magic, pack version, Python major/minor (marshal's format is version-specific), index length
+HEADER = struct.Struct('<8sHBBI')
+MAGIC = b'CTSPACK\x00'
+
+
+def build_pack(sources, base_dir='.', output=PACK_FILE):
+    """Write the parsed JSON of every source file into one pack; returns its size in bytes.
+
+    sources maps a file name (relative to base_dir) to its parsed JSON. Each
+    entry is stored with the source's mtime and size, so a later edit to
+    that file makes its entry stale.
+    """
+    blobs, index = [], {}
+    offset = 0
+    for name, document in sources.items():
+        st = os.stat(os.path.join(base_dir, name))
+        blob = marshal.dumps(document)
+        index[name] = (st.st_mtime_ns, st.st_size, offset, len(blob))
+        blobs.append(blob)
+        offset += len(blob)
+
+    index_blob = marshal.dumps(index)
+    header = HEADER.pack(MAGIC, PACK_VERSION, sys.version_info[0], sys.version_info[1], len(index_blob))
+    path = os.path.join(base_dir, output)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(header)
+        f.write(index_blob)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, path)
+    return HEADER.size + len(index_blob) + offset
+
+
+class QuestionPack:
+    """Read-only view of a pack written by build_pack(), memory-mapped.
+
+    The pack is a local build artifact and is trusted like the code itself:
+    marshal must never be fed files from elsewhere.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, major, minor, index_len = HEADER.unpack_from(self._map, 0)
+            if (magic, version, (major, minor)) != (MAGIC, PACK_VERSION, sys.version_info[:2]):
+                raise ValueError(f"{path} was built for another pack or Python version")
+            self._base = HEADER.size + index_len
+            self.index = self._loads(HEADER.size, index_len)
+        except Exception:
+            self._map.close()
+            raise
+
+    def _loads(self, start, length):
+        with memoryview(self._map) as view, view[start:start + length] as blob:
+            return marshal.loads(blob)
+
+    def get(self, name, mtime_ns, size):
+        """Parsed JSON for a source file, or None if the pack lacks it or it changed since"""
+        entry = self.index.get(name)
+        if entry is None or entry[0] != mtime_ns or entry[1] != size:
+            return None
+        return self._loads(self._base + entry[2], entry[3])
+
+    def close(self):
+        self._map.close()
+
+
+def open_pack(path):
+    """The pack at path, or None if it is missing or unreadable (the caller reads JSON instead)"""
+    try:
+        return QuestionPack(path)
+    except (OSError, ValueError, EOFError, TypeError, struct.error):
+        return None
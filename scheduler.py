@@ -0,0 +1,165 @@
+import math
+import threading
+import time
+
+from progress_store import get_progress_store
+from question_bank import get_question_bank
+
+# Questions per level in one investigation
+QUOTAS = {'basic': 4, 'intermediate': 3, 'advanced': 1}
+
+# Starting item rating by authored level, on the logistic (logit) scale
+LEVEL_PRIOR = {'basic': -1.0, 'intermediate': 0.0, 'advanced': 1.0}
+
+# Aim for questions the student answers correctly this often
+TARGET_SUCCESS = 0.7
+TARGET_OFFSET = math.log(TARGET_SUCCESS / (1 - TARGET_SUCCESS))
+
+# Elo step sizes; an item's step shrinks as evidence about it accumulates
+K_STUDENT = 0.4
+K_ITEM = 0.3
+ITEM_SETTLE = 20
+
+BUCKET_WIDTH = 0.25
+
+# Seconds between reloads of the shared ratings, which other workers also update
+RATINGS_REFRESH = 60.0
+
+
+def expected(ability, rating):
+    """Probability that a student of this ability answers an item of this rating correctly"""
+    return 1.0 / (1.0 + math.exp(rating - ability))
+
+
+def _bucket(rating):
+    return math.floor(rating / BUCKET_WIDTH)
+
+
+class ItemModel:
+    """Elo item ratings learned from every student's answers, indexed by rating bucket.
+
+    Each (chapter, subtopic, level) keeps {bucket: {question ids}}, so picking
+    the question nearest a target rating only looks at the target bucket and
+    its neighbours rather than scanning the level.
+    """
+
+    def __init__(self, bank, stored=None):
+        self.bank = bank
+        stored = stored or {}
+        # (chapter, subtopic, difficulty, id) -> [rating, answers]
+        self.ratings = {}
+        # (chapter, subtopic, difficulty) -> {bucket: set of ids}
+        self.buckets = {}
+        self._lock = threading.Lock()
+        for key in bank.by_key:
+            rating, answers = stored.get(key, (LEVEL_PRIOR[key[2]], 0))
+            self.ratings[key] = [rating, answers]
+            self.buckets.setdefault(key[:3], {}).setdefault(_bucket(rating), set()).add(key[3])
+
+    def rating(self, chapter, subtopic, difficulty, question_id):
+        entry = self.ratings.get((chapter, subtopic, difficulty, question_id))
+        return entry[0] if entry else LEVEL_PRIOR[difficulty]
+
+    def record(self, chapter, subtopic, difficulty, question_id, is_correct, ability):
+        """Update the item's rating from one answer and return the student's new ability"""
+        key = (chapter, subtopic, difficulty, question_id)
+        with self._lock:
+            entry = self.ratings.get(key)
+            if entry is None:
+                return ability
+            surprise = (1.0 if is_correct else 0.0) - expected(ability, entry[0])
+            delta = -K_ITEM / (1 + entry[1] / ITEM_SETTLE) * surprise
+            self._set(key, entry[0] + delta, entry[1] + 1)
+
+        store = get_progress_store()
+        if store:
+            store.add_item_rating(chapter, subtopic, difficulty, question_id, LEVEL_PRIOR[difficulty], delta)
+        return ability + K_STUDENT * surprise
+
+    def _set(self, key, rating, answers):
+        """Store an item's rating, moving it between buckets if needed (caller holds the lock)"""
+        entry = self.ratings[key]
+        old_bucket, new_bucket = _bucket(entry[0]), _bucket(rating)
+        entry[0], entry[1] = rating, answers
+        if new_bucket != old_bucket:
+            level = self.buckets[key[:3]]
+            level[old_bucket].discard(key[3])
+            if not level[old_bucket]:
+                del level[old_bucket]
+            level.setdefault(new_bucket, set()).add(key[3])
+
+    def refresh(self, stored):
+        """Adopt ratings saved by every worker, {key: (rating, answers)}"""
+        with self._lock:
+            for key, (rating, answers) in stored.items():
+                if key in self.ratings:
+                    self._set(key, rating, answers)
+
+    def replay(self, chapter, subtopic, responses, ability=0.0):
+        """Ability implied by earlier answers under the current item ratings (no item updates)"""
+        for r in responses:
+            rating = self.rating(chapter, subtopic, r['difficulty'], r['question_id'])
+            ability += K_STUDENT * ((1.0 if r['is_correct'] else 0.0) - expected(ability, rating))
+        return ability
+
+    def pick(self, chapter, subtopic, difficulty, ability, exclude=()):
+        """Id of the question whose rating is nearest the student's target, skipping exclude; None if none left"""
+        target = ability - TARGET_OFFSET
+        with self._lock:
+            level = self.buckets.get((chapter, subtopic, difficulty))
+            if not level:
+                return None
+            center = _bucket(target)
+            reach = max(abs(b - center) for b in level)
+
+            def ring(distance):
+                return [qid for b in {center - distance, center + distance}
+                        for qid in level.get(b, ()) if qid not in exclude]
+
+            for distance in range(reach + 1):
+                candidates = ring(distance)
+                if candidates:
+                    # Ring d lies within d + 1 bucket widths of the target and ring
+                    # d + 1 at least d away, so the nearest item is in one of the two
+                    candidates += ring(distance + 1)
+                    # Nearest in rating; ties go to the least-answered item, so equal
+                    # priors still rotate through the bank, then to the lowest id
+                    def closeness(qid):
+                        rating, answers = self.ratings[(chapter, subtopic, difficulty, qid)]
+                        return abs(rating - target), answers, qid
+                    return min(candidates, key=closeness)
+        return None
+
+
+_model = None
+_model_loaded = 0.0
+_model_lock = threading.Lock()
+
+
+def get_item_model():
+    """Process-wide model, rebuilt when the question bank reloads and refreshed
+    every RATINGS_REFRESH seconds with the ratings all workers have saved"""
+    global _model, _model_loaded
+    bank = get_question_bank()
+    now = time.monotonic()
+    model = _model
+    if model is not None and model.bank is bank and now - _model_loaded < RATINGS_REFRESH:
+        return model
+    with _model_lock:
+        if _model is not None and _model.bank is bank and now - _model_loaded < RATINGS_REFRESH:
+            return _model
+        store = get_progress_store()
+        if store:
+            stored = store.load_item_ratings()
+        else:
+            stored = {key: tuple(entry) for key, entry in _model.ratings.items()} if _model else {}
+        if _model is None or _model.bank is not bank:
+            _model = ItemModel(bank, stored)
+        else:
+            _model.refresh(stored)
+        _model_loaded = now
+        return _model
+
+
+def level_size(chapter, subtopic, difficulty):
+    return min(QUOTAS[difficulty], len(get_question_bank().questions(chapter, subtopic, difficulty)))
@@ -0,0 +1,196 @@
+import atexit
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+
+# Seconds without a rerun before a session's state is spilled to disk
+IDLE_TIMEOUT = float(os.environ.get('CLUETOSOLVE_IDLE_TIMEOUT', '900'))
+# Seconds without a rerun before a session is forgotten altogether
+SESSION_TTL = float(os.environ.get('CLUETOSOLVE_SESSION_TTL', '86400'))
+SPILL_DIR = os.environ.get('CLUETOSOLVE_SPILL_DIR')
+
+
+class SessionSlot:
+    __slots__ = ('value', 'last_access', 'spilled')
+
+    def __init__(self, value):
+        self.value = value
+        self.last_access = time.monotonic()
+        self.spilled = False
+
+
+class SessionManager:
+    """Process-level home for each student's heavy session state.
+
+    st.session_state keeps only the student id; the object itself (the
+    response ledger) lives here. A sweeper thread pickles slots that have
+    been idle for idle_timeout seconds to spill_dir and drops them from
+    memory; the next get() loads them back. Memory therefore follows the
+    number of active students, not the number of open tabs. Slots idle for
+    ttl seconds are forgotten along with their spill file (callers rebuild
+    from the progress store), as are spill files left behind by earlier
+    processes sharing spill_dir.
+    """
+
+    def __init__(self, idle_timeout=IDLE_TIMEOUT, spill_dir=SPILL_DIR, ttl=SESSION_TTL):
+        self.idle_timeout = idle_timeout
+        self.ttl = ttl
+        if spill_dir:
+            self.spill_dir = spill_dir
+            os.makedirs(self.spill_dir, exist_ok=True)
+        else:
+            # A private directory by default: spill files are unpickled on restore
+            self.spill_dir = tempfile.mkdtemp(prefix='cluetosolve-sessions-')
+            atexit.register(shutil.rmtree, self.spill_dir, True)
+        self.spills = 0
+        self.restores = 0
+        self.expired = 0
+        self._slots = {}
+        self._lock = threading.Lock()
+        self._sweeper = None
+
+    def _spill_path(self, student_id):
+        # Named by a hash so no student id can point outside spill_dir
+        digest = hashlib.sha256(student_id.encode('utf-8')).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.pkl")
+
+    def put(self, student_id, value):
+        with self._lock:
+            slot = self._slots.get(student_id)
+            if slot is not None and slot.spilled:
+                self._remove_spill(student_id)
+            self._slots[student_id] = SessionSlot(value)
+        self._start_sweeper()
+
+    def get(self, student_id):
+        """The student's state, loading it back from disk if it was spilled; None if unknown"""
+        with self._lock:
+            slot = self._slots.get(student_id)
+            if slot is None:
+                return None
+            slot.last_access = time.monotonic()
+            if slot.spilled:
+                try:
+                    with open(self._spill_path(student_id), 'rb') as f:
+                        slot.value = pickle.load(f)
+                except (OSError, pickle.UnpicklingError, EOFError):
+                    # Lost spill file: callers rebuild from the progress store
+                    del self._slots[student_id]
+                    return None
+                slot.spilled = False
+                self._remove_spill(student_id)
+                self.restores += 1
+            return slot.value
+
+    def discard(self, student_id):
+        with self._lock:
+            slot = self._slots.pop(student_id, None)
+            if slot is not None and slot.spilled:
+                self._remove_spill(student_id)
+
+    def _remove_spill(self, student_id):
+        try:
+            os.remove(self._spill_path(student_id))
+        except OSError:
+            pass
+
+    def sweep(self, now=None):
+        """Spill every slot idle for longer than idle_timeout and expire those idle past ttl.
+
+        Returns how many were spilled.
+        """
+        now = time.monotonic() if now is None else now
+        spilled = 0
+        with self._lock:
+            expired = [student_id for student_id, slot in self._slots.items() if now - slot.last_access >= self.ttl]
+            for student_id in expired:
+                if self._slots.pop(student_id).spilled:
+                    self._remove_spill(student_id)
+            self.expired += len(expired)
+
+            for student_id, slot in self._slots.items():
+                if slot.spilled or now - slot.last_access < self.idle_timeout:
+                    continue
+                path = self._spill_path(student_id)
+                try:
+                    with open(path + '.tmp', 'wb') as f:
+                        pickle.dump(slot.value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    os.replace(path + '.tmp', path)
+                except OSError:
+                    continue
+                slot.value = None
+                slot.spilled = True
+                spilled += 1
+            self.spills += spilled
+        return spilled
+
+    def prune_spill_dir(self):
+        """Delete spill files untouched for ttl seconds, e.g. from a previous run of the app"""
+        cutoff = time.time() - self.ttl
+        try:
+            entries = list(os.scandir(self.spill_dir))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.name.endswith(('.pkl', '.pkl.tmp')) and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def _start_sweeper(self):
+        if self._sweeper is not None or self.idle_timeout <= 0:
+            return
+        with self._lock:
+            if self._sweeper is None:
+                self._sweeper = threading.Thread(target=self._sweep_loop, name='session-sweeper', daemon=True)
+                self._sweeper.start()
+
+    def _sweep_loop(self):
+        interval = max(1.0, min(60.0, self.idle_timeout / 4))
+        self.prune_spill_dir()
+        last_prune = time.monotonic()
+        while True:
+            time.sleep(interval)
+            self.sweep()
+            if time.monotonic() - last_prune >= 3600:
+                self.prune_spill_dir()
+                last_prune = time.monotonic()
+
+    @staticmethod
+    def footprint(value):
+        """Approximate size of a session's state in bytes (its pickled size)"""
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def stats(self):
+        """Resident/spilled slot counts and the pickled size of resident state"""
+        with self._lock:
+            resident = [slot.value for slot in self._slots.values() if not slot.spilled]
+            spilled = len(self._slots) - len(resident)
+        resident_bytes = sum(self.footprint(value) for value in resident)
+        return {
+            'resident': len(resident),
+            'spilled': spilled,
+            'resident_bytes': resident_bytes,
+            'bytes_per_resident': resident_bytes / len(resident) if resident else 0.0,
+            'spills': self.spills,
+            'restores': self.restores,
+            'expired': self.expired
+        }
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_session_manager():
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = SessionManager()
+    return _manager
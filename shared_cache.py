@@ -0,0 +1,100 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# Redis takes precedence when both are set; with neither, caches stay per process
+REDIS_URL = os.environ.get('CLUETOSOLVE_REDIS_URL')
+SQLITE_PATH = os.environ.get('CLUETOSOLVE_SHARED_CACHE')
+
+# Expired rows are purged every this many writes
+PURGE_EVERY = 500
+
+
+class RedisCache:
+    """Cache shared by every worker through Redis; values are stored as JSON.
+
+    Any Redis error is treated as a miss, so a lost Redis never breaks a page.
+    """
+
+    def __init__(self, url, namespace, ttl):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self.prefix = f"cluetosolve:{namespace}:"
+        self.ttl = ttl
+
+    def get(self, key):
+        try:
+            value = self.client.get(self.prefix + key)
+        except Exception:
+            return None
+        return None if value is None else json.loads(value)
+
+    def set(self, key, value):
+        try:
+            self.client.set(self.prefix + key, json.dumps(value, ensure_ascii=False), ex=int(self.ttl))
+        except Exception:
+            pass
+
+
+class SQLiteCache:
+    """Cache shared by worker processes on one machine through a WAL-mode SQLite file"""
+
+    def __init__(self, path, namespace, ttl):
+        self.path = path
+        self.namespace = namespace
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        try:
+            row = self._conn().execute(
+                "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires > ?",
+                (self.namespace, key, time.time())
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return None if row is None else json.loads(row[0])
+
+    def set(self, key, value):
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value, ensure_ascii=False), time.time() + self.ttl)
+            )
+            self._writes += 1
+            if self._writes % PURGE_EVERY == 0:
+                conn.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+        except sqlite3.Error:
+            pass
+
+
+def shared_backend(namespace, ttl):
+    """Configured cross-process backend for a namespace, or None to stay process-local"""
+    try:
+        if REDIS_URL:
+            return RedisCache(REDIS_URL, namespace, ttl)
+        if SQLITE_PATH:
+            return SQLiteCache(SQLITE_PATH, namespace, ttl)
+    except (ImportError, sqlite3.Error) as e:
+        print(f"shared cache unavailable, using a per-process cache: {e}", file=sys.stderr)
+    return None
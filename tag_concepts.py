@@ -0,0 +1,109 @@
+"""Tag every question with the concepts it exercises.
+
+Usage:
+    python tag_concepts.py [--output concept_tags.json] [--report]
+
+Matches each question's text, explanation, steps and case file against the
+ordered CONCEPT_RULES below and writes concept_tags.json: per question the
+matched concepts (the first is its primary concept, used as its topic) and
+a checksum of the question text, plus the inverted index concept -> question
+keys. The question bank ignores tags whose checksum no longer matches, so
+re-run after editing question text. --report prints the tags per question.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+from question_bank import (
+    CONCEPT_TAGS_FILE, CONCEPT_TAGS_VERSION, QuestionBank, QuestionSchemaError, question_key, question_text,
+    text_checksum
+)
+
+# (concept, pattern) in priority order: the first match is the primary concept.
+# Patterns run case-insensitively over the question's own text, never its
+# options, so a distractor naming another criterion doesn't tag it.
+CONCEPT_RULES = (
+    # Triangles - similarity
+    ('AA similarity', r'\bAA\b|two angles of one triangle'),
+    ('SAS similarity', r'\bSAS\b|included angle'),
+    ('SSS similarity', r'\bSSS\b|ratios of all three'),
+    ('Altitude on the hypotenuse', r'altitude (on|to) the hypotenuse|[⟂⊥] ?AC'),
+    # Triangles - proportionality
+    ('BPT converse', r'divides two sides|divided in the same|same proportion|(prove|is|check if|verify if) \w+ ?(\|\||∥)'),
+    ('Basic Proportionality Theorem', r'\|\||∥|parallel lines divide'),
+    ('Midpoint theorem', r'midpoint'),
+    ('Shadows and similar triangles', r'casts? [^.]*shadow|shadow of'),
+    ('Areas of similar triangles', r'\bareas?\b'),
+    ('Angle sum property', r'angle[- ]sum|triangle sum'),
+    ('Angle bisector', r'bisects ∠|angle bisector'),
+    ('Parallelogram properties', r'parallelogram'),
+    # Trigonometric identities
+    ('Secant-tangent identity', r'1 ?\+ ?tan²θ|sec²θ ?[-−] ?(tan²θ|1)|sec θ ?[-−+] ?tan θ'),
+    ('Cosecant-cotangent identity', r'1 ?\+ ?cot²θ|cosec²θ ?[-−] ?(cot²θ|1)|cosec θ ?[-−+] ?cot θ'),
+    ('Pythagorean identity', r'sin²θ ?\+ ?cos²θ|1 ?[-−] ?sin²θ|1 ?[-−] ?cos²θ|fundamental identity'),
+    ('Difference of squares', r'difference of squares|\(a ?- ?b\) ?\(a ?\+ ?b\)'),
+    ('Reciprocal and quotient identities', r'(reciprocal|quotient) identit|tan θ ?\+ ?cot θ|1/(sin|cos) ?θ'),
+    ('Rationalisation', r'rationali[sz]e'),
+    ('Expanding squares', r'\(a ?± ?b\)²|expand'),
+    # Heights and distances
+    ('Two observation points', r'two (observing |different )?(points|positions)|advancing|on moving|retreat|longer than when'),
+    ('Angle of depression', r'angles? of depression|look(s|ing)? down'),
+    ('Angle of elevation', r'angles? of elevation|look(s|ing)? up|inclined at \d+° to the horizontal|with the ground level is'),
+    ('Sine ratio', r'sin θ ?= ?(opposite|height)'),
+    ('Cosine ratio', r'cos θ ?= ?adjacent'),
+    ('Tangent ratio', r'tan θ ?= ?(opposite|height)|\btan (30|45|60)°'),
+)
+
+_COMPILED = tuple((concept, re.compile(pattern, re.IGNORECASE)) for concept, pattern in CONCEPT_RULES)
+
+
+def concepts_for(question):
+    text = question_text(question)
+    return [concept for concept, pattern in _COMPILED if pattern.search(text)]
+
+
+def build_tags(bank):
+    questions, index = {}, {}
+    for (chapter, subtopic, difficulty, question_id), question in bank.by_key.items():
+        key = question_key(chapter, subtopic, difficulty, question_id)
+        concepts = concepts_for(question)
+        questions[key] = {'text_crc': text_checksum(question.text), 'concepts': concepts}
+        for concept in concepts:
+            index.setdefault(concept, []).append(key)
+    return {'version': CONCEPT_TAGS_VERSION, 'questions': questions, 'index': index}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tag questions with concepts")
+    parser.add_argument('--base-dir', default='.')
+    parser.add_argument('--output', default=CONCEPT_TAGS_FILE)
+    parser.add_argument('--report', action='store_true', help="print each question's tags")
+    args = parser.parse_args(argv)
+
+    try:
+        bank = QuestionBank(args.base_dir, use_pack=False)
+    except QuestionSchemaError as e:
+        print(f"invalid question data: {e}", file=sys.stderr)
+        return 1
+
+    tags = build_tags(bank)
+    untagged = [key for key, entry in tags['questions'].items() if not entry['concepts']]
+    if args.report:
+        for key, entry in tags['questions'].items():
+            print(f"{key}: {', '.join(entry['concepts']) or '-'}")
+
+    path = os.path.join(args.base_dir, args.output)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(tags, f, ensure_ascii=False, indent=1)
+        f.write('\n')
+    os.replace(tmp, path)
+    print(f"tagged {len(tags['questions'])} questions with {len(tags['index'])} concepts into {args.output}"
+          f" ({len(untagged)} untagged: they fall back to their file's topic)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,367 @@
+import json
+import re
+from functools import lru_cache
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+STYLESHEET = """
+/* Import Google Fonts */
+@import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
+
+* {
+    font-family: 'Inter', sans-serif;
+}
+
+/* Hide Streamlit branding */
+#MainMenu {visibility: hidden;}
+footer {visibility: hidden;}
+.stDeployButton {display: none;}
+
+/* Clean background */
+.main {
+    background-color: #f8fafc;
+}
+
+.block-container {
+    padding: 2rem 3rem;
+    max-width: 1200px;
+}
+
+/* Professional Navigation Bar */
+.nav-bar {
+    background: white;
+    padding: 1rem 2rem;
+    border-bottom: 1px solid #e2e8f0;
+    display: flex;
+    align-items: center;
+    justify-content: space-between;
+    margin: -2rem -3rem 2rem -3rem;
+    box-shadow: 0 1px 3px rgba(0,0,0,0.05);
+}
+
+.nav-left {
+    display: flex;
+    align-items: center;
+    gap: 1rem;
+}
+
+.logo-img {
+    width: 40px;
+    height: 40px;
+    border-radius: 8px;
+}
+
+.app-title {
+    font-size: 1.5rem;
+    font-weight: 700;
+    color: #1e293b;
+    margin: 0;
+}
+
+.nav-right {
+    display: flex;
+    align-items: center;
+    gap: 1rem;
+}
+
+.user-profile {
+    display: flex;
+    align-items: center;
+    gap: 0.75rem;
+    padding: 0.5rem 1rem;
+    background: #f1f5f9;
+    border-radius: 8px;
+}
+
+.user-avatar {
+    width: 36px;
+    height: 36px;
+    border-radius: 50%;
+    border: 2px solid #3b82f6;
+}
+
+.user-name {
+    font-size: 0.95rem;
+    font-weight: 600;
+    color: #334155;
+}
+
+/* Page Header */
+.page-header {
+    background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%);
+    color: white;
+    padding: 2rem;
+    border-radius: 12px;
+    margin-bottom: 2rem;
+    text-align: center;
+    box-shadow: 0 4px 6px rgba(59, 130, 246, 0.1);
+}
+
+.page-header h1 {
+    font-size: 2rem;
+    font-weight: 700;
+    margin: 0 0 0.5rem 0;
+}
+
+.page-header p {
+    font-size: 1rem;
+    margin: 0;
+    opacity: 0.9;
+}
+
+.motto {
+    background: #fef3c7;
+    color: #92400e;
+    padding: 0.75rem 1.5rem;
+    border-radius: 8px;
+    text-align: center;
+    font-weight: 600;
+    margin-bottom: 2rem;
+    border-left: 4px solid #f59e0b;
+}
+
+/* Case Cards */
+.case-card {
+    background: white;
+    border-radius: 12px;
+    padding: 1.5rem;
+    margin-bottom: 1rem;
+    border: 1px solid #e2e8f0;
+    transition: all 0.2s;
+}
+
+.case-card:hover {
+    border-color: #3b82f6;
+    box-shadow: 0 4px 12px rgba(59, 130, 246, 0.1);
+}
+
+.case-title {
+    font-size: 1.1rem;
+    font-weight: 600;
+    color: #1e293b;
+    margin-bottom: 0.5rem;
+}
+
+.case-description {
+    font-size: 0.9rem;
+    color: #64748b;
+    line-height: 1.6;
+}
+
+/* Hint Box */
+.hint-box {
+    background: #fef3c7;
+    border-left: 4px solid #f59e0b;
+    border-radius: 8px;
+    padding: 1rem;
+    margin: 1rem 0;
+}
+
+.hint-content {
+    color: #78350f;
+    font-size: 0.95rem;
+    line-height: 1.6;
+}
+
+/* Progress Badge */
+.progress-badge {
+    display: inline-block;
+    padding: 0.5rem 1rem;
+    border-radius: 6px;
+    font-size: 0.85rem;
+    font-weight: 500;
+    margin: 0.25rem;
+}
+
+.badge-complete {
+    background: #d1fae5;
+    color: #065f46;
+}
+
+.badge-pending {
+    background: #fef3c7;
+    color: #92400e;
+}
+
+.badge-locked {
+    background: #f3f4f6;
+    color: #6b7280;
+}
+
+/* Metric Cards */
+.metric-card {
+    background: white;
+    border: 1px solid #e2e8f0;
+    border-radius: 12px;
+    padding: 1.5rem;
+    text-align: center;
+}
+
+.metric-value {
+    font-size: 2rem;
+    font-weight: 700;
+    color: #1e293b;
+}
+
+.metric-label {
+    font-size: 0.85rem;
+    color: #64748b;
+    margin-top: 0.25rem;
+}
+
+/* Buttons */
+.stButton > button {
+    background: #3b82f6 !important;
+    color: white !important;
+    border: none !important;
+    border-radius: 8px !important;
+    padding: 0.65rem 1.5rem !important;
+    font-weight: 500 !important;
+    transition: all 0.2s !important;
+}
+
+.stButton > button:hover {
+    background: #2563eb !important;
+    box-shadow: 0 4px 12px rgba(59, 130, 246, 0.3) !important;
+}
+
+/* Analysis Cards */
+.analysis-card {
+    background: white;
+    border: 1px solid #e2e8f0;
+    border-radius: 12px;
+    padding: 1.5rem;
+    margin-bottom: 1rem;
+}
+
+.strength-item {
+    background: #d1fae5;
+    padding: 0.75rem;
+    border-radius: 8px;
+    margin: 0.5rem 0;
+    color: #065f46;
+    font-size: 0.9rem;
+}
+
+.weakness-item {
+    background: #fee2e2;
+    padding: 0.75rem;
+    border-radius: 8px;
+    margin: 0.5rem 0;
+    color: #991b1b;
+    font-size: 0.9rem;
+}
+
+.suspect-item {
+    background: #fef3c7;
+    padding: 0.75rem;
+    border-radius: 8px;
+    margin: 0.5rem 0;
+    color: #92400e;
+    font-size: 0.9rem;
+}
+
+/* Rank Badge */
+.rank-badge {
+    display: inline-block;
+    padding: 1.5rem 2.5rem;
+    border-radius: 12px;
+    font-size: 1.8rem;
+    font-weight: 700;
+    margin: 1rem 0;
+}
+
+/* Question Card */
+.question-card {
+    background: white;
+    border: 1px solid #e2e8f0;
+    border-radius: 12px;
+    padding: 2rem;
+    margin: 1rem 0;
+}
+
+/* Progress bar */
+.stProgress > div > div > div {
+    background: #3b82f6 !important;
+}
+"""
+
+
+def _minify(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{}:;,>])\s*', r'\1', css).strip()
+
+
+# Built once per process
+STYLESHEET_MIN = _minify(STYLESHEET)
+
+# Appends the stylesheet to the app document (the component iframe is same-origin),
+# where it outlives the iframe; later reruns don't need to send it again
+_INJECT_SCRIPT = """<script>
+const doc = window.parent.document;
+if (!doc.getElementById('cts-style')) {
+  const style = doc.createElement('style');
+  style.id = 'cts-style';
+  style.textContent = %s;
+  doc.head.appendChild(style);
+}
+</script>"""
+
+
+def inject_stylesheet():
+    """Send the stylesheet once per session instead of on every rerun"""
+    if st.session_state.get('css_injected'):
+        return
+    html = _INJECT_SCRIPT % json.dumps(STYLESHEET_MIN)
+    components.html(html, height=0)
+    st.session_state['css_injected'] = True
+
+
+def emit(html):
+    """st.markdown for raw HTML fragments"""
+    st.markdown(html, unsafe_allow_html=True)
+
+
+MOTTO = '<div class="motto">💪 Use your strengths to overcome your weaknesses</div>'
+
+
+@lru_cache(maxsize=256)
+def page_header(title, subtitle):
+    return f'<div class="page-header"><h1>{title}</h1><p>{subtitle}</p></div>'
+
+
+@lru_cache(maxsize=1024)
+def metric_card(value, label):
+    return f'<div class="metric-card"><div class="metric-value">{value}</div><div class="metric-label">{label}</div></div>'
+
+
+@lru_cache(maxsize=256)
+def case_card(title, description=None):
+    body = f'<div class="case-description">{description}</div>' if description is not None else ''
+    return f'<div class="case-card"><div class="case-title">{title}</div>{body}</div>'
+
+
+@lru_cache(maxsize=64)
+def badge(kind, text):
+    return f'<span class="progress-badge badge-{kind}">{text}</span>'
+
+
+@lru_cache(maxsize=16)
+def rank_badge(rank, color):
+    return (
+        '<div style="text-align: center; margin: 2rem 0;">'
+        f'<div class="rank-badge" style="background: {color}; color: white;">{rank}</div></div>'
+    )
+
+
+@lru_cache(maxsize=256)
+def nav_bar(logo_html, avatar_html, username):
+    return (
+        '<div class="nav-bar">'
+        f'<div class="nav-left">{logo_html}<h1 class="app-title">ClueToSolve</h1></div>'
+        '<div class="nav-right"><div class="user-profile">'
+        f'{avatar_html}<span class="user-name">Detective {username}</span>'
+        '</div></div></div>'
+    )
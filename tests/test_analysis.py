@@ -0,0 +1,51 @@
+from analysis import DEFAULTS, MAX_BULLETS, AnalysisParser, parse_analysis
+
+RESPONSE = """STRENGTHS:
+• Spotted the AA criterion quickly
+- Used the BPT converse correctly
+PRACTICE:
+* Pythagorean identity rearrangements
+RED HERRINGS:
+• Confused sin and cos of complementary angles
+"""
+
+
+def test_parses_every_section():
+    assert parse_analysis(RESPONSE) == {
+        'strengths': ["Spotted the AA criterion quickly", "Used the BPT converse correctly"],
+        'weaknesses': ["Pythagorean identity rearrangements"],
+        'red_herrings': ["Confused sin and cos of complementary angles"]
+    }
+
+
+def test_chunk_boundaries_do_not_matter():
+    whole = parse_analysis(RESPONSE)
+    for size in (1, 2, 3, 7, 50):
+        parser = AnalysisParser()
+        for i in range(0, len(RESPONSE), size):
+            parser.feed(RESPONSE[i:i + size])
+        assert parser.close() == whole
+
+
+def test_snapshot_only_holds_complete_lines():
+    parser = AnalysisParser()
+    parser.feed("STRENGTHS:\n• Spotted the AA")
+    assert parser.snapshot()['strengths'] == []
+    parser.feed(" criterion\n")
+    assert parser.snapshot()['strengths'] == ["Spotted the AA criterion"]
+
+
+def test_last_line_without_newline_is_kept():
+    assert parse_analysis("PRACTICE:\n- Heights and distances")['weaknesses'] == ["Heights and distances"]
+
+
+def test_caps_bullets_and_fills_empty_sections():
+    text = "STRENGTHS:\n" + "".join(f"- point {i}\n" for i in range(MAX_BULLETS + 2))
+    result = parse_analysis(text)
+    assert result['strengths'] == [f"point {i}" for i in range(MAX_BULLETS)]
+    assert result['weaknesses'] == [DEFAULTS['weaknesses']]
+    assert result['red_herrings'] == [DEFAULTS['red_herrings']]
+
+
+def test_bullets_before_any_section_are_ignored():
+    assert parse_analysis("- stray\nSTRENGTHS:\n- kept\n")['strengths'] == ["kept"]
@@ -0,0 +1,61 @@
+import pytest
+
+import caching
+from caching import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(caching, 'time', clock)
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(ttl=10)
+    cache.set('a', 1)
+    clock.now += 9.9
+    assert cache.get('a') == 1
+    clock.now += 0.2
+    assert cache.get('a', 'gone') == 'gone'
+    assert len(cache) == 0
+
+
+def test_setting_again_restarts_the_ttl(clock):
+    cache = TTLCache(ttl=10)
+    cache.set('a', 1)
+    clock.now += 8
+    cache.set('a', 2)
+    clock.now += 8
+    assert cache.get('a') == 2
+
+
+def test_evicts_least_recently_used(clock):
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_stats_count_hits_and_misses(clock):
+    cache = TTLCache()
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('b')
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+    cache.clear()
+    assert cache.stats()['size'] == 0
+    assert cache.stats()['hits'] == 0
@@ -0,0 +1,95 @@
+import random
+
+from ledger import ResponseLedger
+
+DIFFICULTIES = ('basic', 'intermediate', 'advanced')
+TOPICS = ('AA similarity', 'BPT converse', 'Pythagorean identity')
+
+
+def response(question_id, is_correct, difficulty='basic', topic='AA similarity', time_spent=10.0, subtopic='S'):
+    return {'subtopic': subtopic, 'difficulty': difficulty, 'question_id': question_id,
+            'topic': topic, 'is_correct': is_correct, 'time_spent': time_spent}
+
+
+def expected(history):
+    """Rebuild everything the ledger tracks from scratch: last answer per question, first-seen order"""
+    final = {}
+    for r in history:
+        final[ResponseLedger.key_of(r)] = r
+    answers = list(final.values())
+    streak = 0
+    for r in reversed(answers):
+        if not r['is_correct']:
+            break
+        streak += 1
+    by_difficulty = {}
+    for r in answers:
+        total, correct, spent = by_difficulty.get(r['difficulty'], (0, 0, 0.0))
+        by_difficulty[r['difficulty']] = (total + 1, correct + r['is_correct'], spent + r['time_spent'])
+    topics = {}
+    for r in answers:
+        topics[r['topic']] = topics.get(r['topic'], 0) + r['is_correct']
+    return answers, streak, by_difficulty, topics
+
+
+def test_streak_counts_trailing_correct_answers():
+    ledger = ResponseLedger()
+    for i, ok in enumerate([True, False, True, True]):
+        ledger.record(response(i, ok))
+    assert ledger.streak == 2
+    ledger.record(response(4, False))
+    assert ledger.streak == 0
+
+
+def test_resubmitting_keeps_position_and_rescans_streak():
+    ledger = ResponseLedger.from_responses([response(1, True), response(2, False), response(3, True)])
+    assert ledger.streak == 1
+    ledger.record(response(2, True))
+    assert [r['question_id'] for r in ledger.responses()] == [1, 2, 3]
+    assert ledger.streak == 3
+    assert ledger.count() == 3
+    assert ledger.accuracy() == 1.0
+
+
+def test_same_id_in_another_subtopic_is_a_separate_answer():
+    ledger = ResponseLedger()
+    ledger.record(response(1, True, subtopic='A'))
+    ledger.record(response(1, False, subtopic='B'))
+    assert len(ledger) == 2
+    assert ledger.get('A', 'basic', 1)['is_correct']
+
+
+def test_best_topic_needs_a_correct_answer():
+    ledger = ResponseLedger()
+    ledger.record(response(1, False, topic='AA similarity'))
+    assert ledger.best_topic() is None
+    ledger.record(response(2, True, topic='BPT converse'))
+    assert ledger.best_topic() == 'BPT converse'
+
+
+def test_matches_recomputation_on_random_histories():
+    rng = random.Random(1234)
+    for _ in range(300):
+        ledger = ResponseLedger()
+        history = []
+        for _ in range(rng.randint(1, 25)):
+            r = response(rng.randint(1, 6), rng.random() < 0.6, difficulty=rng.choice(DIFFICULTIES),
+                         topic=rng.choice(TOPICS), time_spent=float(rng.randint(1, 60)))
+            history.append(r)
+            ledger.record(r)
+            # Reading the streak mid-history exercises the incremental path
+            if rng.random() < 0.5:
+                assert ledger.streak == expected(history)[1]
+
+        answers, streak, by_difficulty, topics = expected(history)
+        assert ledger.responses() == answers
+        assert ledger.streak == streak
+        assert ledger.count() == len(answers)
+        for difficulty in DIFFICULTIES:
+            total, correct, spent = by_difficulty.get(difficulty, (0, 0, 0.0))
+            tally = ledger.tally(difficulty)
+            assert (tally.total, tally.correct) == (total, correct)
+            assert abs(tally.time_spent - spent) < 1e-9
+        assert {t: tally.correct for t, tally in ledger.by_topic.items()} == topics
+        if any(topics.values()):
+            assert topics[ledger.best_topic()] == max(topics.values())
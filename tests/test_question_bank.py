@@ -0,0 +1,80 @@
+import json
+import os
+
+from question_bank import CHAPTERS_FILE, QuestionBank
+from question_pack import PACK_FILE, build_pack, open_pack
+
+QUESTIONS_FILE = 'similarity_questions.json'
+
+
+def question(question_id, text, difficulty='basic'):
+    return {
+        'id': question_id,
+        'difficulty_level': difficulty,
+        'question': text,
+        'options': ['AA', 'SAS', 'SSS', 'RHS'],
+        'answer': {'correct_option': 'A', 'explanation': 'Two equal angles.'}
+    }
+
+
+def write(path, document, mtime_ns=None):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def make_tree(tmp_path, text="Which criterion proves similarity?"):
+    write(tmp_path / CHAPTERS_FILE, {'chapters': {'Triangle': {'subtopics': {
+        'Similarity Criterion': {'questions_file': QUESTIONS_FILE}
+    }}}})
+    write(tmp_path / QUESTIONS_FILE, {'topic': 'Similarity', 'questions': [question(1, text)]},
+          mtime_ns=1_700_000_000_000_000_000)
+    bank = QuestionBank(str(tmp_path), use_pack=False)
+    build_pack(bank.sources(), base_dir=str(tmp_path))
+    return bank
+
+
+def test_fresh_pack_serves_every_source(tmp_path):
+    make_tree(tmp_path)
+    bank = QuestionBank(str(tmp_path))
+    # 1.json and the questions file; concept_tags.json doesn't exist here
+    assert bank.pack_hits == 2
+    assert bank.get('Triangle', 'Similarity Criterion', 'basic', 1).text == "Which criterion proves similarity?"
+
+
+def test_edited_source_is_read_from_json(tmp_path):
+    make_tree(tmp_path)
+    write(tmp_path / QUESTIONS_FILE, {'topic': 'Similarity', 'questions': [question(1, "Edited?")]},
+          mtime_ns=1_700_000_001_000_000_000)
+    bank = QuestionBank(str(tmp_path))
+    assert bank.pack_hits == 1
+    assert bank.get('Triangle', 'Similarity Criterion', 'basic', 1).text == "Edited?"
+
+
+def test_same_mtime_but_different_size_is_stale(tmp_path):
+    make_tree(tmp_path)
+    write(tmp_path / QUESTIONS_FILE, {'topic': 'Similarity', 'questions': [question(1, "Longer edited text?")]},
+          mtime_ns=1_700_000_000_000_000_000)
+    pack = open_pack(str(tmp_path / PACK_FILE))
+    try:
+        st = os.stat(tmp_path / QUESTIONS_FILE)
+        assert pack.get(QUESTIONS_FILE, st.st_mtime_ns, st.st_size) is None
+    finally:
+        pack.close()
+
+
+def test_bank_notices_edits_on_disk(tmp_path):
+    bank = make_tree(tmp_path)
+    assert not bank.is_stale()
+    os.utime(tmp_path / QUESTIONS_FILE, ns=(1_700_000_002_000_000_000,) * 2)
+    assert bank.is_stale()
+
+
+def test_corrupt_pack_falls_back_to_json(tmp_path):
+    make_tree(tmp_path)
+    (tmp_path / PACK_FILE).write_bytes(b'not a pack')
+    assert open_pack(str(tmp_path / PACK_FILE)) is None
+    bank = QuestionBank(str(tmp_path))
+    assert bank.pack_hits == 0
+    assert len(bank.questions('Triangle', 'Similarity Criterion')) == 1
@@ -0,0 +1,68 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from scheduler import LEVEL_PRIOR, TARGET_OFFSET, ItemModel, expected
+
+LEVEL = ('Triangle', 'Similarity Criterion', 'basic')
+
+
+def make_model(ratings):
+    """ItemModel over one level whose items have the given {id: (rating, answers)}"""
+    bank = SimpleNamespace(by_key={(*LEVEL, qid): None for qid in ratings})
+    return ItemModel(bank, {(*LEVEL, qid): entry for qid, entry in ratings.items()})
+
+
+def nearest(model, ability, exclude=()):
+    target = ability - TARGET_OFFSET
+    candidates = [key[3] for key in model.ratings if key[:3] == LEVEL and key[3] not in exclude]
+    if not candidates:
+        return None
+
+    def closeness(qid):
+        rating, answers = model.ratings[(*LEVEL, qid)]
+        return abs(rating - target), answers, qid
+    return min(candidates, key=closeness)
+
+
+def test_expected_is_one_half_at_equal_rating():
+    assert expected(0.3, 0.3) == pytest.approx(0.5)
+    assert expected(2.0, 0.0) > 0.5 > expected(0.0, 2.0)
+
+
+def test_unrated_items_start_at_their_level_prior():
+    model = make_model({1: (LEVEL_PRIOR['basic'], 0)})
+    assert model.rating(*LEVEL, 1) == LEVEL_PRIOR['basic']
+    assert model.rating(*LEVEL, 99) == LEVEL_PRIOR['basic']
+
+
+def test_equal_priors_rotate_through_least_answered_then_lowest_id():
+    model = make_model({1: (0.0, 3), 2: (0.0, 1), 3: (0.0, 1)})
+    assert model.pick(*LEVEL, TARGET_OFFSET) == 2
+    assert model.pick(*LEVEL, TARGET_OFFSET, exclude={2}) == 3
+
+
+def test_nothing_left_to_pick():
+    model = make_model({1: (0.0, 0)})
+    assert model.pick(*LEVEL, 0.0, exclude={1}) is None
+    assert model.pick('Triangle', 'Similarity Criterion', 'advanced', 0.0) is None
+
+
+def test_pick_matches_brute_force():
+    rng = random.Random(42)
+    for _ in range(500):
+        ratings = {qid: (round(rng.uniform(-3, 3), rng.choice((1, 2))), rng.randint(0, 3))
+                   for qid in range(1, rng.randint(2, 12))}
+        model = make_model(ratings)
+        exclude = set(rng.sample(sorted(ratings), rng.randint(0, len(ratings))))
+        ability = rng.uniform(-3, 5)
+        assert model.pick(*LEVEL, ability, exclude) == nearest(model, ability, exclude)
+
+
+def test_refresh_moves_items_between_buckets():
+    model = make_model({1: (-2.0, 0), 2: (2.0, 0)})
+    model.refresh({(*LEVEL, 1): (2.5, 4), (*LEVEL, 2): (-2.5, 4)})
+    assert model.pick(*LEVEL, -2.5 + TARGET_OFFSET) == 2
+    assert model.pick(*LEVEL, 2.5 + TARGET_OFFSET) == 1
+    assert sum(len(ids) for ids in model.buckets[LEVEL].values()) == 2
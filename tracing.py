@@ -0,0 +1,205 @@
+"""Per-rerun timing spans and counters.
+
+Enable with CLUETOSOLVE_TRACE=1. Metrics are then served in Prometheus text
+format on http://127.0.0.1:$CLUETOSOLVE_METRICS_PORT/metrics (default 9464),
+and every finished span is appended to $CLUETOSOLVE_TRACE_LOG as JSON lines
+when that is set. Gauges registered with register_gauge() are read at
+scrape time. When tracing is off, @traced returns the function itself
+and span() hands back a shared no-op context manager.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+ENABLED = os.environ.get('CLUETOSOLVE_TRACE') == '1'
+METRICS_PORT = int(os.environ.get('CLUETOSOLVE_METRICS_PORT', '9464'))
+TRACE_LOG = os.environ.get('CLUETOSOLVE_TRACE_LOG')
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NOOP = nullcontext()
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class Registry:
+    """Span histograms, named counters and gauges for this process"""
+
+    def __init__(self):
+        self.spans = {}
+        self.counters = {}
+        # name -> (read, label); read() returns a number, or {label value: number} when label is set
+        self.gauges = {}
+        self._lock = threading.Lock()
+        self._log = open(TRACE_LOG, 'a', encoding='utf-8') if TRACE_LOG else None
+
+    def observe(self, name, seconds, **attrs):
+        with self._lock:
+            histogram = self.spans.get(name)
+            if histogram is None:
+                histogram = self.spans[name] = Histogram()
+            histogram.observe(seconds)
+            if self._log is not None:
+                record = {'ts': time.time(), 'span': name, 'seconds': seconds}
+                record.update(attrs)
+                self._log.write(json.dumps(record, ensure_ascii=False) + '\n')
+                self._log.flush()
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def prometheus(self):
+        lines = []
+        with self._lock:
+            if self.spans:
+                lines.append('# HELP cluetosolve_span_seconds Duration of traced spans')
+                lines.append('# TYPE cluetosolve_span_seconds histogram')
+            for name, h in sorted(self.spans.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS, h.counts):
+                    cumulative += count
+                    lines.append(f'cluetosolve_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'cluetosolve_span_seconds_bucket{{span="{name}",le="+Inf"}} {h.count}')
+                lines.append(f'cluetosolve_span_seconds_sum{{span="{name}"}} {h.sum}')
+                lines.append(f'cluetosolve_span_seconds_count{{span="{name}"}} {h.count}')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'# TYPE cluetosolve_{name} counter')
+                lines.append(f'cluetosolve_{name} {value}')
+            gauges = sorted(self.gauges.items())
+        # Read outside the lock: a gauge may take locks of its own
+        for name, (read, label) in gauges:
+            lines.append(f'# TYPE cluetosolve_{name} gauge')
+            if label is None:
+                lines.append(f'cluetosolve_{name} {read()}')
+                continue
+            for key, value in sorted(read().items()):
+                lines.append(f'cluetosolve_{name}{{{label}="{key}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def register_gauge(self, name, read, label=None):
+        with self._lock:
+            self.gauges[name] = (read, label)
+
+
+registry = Registry()
+
+
+class _Span:
+    __slots__ = ('name', 'attrs', 'start')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # st.rerun()/st.stop() raise BaseExceptions that are control flow, not errors
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self.attrs['error'] = exc_type.__name__
+            registry.incr(f'{self.name}_errors_total')
+        registry.observe(self.name, time.perf_counter() - self.start, **self.attrs)
+        return False
+
+
+def span(name, **attrs):
+    """Context manager timing a block; a shared no-op when tracing is off"""
+    if not ENABLED:
+        return _NOOP
+    return _Span(name, attrs)
+
+
+def traced(name=None):
+    """Decorator recording each call as a span; returns fn untouched when tracing is off"""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(span_name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def incr(name, value=1):
+    if ENABLED:
+        registry.incr(name, value)
+
+
+def register_gauge(name, read, label=None):
+    """Export read() as a gauge, evaluated on every scrape (no-op when tracing is off)"""
+    if ENABLED:
+        registry.register_gauge(name, read, label)
+
+
+def record_llm(kind, prompt_chars, output_chars):
+    """Completed LLM call with rough token counts (~4 characters per token); its latency is the llm_<kind> span"""
+    if not ENABLED:
+        return
+    registry.incr(f'llm_{kind}_calls_total')
+    registry.incr('llm_prompt_tokens_total', prompt_chars // 4)
+    registry.incr('llm_output_tokens_total', output_chars // 4)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=METRICS_PORT):
+    """Serve /metrics on localhost once per process (no-op when tracing is off)"""
+    global _server
+    if not ENABLED or _server is not None:
+        return
+    with _server_lock:
+        if _server is not None:
+            return
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        except OSError:
+            # Another worker already owns the port
+            _server = False
+            return
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name='metrics', daemon=True).start()